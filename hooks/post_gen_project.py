@@ -1,3 +1,8 @@
+import ast
+import copy
+import hashlib
+import http.client
+import json
 import os
 import random
 import re
@@ -5,26 +10,401 @@ import shutil
 import string
 import subprocess
 import sys
+import sysconfig
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 project_slug = "{{ cookiecutter.project_slug }}"
+app_name = "{{ cookiecutter.app_name }}"
 db_type = "{{ cookiecutter.db_type }}"
+db_pooling = "{{ cookiecutter.db_pooling }}"
+project_type = "{{ cookiecutter.project_type }}"
+use_celery = "{{ cookiecutter.use_celery }}" == "y"
+use_redis = "{{ cookiecutter.use_redis }}" == "y"
+use_whitenoise = "{{ cookiecutter.use_whitenoise }}" == "y"
+use_docker = "{{ cookiecutter.use_docker }}" == "y"
+use_asgi = "{{ cookiecutter.use_asgi }}" == "y"
+# ASGI projects are served by uvicorn workers whatever worker class was picked.
+gunicorn_worker_class = "uvicorn" if use_asgi else "{{ cookiecutter.gunicorn_worker_class }}"
+use_rest_framework = "{{ cookiecutter.use_rest_framework }}" == "y"
+use_graphql = "{{ cookiecutter.use_graphql }}" == "y"
+use_jwt = "{{ cookiecutter.use_jwt }}" == "y"
+install_mode = "{{ cookiecutter.install_mode }}"
+wheelhouse_dir = os.path.expanduser("{{ cookiecutter.wheelhouse_dir }}")
+installer = "{{ cookiecutter.installer }}"
+no_input = os.environ.get(
+    "COOKIECUTTER_NO_INPUT", "").lower() not in ("", "0", "false", "n", "no")
+
+# Packages needed on top of requirements.txt, keyed by the option that needs
+# them. Everything is collected up front by plan_packages() so a single pip
+# run resolves and installs the whole set.
+DATABASE_PACKAGES = {
+    "PostgreSQL": ["psycopg2-binary"],
+    "SQL Server": ["pyodbc"],
+    "Oracle": ["cx_Oracle"],
+    "SQLite": [],  # SQLite comes pre-installed with Python
+}
+# Django's native connection pool (Django 5.1+) needs psycopg 3 with its pool
+# extra; it replaces psycopg2-binary when db_pooling is `native`.
+NATIVE_POOL_PACKAGES = ["Django>=5.1", "psycopg[binary,pool]"]
+CELERY_PACKAGES = ["celery[redis]>=5.4"]
+# Celery queues, most urgent first, with the worker concurrency docker-compose
+# starts for each (CELERY_<QUEUE>_CONCURRENCY overrides it).
+CELERY_QUEUES = {"high": 4, "default": 4, "low": 2}
+# Notification channels with the rate limit (messages per second) of their
+# provider, see notifications/providers.py in the app.
+NOTIFICATION_CHANNELS = {"sms": 100, "email": 50, "push": 500}
+DOCKER_PACKAGES = ["gunicorn"]
+ASGI_PACKAGES = ["uvicorn[standard]", "httpx"]
+# Extra packages for gunicorn's worker class, see gunicorn.conf.py.
+GUNICORN_WORKER_PACKAGES = {
+    "gthread": [],
+    "gevent": ["gevent"],
+    "uvicorn": ["uvicorn-worker"],
+}
+REST_FRAMEWORK_PACKAGES = ["djangorestframework", "django-filter"]
+GRAPHQL_PACKAGES = ["graphene-django"]
+JWT_PACKAGES = ["djangorestframework-simplejwt"]
+# hiredis is picked up by redis-py automatically and parses replies in C.
+REDIS_PACKAGES = ["redis", "hiredis"]
+WHITENOISE_PACKAGES = ["whitenoise"]
+
+# Runtime and development requirements, and the lockfiles generated from them.
+RUNTIME_REQUIREMENTS = "requirements.txt"
+DEV_REQUIREMENTS = "requirements-dev.txt"
+RUNTIME_LOCK = "requirements.lock"
+DEV_LOCK = "requirements-dev.lock"
+
+# Generation profile: one entry per timed phase, in the order phases start.
+# Phases nest, so sub-steps are recorded with the depth they ran at.
+phase_timings = []
+_open_phases = []
+
+VENV_DIR = "venv"
+# Installer backend used for the project's virtualenv, see resolve_installer().
+installer_backend = "pip"
+# Database connection strategy actually used, see resolve_db_pooling().
+db_connection_strategy = "persistent"
+
+
+def read_received_bytes():
+    """
+    Return the bytes received on all non-loopback interfaces so far.
+
+    Only available on Linux (from /proc/net/dev); returns None elsewhere. The
+    counter is system-wide, so the per-phase figures are an upper bound on
+    what the hook itself downloaded.
+    """
+    try:
+        with open("/proc/net/dev") as file:
+            lines = file.readlines()[2:]
+    except OSError:
+        return None
+
+    received = 0
+    for line in lines:
+        interface, counters = line.split(":", 1)
+        if interface.strip() != "lo":
+            received += int(counters.split()[0])
+    return received
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Profile a generation phase.
+
+    Records the wall time, the wall time spent in subprocesses started through
+    check_call()/run_command() and, where available, the bytes downloaded.
+    """
+    phase = {
+        "name": name,
+        "depth": len(_open_phases),
+        "seconds": 0.0,
+        "subprocess_seconds": 0.0,
+        "downloaded_bytes": None,
+    }
+    phase_timings.append(phase)
+    _open_phases.append(phase)
+    received = read_received_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase["seconds"] = round(time.perf_counter() - start, 3)
+        phase["subprocess_seconds"] = round(phase["subprocess_seconds"], 3)
+        if received is not None:
+            phase["downloaded_bytes"] = read_received_bytes() - received
+        _open_phases.pop()
+
+
+def record_subprocess_time(elapsed):
+    for phase in _open_phases:
+        phase["subprocess_seconds"] += elapsed
+
+
+def check_call(command, **kwargs):
+    """subprocess.check_call() that is accounted for in the generation profile."""
+    start = time.perf_counter()
+    try:
+        return subprocess.check_call(command, **kwargs)
+    finally:
+        record_subprocess_time(time.perf_counter() - start)
+
+
+def format_bytes(count):
+    if count is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GB"
+
+
+def print_phase_timings():
+    print("\n================\nGeneration timings\n================")
+    names = ["  " * phase["depth"] + phase["name"] for phase in phase_timings]
+    width = max(len(name) for name in names + ["phase"])
+    print(f"{'phase'.ljust(width)}  {'wall':>9}  {'subprocess':>10}  {'downloaded':>10}")
+    for name, phase in zip(names, phase_timings):
+        print(f"{name.ljust(width)}  {phase['seconds']:8.2f}s  "
+              f"{phase['subprocess_seconds']:9.2f}s  "
+              f"{format_bytes(phase['downloaded_bytes']):>10}")
+    total = sum(phase["seconds"]
+                for phase in phase_timings if phase["depth"] == 0)
+    print(f"{'total'.ljust(width)}  {total:8.2f}s")
+
+
+def write_generation_profile():
+    """
+    Write the generation profile as JSON for tracking latency across versions.
+
+    The path defaults to .generation-profile.json in the generated project and
+    can be changed with COOKIECUTTER_PROFILE_PATH.
+    """
+    path = os.environ.get("COOKIECUTTER_PROFILE_PATH", ".generation-profile.json")
+    # Every answer to cookiecutter.json, including options added later; keys
+    # starting with _ are cookiecutter's own.
+    answers = json.loads(r'''{{ cookiecutter | tojson }}''')
+    profile = {
+        "template": "{{ cookiecutter.get('_template', '') }}",
+        "template_commit": "{{ cookiecutter.get('_commit', '') }}",
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "options": {key: value for key, value in answers.items() if not key.startswith("_")},
+        "total_seconds": round(sum(
+            phase["seconds"] for phase in phase_timings if phase["depth"] == 0), 3),
+        "phases": phase_timings,
+    }
+    with open(path, 'w') as file:
+        json.dump(profile, file, indent=2)
+    print(f"Generation profile written to {path}")
+
+
+def ask(question, value="", env_var=None, default=""):
+    """
+    Answer a runtime question, prompting only as a last resort.
+
+    The answer is taken from, in order: `value` (a cookiecutter context
+    variable, empty unless given on the command line or in a config file), the
+    `env_var` environment variable, and an interactive prompt.
+    With COOKIECUTTER_NO_INPUT set, or when stdin is closed, `default` is used
+    instead of prompting, so the hook never blocks.
+    """
+    if value:
+        return value
+    if env_var and os.environ.get(env_var):
+        return os.environ[env_var]
+    if no_input:
+        print(f"{question}{default} (no input)")
+        return default
+    try:
+        return input(question)
+    except EOFError:
+        return default
+
+
+def configure_non_interactive():
+    """Stop the tools the hook runs from prompting when there is no input."""
+    if not no_input:
+        return
+    print("COOKIECUTTER_NO_INPUT is set, running without prompts.")
+    os.environ.setdefault("PIP_NO_INPUT", "1")
+    os.environ.setdefault("GIT_TERMINAL_PROMPT", "0")
+    os.environ.setdefault("GIT_SSH_COMMAND", "ssh -o BatchMode=yes")
+
+
+def plan_packages():
+    """
+    Collect every package the selected options need.
+
+    Duplicates are dropped while keeping the first-seen order, so the result can
+    be handed to pip as-is.
+    """
+    if db_connection_strategy == "native":
+        packages = list(NATIVE_POOL_PACKAGES)
+    else:
+        packages = list(DATABASE_PACKAGES.get(db_type, []))
+    if use_celery:
+        packages += CELERY_PACKAGES
+    if use_docker:
+        packages += DOCKER_PACKAGES
+        packages += GUNICORN_WORKER_PACKAGES.get(gunicorn_worker_class, [])
+        if gunicorn_worker_class == "gevent" and "psycopg2-binary" in packages:
+            # Lets psycopg2 wait for the database without blocking the worker,
+            # see post_fork in gunicorn.conf.py.
+            packages.append("psycogreen")
+    if use_rest_framework:
+        packages += REST_FRAMEWORK_PACKAGES
+    if use_graphql:
+        packages += GRAPHQL_PACKAGES
+    if use_jwt:
+        packages += JWT_PACKAGES
+    if use_redis or use_celery:
+        packages += REDIS_PACKAGES
+    if use_asgi:
+        packages += ASGI_PACKAGES
+    if use_whitenoise:
+        packages += WHITENOISE_PACKAGES
+    return list(dict.fromkeys(packages))
+
+
+def read_requirements(path):
+    """Return the requirement lines of a requirements file, without comments."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as file:
+        lines = (line.split('#', 1)[0].strip() for line in file)
+        return [line for line in lines if line]
+
+
+def venv_executable(name):
+    """Return the path of an executable inside the project's virtualenv."""
+    if os.name == 'nt':  # Windows
+        return os.path.join(VENV_DIR, 'Scripts', f"{name}.exe")
+    return os.path.join(VENV_DIR, 'bin', name)
+
+
+def venv_python():
+    return venv_executable("python")
+
+
+def resolve_installer():
+    """
+    Pick the installer backend.
+
+    `auto` uses uv when it is on PATH and falls back to pip otherwise; asking
+    for uv explicitly also falls back to pip, with a warning, when uv is not
+    installed.
+    """
+    if installer in ("auto", "uv") and shutil.which("uv"):
+        return "uv"
+    if installer == "uv":
+        print("Warning: uv not found on PATH, falling back to pip.")
+    return "pip"
+
+
+def resolve_db_pooling():
+    """
+    Pick the database connection strategy.
+
+    Native pooling and PgBouncer are PostgreSQL-only; every other backend
+    falls back, with a warning, to persistent connections.
+    """
+    if db_pooling != "persistent" and db_type != "PostgreSQL":
+        print(f"Warning: {db_pooling} pooling needs PostgreSQL, "
+              f"using persistent connections for {db_type}.")
+        return "persistent"
+    if use_asgi and db_pooling == "persistent" and db_type == "PostgreSQL":
+        print("Note: ASGI closes database connections after every request, "
+              "consider db_pooling=native or pgbouncer.")
+    return db_pooling
+
+
+def offline_args():
+    """In offline mode installers only look at the local wheelhouse."""
+    if install_mode == "offline":
+        return ["--no-index", "--find-links", wheelhouse_dir]
+    return []
+
+
+def pip_install_command(*args):
+    """
+    Build a `pip install` command that targets the project's virtualenv.
+
+    Always uses the virtualenv's own pip, which supports everything the hook
+    needs (e.g. `--report`); use install_command() for plain installs.
+    """
+    return [venv_python(), "-m", "pip", "install", *offline_args(), *args]
+
+
+def install_command(*args):
+    """Build an install command for the project's virtualenv with the selected backend."""
+    if installer_backend == "uv":
+        return ["uv", "pip", "install", "--python", venv_python(),
+                *offline_args(), *args]
+    return pip_install_command(*args)
+
+
+def ensure_wheelhouse(requirements):
+    """
+    Make sure every requirement can be installed from the local wheelhouse.
+
+    The wheelhouse keeps a manifest of the requirements it was built for. The
+    first generation builds it (this is the only step that needs network
+    access); later generations reuse it as-is and only build wheels for
+    requirements that are not in the manifest yet.
+    """
+    manifest = os.path.join(wheelhouse_dir, "manifest.txt")
+    built = set(read_requirements(manifest))
+    missing = [requirement for requirement in requirements
+               if requirement not in built]
+
+    if not missing:
+        print(f"Reusing wheelhouse at {wheelhouse_dir}.")
+        return
+
+    print(
+        f"Building {len(missing)} requirement(s) into wheelhouse at {wheelhouse_dir}...")
+    os.makedirs(wheelhouse_dir, exist_ok=True)
+    check_call(
+        [venv_python(), "-m", "pip", "wheel", "--wheel-dir", wheelhouse_dir,
+         "--find-links", wheelhouse_dir, *missing])
+
+    with open(manifest, 'a') as file:
+        for requirement in missing:
+            file.write(f"{requirement}\n")
 
 
 def install_requirements():
     print("Setting up virtual environment...")
-    setup_virtualenv()
+    with timed_phase("virtualenv"):
+        setup_virtualenv()
 
-    print("Installing requirements...")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+    packages = plan_packages()
+    if install_mode == "offline":
+        with timed_phase("wheelhouse"):
+            ensure_wheelhouse(
+                read_requirements(RUNTIME_REQUIREMENTS)
+                + read_requirements(DEV_REQUIREMENTS) + packages)
 
-    print("Installing pre-commit...")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "pre-commit"])
+    print(f"Installing requirements and option packages in one pass with {installer_backend}:")
+    for package in packages:
+        print(f"- {package}")
+    with timed_phase(f"{installer_backend} install"):
+        check_call(install_command(
+            "-r", RUNTIME_REQUIREMENTS, "-r", DEV_REQUIREMENTS, *packages))
 
 
 def run_command(command):
     """Run a shell command and raise an error if it fails."""
+    start = time.perf_counter()
     try:
         result = subprocess.run(command, shell=True, check=True,
                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
@@ -33,6 +413,8 @@ def run_command(command):
         print(f"Command failed: {command}")
         print(f"Error output: {e.stderr}")
         raise
+    finally:
+        record_subprocess_time(time.perf_counter() - start)
 
 
 def branch_exists(branch_name):
@@ -49,6 +431,9 @@ def initialize_git_and_push():
         run_command('git init')
         run_command('git add .')
         run_command('git commit -m "Initial commit"')
+        if not repo_link:
+            print("No repo_link given, skipping remote setup.")
+            return
         run_command(f'git remote add origin {repo_link}')
 
         if branch_exists('develop'):
@@ -64,12 +449,34 @@ def initialize_git_and_push():
         print("Please check your repository settings and try again.")
 
 
+def record_benchmark_baseline():
+    """
+    Record benchmarks/baseline.json, so the CI benchmark job has a baseline.
+
+    The benchmark command scales baseline times by a calibration workload
+    timed on each machine, so a baseline recorded here holds on the CI
+    runners too. Generation goes on if the benchmarks cannot run, e.g.
+    without a database server; the CI job then warns until a baseline is
+    committed.
+    """
+    if not os.path.exists(venv_python()):
+        print("No virtualenv, skipping the benchmark baseline.")
+        return
+    print("Recording the benchmark baseline...")
+    try:
+        check_call([venv_python(), "manage.py", "benchmark", "--save", "--repeat", "3"])
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Warning: could not record the benchmark baseline ({e}). "
+              f"Run `python manage.py benchmark --save` and commit benchmarks/baseline.json.")
+
+
 def remove_docker_files():
     """Remove Docker-related files if use_docker is set to 'n'."""
     files_to_remove = [
         '.dockerignore',
         'Dockerfile',
-        'docker-compose.yml'
+        'docker-compose.yml',
+        'gunicorn.conf.py',
     ]
 
     for file in files_to_remove:
@@ -77,20 +484,22 @@ def remove_docker_files():
             print(f"Removing {file}...")
             os.remove(file)
 
-    # Remove the docker directory if it exists
-    docker_directory = 'docker'
-    if os.path.exists(docker_directory) and os.path.isdir(docker_directory):
-        print(f"Removing {docker_directory} directory...")
-        shutil.rmtree(docker_directory)
+    # Remove the docker and deploy directories if they exist
+    for docker_directory in ('docker', 'deploy'):
+        if os.path.exists(docker_directory) and os.path.isdir(docker_directory):
+            print(f"Removing {docker_directory} directory...")
+            shutil.rmtree(docker_directory)
 
 
 def set_gitlab_variables():
     """
     Set GitLab CI/CD variables for the project.
 
-    This function asks the user to input their GitLab project ID and personal access
-    token. If the user enters 'MANUAL' as the project ID, the function will skip setting
-    the variables and return.
+    The GitLab project ID comes from the `gitlab_project_id` template variable or
+    the GITLAB_PROJECT_ID environment variable, and the personal access token from
+    GITLAB_TOKEN. Missing answers are asked for interactively, unless the hook runs
+    with COOKIECUTTER_NO_INPUT set. If the project ID is 'MANUAL', or no token is
+    given, the function will skip setting the variables and return.
 
     The function sets the following variables:
 
@@ -105,20 +514,27 @@ def set_gitlab_variables():
     """
 
     print("\n================\nSetting GitLab CI/CD variables...\n================\n")
-    error = False
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "requests"])
-    import requests
 
-    # Collect GitLab information
-    project_id = input(
-        "Enter your GitLab project ID (enter MANUAL if you want to setup manually): ")
+    # Collect GitLab information. Each answer can be supplied up front through
+    # the cookiecutter context or the environment; see ask().
+    project_id = ask(
+        "Enter your GitLab project ID (enter MANUAL if you want to setup manually): ",
+        value="{{ cookiecutter.gitlab_project_id }}",
+        env_var="GITLAB_PROJECT_ID",
+        default="MANUAL",
+    )
 
-    token = input(
-        "Enter your GitLab personal access token or type CANCEL to skip: ")
+    token = ""
+    if project_id and project_id.lower() != "manual":
+        token = ask(
+            "Enter your GitLab personal access token or type CANCEL to skip: ",
+            env_var="GITLAB_TOKEN",
+            default="CANCEL",
+        )
 
-    if not token.strip():
-        token = input("Oga, enter your GitLab token naahhh: ")
+        if not token.strip():
+            token = ask("Oga, enter your GitLab token naahhh: ",
+                        default="CANCEL")
 
     if not project_id or project_id.lower() == "manual" or not token or token.lower() == 'cancel':
         print("\n You've chosen to set gitlab manually. \n")
@@ -135,203 +551,792 @@ def set_gitlab_variables():
         "DEPLOYMENT_PORT": "{{ cookiecutter.deployment_port }}",
     }
 
-    url = f"https://gitlab.com/api/v4/projects/{project_id}/variables"
-    headers = {"PRIVATE-TOKEN": token}
+    gitlab_url = ask("GitLab URL (default https://gitlab.com): ", value="{{ cookiecutter.gitlab_url }}",
+                     env_var="GITLAB_URL", default="https://gitlab.com") or "https://gitlab.com"
+    client = GitLabClient(gitlab_url, token)
+    results = provision_gitlab_variables(client, project_id, variables)
 
-    for key, value in variables.items():
-        data = {
-            "key": key,
-            "value": value,
-            "protected": False,
-            "masked": True
-        }
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 201:
-            print(f"Successfully set variable: {key}")
+    for key, (outcome, detail) in results.items():
+        if outcome == "failed":
+            print(f"Failed to set variable: {key}. {detail}")
         else:
-            error = True
-            print(
-                f"Failed to set variable: {key}."
-                f"Status code: {response.status_code}"
-            )
+            print(f"Successfully {outcome} variable: {key}")
 
-    if not error:
+    failed = sum(outcome == "failed" for outcome, _ in results.values())
+    if not failed:
         print("\n================\nGitLab CI/CD variables set successfully!\n================\n")
+    else:
+        print(f"\n{len(results) - failed}/{len(results)} GitLab CI/CD variables set.")
+
+
+class GitLabClient:
+    """
+    Minimal GitLab API client used to provision CI/CD variables.
+
+    Only the standard library is used, so nothing has to be installed at runtime.
+    Every worker thread keeps one keep-alive connection, so concurrent requests
+    reuse connections instead of opening one per request. Requests that fail
+    with a connection error, 429 or 5xx are retried with exponential backoff,
+    honouring Retry-After.
+
+    `base_url` may point at any GitLab instance, including a local stand-in
+    server over plain http.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url, token, retries=3, backoff=0.5, timeout=10):
+        url = urllib.parse.urlsplit(base_url)
+        self.scheme = url.scheme
+        self.host = url.netloc
+        self.base_path = url.path.rstrip('/')
+        self.token = token
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.scheme == "https":
+                connection = http.client.HTTPSConnection(
+                    self.host, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(
+                    self.host, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _reset_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+        self._local.connection = None
+
+    def request(self, method, path, payload=None):
+        """Send a request and return its status code and decoded JSON body."""
+        body = json.dumps(payload) if payload is not None else None
+        headers = {"PRIVATE-TOKEN": self.token,
+                   "Content-Type": "application/json"}
+
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                connection = self._connection()
+                connection.request(method, self.base_path + path,
+                                   body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                self._reset_connection()
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status not in self.RETRY_STATUSES or attempt == self.retries:
+                    try:
+                        return response.status, json.loads(data or b"null")
+                    except ValueError:
+                        return response.status, data.decode(errors="replace")
+                retry_after = response.getheader("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = int(retry_after)
+            time.sleep(delay)
+
+    def set_variable(self, project_id, key, value, **attributes):
+        """
+        Create a project CI/CD variable, or update it if it already exists.
+
+        Returns:
+            A tuple of the outcome ("created", "updated" or "failed") and a
+            detail message.
+        """
+        path = f"/api/v4/projects/{urllib.parse.quote(str(project_id), safe='')}/variables"
+        payload = {"key": key, "value": value, **attributes}
+
+        try:
+            status, body = self.request("POST", path, payload)
+            if status == 201:
+                return "created", ""
+            # GitLab reports an existing key as 400 "has already been taken";
+            # 409 is handled the same way.
+            if status == 409 or (status == 400 and "already been taken" in str(body)):
+                status, body = self.request(
+                    "PUT", f"{path}/{urllib.parse.quote(key, safe='')}", payload)
+                if status == 200:
+                    return "updated", ""
+        except (OSError, http.client.HTTPException) as e:
+            return "failed", str(e)
+
+        return "failed", f"Status code: {status}. {body}"
+
+
+# GitLab rejects masked variables unless the value is one line of at least 8
+# of these characters.
+MASKABLE_VALUE = re.compile(r"[A-Za-z0-9@:.~+/=_-]{8,}")
+
+
+def provision_gitlab_variables(client, project_id, variables, max_workers=8):
+    """
+    Create or update GitLab CI/CD variables concurrently.
+
+    Only values GitLab accepts as masked (see MASKABLE_VALUE) are masked;
+    the others, e.g. short values or ones with spaces, are sent unmasked.
+
+    Returns:
+        A dict mapping each variable key to the (outcome, detail) tuple
+        returned by GitLabClient.set_variable().
+    """
+    def set_variable(item):
+        key, value = item
+        return client.set_variable(project_id, key, value,
+                                   protected=False,
+                                   masked=MASKABLE_VALUE.fullmatch(value) is not None)
+
+    workers = max(1, min(max_workers, len(variables)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(set_variable, variables.items()))
+    return dict(zip(variables, outcomes))
+
+
+class Raw:
+    """A settings value written verbatim, e.g. an `os.environ.get()` call."""
+
+    def __init__(self, source):
+        self.source = source
+
+
+def env(name, default):
+    """Settings value read from the environment with a fallback."""
+    return Raw(f"os.environ.get({name!r}, {default!r})")
+
+
+def format_value(value, indent=0):
+    """Render a settings value as Python source in the style of settings.py."""
+    if isinstance(value, Raw):
+        return value.source
+
+    pad = " " * (indent + 4)
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        items = "".join(
+            f"{pad}{format_value(key)}: {format_value(item, indent + 4)},\n"
+            for key, item in value.items())
+        return "{\n" + items + " " * indent + "}"
+    if isinstance(value, (list, tuple)):
+        opening, closing = ("[", "]") if isinstance(value, list) else ("(", ")")
+        if not value:
+            return opening + closing
+        items = "".join(
+            f"{pad}{format_value(item, indent + 4)},\n" for item in value)
+        return opening + "\n" + items + " " * indent + closing
+    return repr(value)
+
+
+class SettingsComposer:
+    """
+    In-memory model of settings.py that features register their changes with.
+
+    settings.py is read and parsed with `ast` once, so top-level assignments are
+    located by name instead of by regex, and written once by write().
+    Contributions are only applied at write time, which means features can
+    register them in any order:
+
+    - add_installed_app() / add_middleware() extend INSTALLED_APPS and MIDDLEWARE
+    - set_setting() replaces a top-level setting, or appends it under a section
+      comment if settings.py does not define it yet
+    - extend_setting() appends to a list inside a dict setting set by another
+      feature, e.g. an authentication class in REST_FRAMEWORK
+    - merge_setting() adds entries to a dict setting that several features
+      contribute to, e.g. tasks in CELERY_BEAT_SCHEDULE
+    - add_import() / add_block() add imports and free-form code
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r') as file:
+            self.source = file.read()
+        self.module = ast.parse(self.source)
+
+        self.installed_apps = []
+        self.middleware = []
+        self.settings = {}
+        self.sections = {}
+        self.extensions = []
+        self.imports = []
+        self.blocks = []
+
+    def _assignment(self, name):
+        for node in self.module.body:
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name)
+                    and node.targets[0].id == name):
+                return node
+        return None
+
+    def get(self, name):
+        """
+        Return the current value of a setting.
+
+        Values registered with set_setting() win over settings.py. Settings that
+        are not plain literals in settings.py (or are missing) return None.
+        """
+        if name in self.settings:
+            return self.settings[name]
+        node = self._assignment(name)
+        if node is None:
+            return None
+        try:
+            return ast.literal_eval(node.value)
+        except ValueError:
+            return None
+
+    def add_installed_app(self, app):
+        if app not in self.installed_apps:
+            self.installed_apps.append(app)
+
+    def add_middleware(self, middleware, after=None):
+        if all(name != middleware for name, _ in self.middleware):
+            self.middleware.append((middleware, after))
+
+    def set_setting(self, name, value, section=None):
+        self.settings[name] = value
+        self.sections.setdefault(name, section)
+
+    def extend_setting(self, name, key, values):
+        self.extensions.append((name, key, list(values)))
+
+    def merge_setting(self, name, values, section=None):
+        self.set_setting(name, {**(self.settings.get(name) or {}), **values}, section)
+
+    def add_import(self, statement):
+        if statement not in self.imports:
+            self.imports.append(statement)
+
+    def add_block(self, source):
+        self.blocks.append(source.strip())
+
+    def _resolved_settings(self):
+        resolved = {}
+
+        if self.installed_apps:
+            apps = [app for app in self.get("INSTALLED_APPS")
+                    if app not in self.installed_apps]
+            # Third-party apps go after Django's own apps and before the
+            # project's apps.
+            position = sum(1 for app in apps if app.startswith("django."))
+            resolved["INSTALLED_APPS"] = (
+                apps[:position] + self.installed_apps + apps[position:])
+
+        if self.middleware:
+            middleware = list(self.get("MIDDLEWARE"))
+            for name, after in self.middleware:
+                if name in middleware:
+                    continue
+                if after in middleware:
+                    middleware.insert(middleware.index(after) + 1, name)
+                else:
+                    middleware.append(name)
+            resolved["MIDDLEWARE"] = middleware
+
+        resolved.update(copy.deepcopy(self.settings))
+
+        for name, key, values in self.extensions:
+            setting = resolved.get(name)
+            if not isinstance(setting, dict):
+                continue
+            current = list(setting.get(key, []))
+            setting[key] = current + [
+                value for value in values if value not in current]
+
+        return resolved
+
+    def render(self):
+        """Return the new content of settings.py."""
+        lines = self.source.splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+
+        replacements = {}
+        appended = {}
+        for name, value in self._resolved_settings().items():
+            text = f"{name} = {format_value(value)}\n"
+            node = self._assignment(name)
+            if node is None:
+                section = self.sections.get(name)
+                appended.setdefault(section, []).append(text)
+            else:
+                replacements[node.lineno - 1] = (node.end_lineno, text)
+
+        imports = [statement + "\n" for statement in self.imports
+                   if statement not in self.source]
+        import_end = 0
+        for node in self.module.body:
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                break
+            import_end = node.end_lineno
+
+        output = lines[:import_end] + imports
+        index = import_end
+        while index < len(lines):
+            if index in replacements:
+                end, text = replacements[index]
+                output.append(text)
+                index = end
+            else:
+                output.append(lines[index])
+                index += 1
+
+        for section, texts in appended.items():
+            if section:
+                output.append(f"\n# {section}\n")
+                output.extend(texts)
+            else:
+                for text in texts:
+                    output.extend(["\n", text])
+        for block in self.blocks:
+            output.append("\n" + block + "\n")
+
+        return "".join(output)
+
+    def write(self):
+        with open(self.path, 'w') as file:
+            file.write(self.render())
 
 
 def setup_project():
-    project_type = "{{ cookiecutter.project_type }}"
-    use_celery = "{{ cookiecutter.use_celery }}" == "y"
-    use_redis = "{{ cookiecutter.use_redis }}" == "y"
-    use_whitenoise = "{{ cookiecutter.use_whitenoise }}" == "y"
-    use_docker = "{{ cookiecutter.use_docker }}" == "y"
-    use_rest_framework = "{{ cookiecutter.use_rest_framework }}" == "y"
-    use_graphql = "{{ cookiecutter.use_graphql }}" == "y"
-    use_jwt = "{{ cookiecutter.use_jwt }}" == "y"
-
-    # Setup database
-    if db_type:
-        update_database_config(db_type, project_slug)
-        # subprocess.check_call(
-        #     [sys.executable, "manage.py", "migrate"])
-
-    # Setup Celery
-    if use_celery:
-        setup_celery()
+    # settings.py is composed in memory by the features below and written once
+    # at the end, so the order they run in does not matter for it.
+    with timed_phase("settings.py"):
+        settings = SettingsComposer(f"{project_slug}/settings.py")
+
+        # Setup database
+        if db_type:
+            update_database_config(settings, db_type)
+            # subprocess.check_call(
+            #     [sys.executable, "manage.py", "migrate"])
+
+        # Setup Celery
+        if use_celery:
+            setup_celery(settings)
+        else:
+            remove_celery_files()
 
-    # Setup Docker
-    if use_docker:
-        setup_docker()
-    else:
-        print("Docker not selected, removing Docker-related files.")
-        remove_docker_files()
+        # Setup Redis cache and cached sessions
+        if use_redis:
+            setup_redis_cache(settings)
+        else:
+            remove_cache_helpers()
 
-    # Setup REST framework
-    if use_rest_framework:
-        setup_rest_framework()
+        # Setup ASGI settings and the async HTTP client
+        if use_asgi:
+            setup_asgi(settings)
+        else:
+            remove_async_helpers()
 
-    # Setup GraphQL
-    if use_graphql:
-        setup_graphql()
+        # Setup REST framework
+        if use_rest_framework:
+            setup_rest_framework(settings)
+        else:
+            remove_serializer_benchmarks()
+            remove_pagination()
 
-    # Setup JWT
-    if use_jwt:
-        setup_jwt()
+        # Setup GraphQL
+        if use_graphql:
+            setup_graphql(settings)
+
+        # Setup JWT
+        if use_jwt:
+            setup_jwt(settings)
+
+        # Setup the project type's models and services
+        if project_type == "Notification":
+            setup_notifications(settings)
+        else:
+            remove_notification_pipeline()
+        if project_type == "VAS":
+            setup_subscriptions(settings)
+            setup_callbacks(settings)
+        else:
+            remove_subscription_engine()
+            remove_callback_ingestion()
+        if project_type == "General":
+            remove_initial_migration()
+
+        # add whitenoise if set
+        if use_whitenoise:
+            add_whitenoise_middleware(settings)
+
+        settings.write()
+        print("settings.py updated.")
+
+    # Setup Docker
+    with timed_phase("docker"):
+        if use_docker:
+            setup_docker()
+        else:
+            print("Docker not selected, removing Docker-related files.")
+            remove_docker_files()
 
     # Setup project-specific documentation
-    setup_documentation(project_type)
+    with timed_phase("documentation"):
+        setup_documentation(project_type)
 
     # Setup pre-commit hooks
-    setup_pre_commit()
+    with timed_phase("pre-commit config"):
+        setup_pre_commit()
 
     # check env file exists
-    check_env_file()
-
-    # add whitenoise if set
-    if use_whitenoise:
-        add_whitenoise_middleware()
+    with timed_phase(".env"):
+        check_env_file()
 
     # replace_app_name()
 
     # setup gitlab project variables
-    set_gitlab_variables()
+    with timed_phase("gitlab variables"):
+        set_gitlab_variables()
 
 
-def install_database_lib(db_type):
-    """Install the relevant database library."""
+def update_database_config(settings, db_type):
+    """Register the selected database configuration with the settings."""
     if db_type == "PostgreSQL":
-        subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "psycopg2-binary"])
+        database_config = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env('DB_NAME', 'your_db_name'),
+            'USER': env('DB_USER', 'your_db_user'),
+            'PASSWORD': env('DB_PASSWORD', 'your_db_password'),
+            'HOST': env('DB_HOST', 'localhost'),
+            'PORT': env('DB_PORT', '5432'),
+        }
     elif db_type == "SQL Server":
-        subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "pyodbc"])
-    elif db_type == "Oracle":
-        subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "cx_Oracle"])
+        database_config = {
+            'ENGINE': 'sql_server.pyodbc',
+            'NAME': env('DB_NAME', 'your_db_name'),
+            'USER': env('DB_USER', 'your_db_user'),
+            'PASSWORD': env('DB_PASSWORD', 'your_db_password'),
+            'HOST': env('DB_HOST', 'localhost'),
+            'PORT': env('DB_PORT', '1433'),
+            'OPTIONS': {
+                'driver': 'ODBC Driver 17 for SQL Server',
+            },
+        }
     elif db_type == "SQLite":
-        # SQLite comes pre-installed with Python, no need to install anything.
-        pass
+        database_config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': Raw("os.path.join(BASE_DIR, 'db.sqlite3')"),
+        }
+    elif db_type == "Oracle":
+        database_config = {
+            'ENGINE': 'django.db.backends.oracle',
+            'NAME': env('DB_NAME', 'your_db_name'),
+            'USER': env('DB_USER', 'your_db_user'),
+            'PASSWORD': env('DB_PASSWORD', 'your_db_password'),
+            'HOST': env('DB_HOST', 'localhost'),
+            'PORT': env('DB_PORT', '1521'),
+        }
+    else:
+        return
 
+    if db_type != "SQLite":
+        database_config.update(database_connection_options())
+    settings.set_setting("DATABASES", {'default': database_config})
 
-def update_database_config(db_type, project_slug):
-    """Update the settings.py file with the selected database configuration."""
-    settings_file = f"{project_slug}/settings.py"
 
-    # install db dependency
-    install_database_lib(db_type)
+def database_connection_options():
+    """
+    Return the connection handling part of the default database settings.
+
+    Every strategy keeps health checks on, so a connection dropped by the
+    server is replaced at the start of the next request instead of failing
+    it:
+
+    - persistent: each worker thread keeps its connection for DB_CONN_MAX_AGE
+      seconds instead of opening one per request.
+    - native: Django's psycopg pool, sized by DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE.
+      Django requires CONN_MAX_AGE = 0 with a pool; closing a connection hands
+      it back to the pool.
+    - pgbouncer: persistent connections to a PgBouncer running in transaction
+      mode, which cannot keep server-side cursors open across transactions.
+
+    Under ASGI Django cannot hand a persistent connection from one request to
+    the next (its documentation says to disable them), so CONN_MAX_AGE is 0
+    and reuse is left to the pool or PgBouncer.
+    """
+    conn_max_age = Raw("int(os.environ.get('DB_CONN_MAX_AGE', '60'))")
+    options = {
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if db_connection_strategy == "native":
+        options['CONN_MAX_AGE'] = 0
+        options['OPTIONS'] = {
+            'pool': {
+                'min_size': Raw("int(os.environ.get('DB_POOL_MIN_SIZE', '2'))"),
+                'max_size': Raw("int(os.environ.get('DB_POOL_MAX_SIZE', '10'))"),
+                'timeout': Raw("int(os.environ.get('DB_POOL_TIMEOUT', '10'))"),
+            },
+        }
+    elif db_connection_strategy == "pgbouncer":
+        options['DISABLE_SERVER_SIDE_CURSORS'] = True
+    if use_asgi:
+        options['CONN_MAX_AGE'] = 0
+    return options
+
+
+def add_option_requirements(packages):
+    """Append the packages the selected options need to requirements.txt."""
+    existing = read_requirements(RUNTIME_REQUIREMENTS)
+    missing = [package for package in packages if package not in existing]
+    if not missing:
+        return
 
-    with open(settings_file, 'r') as file:
-        settings = file.read()
+    with open(RUNTIME_REQUIREMENTS, 'a') as file:
+        file.write("\n# Selected options\n")
+        for package in missing:
+            file.write(f"{package}\n")
+
+
+def canonical_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
 
-    if db_type == "PostgreSQL":
-        database_config = """
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.environ.get('DB_NAME', 'your_db_name'),
-        'USER': os.environ.get('DB_USER', 'your_db_user'),
-        'PASSWORD': os.environ.get('DB_PASSWORD', 'your_db_password'),
-        'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '5432'),
-    }
-}"""
-    elif db_type == "SQL Server":
-        database_config = """
-DATABASES = {
-    'default': {
-        'ENGINE': 'sql_server.pyodbc',
-        'NAME': os.environ.get('DB_NAME', 'your_db_name'),
-        'USER': os.environ.get('DB_USER', 'your_db_user'),
-        'PASSWORD': os.environ.get('DB_PASSWORD', 'your_db_password'),
-        'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '1433'),
-        'OPTIONS': {
-            'driver': 'ODBC Driver 17 for SQL Server',
-        },
-    }
-}"""
-    elif db_type == "SQLite":
-        database_config = """
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
-}"""
-    elif db_type == "Oracle":
-        database_config = """
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.oracle',
-        'NAME': os.environ.get('DB_NAME', 'your_db_name'),
-        'USER': os.environ.get('DB_USER', 'your_db_user'),
-        'PASSWORD': os.environ.get('DB_PASSWORD', 'your_db_password'),
-        'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '1521'),
-    }
-}"""
-
-    # Replace the existing DATABASES setting in settings.py
-    settings = re.sub(
-        r'DATABASES\s*=\s*\{[^}]*\}}',
-        database_config.strip(),  # Remove leading/trailing whitespace
-        settings,
-        flags=re.DOTALL
-    )
 
-    with open(settings_file, 'w') as file:
-        file.write(settings)
+def release_hashes(name, version):
+    """
+    Return the sha256 of every file of a release on PyPI.
+
+    Locking every file of the release, not only the one picked for this
+    machine, keeps the lockfile installable on other platforms (e.g. a Linux
+    Docker image built from a lock generated on macOS). Returns an empty list
+    when PyPI cannot be reached.
+    """
+    if install_mode == "offline":
+        return []
+
+    url = f"https://pypi.org/pypi/{urllib.parse.quote(name)}/{urllib.parse.quote(version)}/json"
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            release = json.load(response)
+    except (OSError, ValueError):
+        return []
+    return [file["digests"]["sha256"] for file in release.get("urls", [])]
+
+
+def archive_hash(item):
+    """Return the sha256 of the distribution pip picked for a report entry."""
+    download_info = item.get("download_info", {})
+    archive_info = download_info.get("archive_info", {})
+    if archive_info.get("hashes", {}).get("sha256"):
+        return archive_info["hashes"]["sha256"]
+    if archive_info.get("hash", "").startswith("sha256="):
+        return archive_info["hash"].split("=", 1)[1]
+
+    # Local files (e.g. from the offline wheelhouse) are hashed directly.
+    url = download_info.get("url", "")
+    if url.startswith("file://"):
+        path = urllib.request.url2pathname(urllib.parse.urlsplit(url).path)
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    return None
+
+
+def resolve_requirements(requirement_files, constraints=None):
+    """
+    Resolve requirement files to exact versions and distribution hashes.
+
+    Uses `pip install --dry-run --report`, so nothing is installed and the
+    current environment does not leak into the result.
+
+    Returns:
+        A dict mapping canonical package names to (version, [sha256, ...]).
+
+    Raises:
+        RuntimeError: if a package could not be hashed, as pip would refuse
+            the lockfile with --require-hashes.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        report_file = os.path.join(tmp, "report.json")
+        args = ["--dry-run", "--ignore-installed", "--quiet",
+                "--report", report_file]
+        for requirement_file in requirement_files:
+            args += ["-r", requirement_file]
+        if constraints:
+            constraints_file = os.path.join(tmp, "constraints.txt")
+            with open(constraints_file, 'w') as file:
+                for name, (version, _) in constraints.items():
+                    file.write(f"{name}=={version}\n")
+            args += ["-c", constraints_file]
+        check_call(pip_install_command(*args))
+
+        with open(report_file, 'r') as file:
+            report = json.load(file)
+
+    items = [(canonical_name(item["metadata"]["name"]),
+              item["metadata"]["version"], archive_hash(item))
+             for item in report["install"]]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        published = executor.map(
+            lambda item: release_hashes(item[0], item[1]), items)
+        resolved = {}
+        for (name, version, picked), hashes in zip(items, published):
+            if picked and picked not in hashes:
+                hashes = [picked] + hashes
+            resolved[name] = (version, hashes)
+
+    unhashed = sorted(name for name, (_, hashes) in resolved.items() if not hashes)
+    if unhashed:
+        raise RuntimeError(
+            f"Could not hash {', '.join(unhashed)}: pip reported no hash for the files it "
+            f"picked and PyPI could not be reached. Retry with network access, or use "
+            f"install_mode=offline with a wheelhouse holding these packages.")
+    return resolved
+
+
+def write_lockfile(path, resolved, header):
+    with open(path, 'w') as file:
+        file.write(header)
+        for name in sorted(resolved):
+            version, hashes = resolved[name]
+            lines = [f"{name}=={version}"] + [
+                f"    --hash=sha256:{digest}" for digest in hashes]
+            file.write(" \\\n".join(lines) + "\n")
 
 
 def update_requirements():
     """
-    Update the requirements.txt file with the current package versions
-    and install pre-commit hooks.
+    Lock the project's requirements.
+
+    requirements.txt gets the packages of the selected options appended, then
+    requirements.lock is generated with exactly the runtime dependencies and
+    requirements-dev.lock with the development-only ones, each pinned and
+    hashed. Locking resolves the requirement files, not the interpreter
+    running the hook, so tooling used by the hook never ends up in them.
 
     This function is idempotent and safe to run multiple times.
     """
+    add_option_requirements(plan_packages())
+
+    python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    # Offline locks only hash the wheelhouse's files, built for this machine.
+    platform_note = (
+        f"# Offline lock: only the wheels for {sysconfig.get_platform()} are hashed, so it\n"
+        f"# installs on this platform only. Regenerate it online for other platforms.\n"
+        if install_mode == "offline" else "")
+    with timed_phase("lock runtime"):
+        runtime = resolve_requirements([RUNTIME_REQUIREMENTS])
+        write_lockfile(RUNTIME_LOCK, runtime, (
+            f"# Generated from {RUNTIME_REQUIREMENTS} for Python {python_version}.\n"
+            f"{platform_note}"
+            f"# pip install --require-hashes --no-deps -r {RUNTIME_LOCK}\n"))
+
+    # Dev requirements are resolved against the runtime pins, so installing
+    # both lockfiles together is consistent.
+    with timed_phase("lock dev"):
+        dev = resolve_requirements([DEV_REQUIREMENTS], constraints=runtime)
+        dev = {name: pin for name, pin in dev.items() if name not in runtime}
+        write_lockfile(DEV_LOCK, dev, (
+            f"# Generated from {DEV_REQUIREMENTS} for Python {python_version}.\n"
+            f"{platform_note}"
+            f"# pip install --require-hashes --no-deps -r {RUNTIME_LOCK} -r {DEV_LOCK}\n"))
+
+    print(f"Locked {len(runtime)} runtime and {len(dev)} dev packages.")
+    set_ci_python_version(python_version)
+
+
+def set_ci_python_version(python_version, ci_config=".gitlab-ci.yml"):
+    """
+    Run the CI jobs on the Python the lockfiles were generated for.
 
-    # Capture the output of `pip freeze` and write to `requirements.txt`
-    with open("requirements.txt", "w") as f:
-        subprocess.check_call(
-            [sys.executable, "-m", "pip", "freeze"], stdout=f)
+    The lockfiles only hold wheels for that version, so the test job would
+    fail to install them on any other.
+    """
+    if not os.path.exists(ci_config):
+        return
+    with open(ci_config) as file:
+        content = file.read()
+    content = re.sub(r'(?m)^(  PYTHON_VERSION: )".*"$',
+                     lambda match: f'{match.group(1)}"{python_version}"', content)
+    with open(ci_config, 'w') as file:
+        file.write(content)
 
-    # Install pre-commit hooks
-    subprocess.check_call(
-        ["pre-commit", "install", "--install-hooks"])
 
-    print("Requirements updated and pre-commit hooks installed.")
+def pre_commit_home():
+    """Return the directory pre-commit keeps hook environments in."""
+    if os.environ.get("PRE_COMMIT_HOME"):
+        return os.environ["PRE_COMMIT_HOME"]
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_dir, "pre-commit")
 
 
-def setup_celery():
-    print("Installing celery...")
+def pre_commit_cache_key(config_file=".pre-commit-config.yaml"):
+    """
+    Return a key for the set of hook environments a pre-commit config needs.
 
-    # Install specific versions of Celery and Kombu
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install",
-            "celery==5.2.3", "kombu==5.3.0b3"]
-    )
+    The key is a hash of the config's repo, rev, language version and
+    additional_dependencies lines, so configs that pin the same hooks share a
+    key whatever their order or formatting. scripts/warm_pre_commit_cache.py
+    computes the same key.
+    """
+    pattern = re.compile(
+        r"^[\s-]*(repo|rev|python|language_version|additional_dependencies)\s*:\s*(.*?)\s*$")
+    entries = set()
+    with open(config_file, 'r') as file:
+        for line in file:
+            match = pattern.match(line)
+            if match:
+                entries.add(f"{match.group(1)}={match.group(2)}")
+    digest = hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+    return digest[:16]
+
+
+def install_pre_commit_hooks():
+    """
+    Install the git hook and make sure the hook environments exist.
+
+    Hook environments live in pre-commit's own store (PRE_COMMIT_HOME), which is
+    shared by every project on the machine and is also where `git commit`
+    looks for them. A marker per cache key records that the store already
+    holds every environment this config needs. With the marker present (from an
+    earlier generation, or from scripts/warm_pre_commit_cache.py) only the git
+    hook is installed, which takes well under a second and works offline.
+    """
+    home = pre_commit_home()
+    key = pre_commit_cache_key()
+    marker = os.path.join(home, f"cookiecutter-{key}.ready")
+
+    if os.path.exists(marker):
+        print(f"Reusing pre-commit hook environments {key} from {home}.")
+        check_call([venv_executable("pre-commit"), "install"])
+    elif install_mode == "offline":
+        # Hook environments are fetched from their git repositories, so in
+        # offline mode only the git hook itself is installed.
+        check_call([venv_executable("pre-commit"), "install"])
+        print("Offline mode: hook environments will be built on first use.")
+    else:
+        check_call([venv_executable("pre-commit"), "install", "--install-hooks"])
+        os.makedirs(home, exist_ok=True)
+        with open(marker, 'w') as file:
+            file.write(time.strftime("%Y-%m-%dT%H:%M:%SZ\n", time.gmtime()))
+        print(f"Pre-commit hook environments {key} cached in {home}.")
 
+
+def setup_celery(settings):
+    """
+    Set up the Celery app and its settings.
+
+    Tasks are split over the CELERY_QUEUES queues, each consumed by its own
+    workers, so long tasks on `low` never hold up short ones on `high`.
+    Workers reserve one task at a time (prefetch multiplier 1) and acknowledge
+    it only once it has run (acks_late), so a busy worker does not sit on
+    tasks another could run and a task lost with its worker is redelivered.
+    With the Redis broker, a task not acknowledged within the visibility
+    timeout is redelivered as well, so keep that above the hard time limit.
+
+    Results are ignored unless a task asks for them (ignore_result=False);
+    stored results are compressed and expire after CELERY_RESULT_EXPIRES
+    seconds instead of accumulating in Redis. Worker processes are replaced
+    after CELERY_WORKER_MAX_TASKS_PER_CHILD tasks to contain memory leaks.
+    """
     print("Setting up celery...")
     celery_file = f"{project_slug}/celery.py"
     with open(celery_file, 'w') as file:
@@ -355,38 +1360,126 @@ from .celery import app as celery_app
 __all__ = ('celery_app',)
         """)
 
-    # Update settings.py with Celery configurations
-    settings_file = f"{project_slug}/settings.py"
-    with open(settings_file, 'r+') as file:
-        content = file.read()
-        if "CELERY_BROKER_URL" not in content:
-            file.seek(0, 2)  # Move to the end of the file
-            file.write("""
-# Celery configuration
-CELERY_BROKER_URL = os.environ.get(
-    'CELERY_BROKER_URL', 'redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = os.environ.get(
-    'CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = 'UTC'
-            """)
+    celery_settings = {
+        'CELERY_BROKER_URL': env('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
+        'CELERY_RESULT_BACKEND': env('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0'),
+        'CELERY_ACCEPT_CONTENT': ['json'],
+        'CELERY_TASK_SERIALIZER': 'json',
+        'CELERY_RESULT_SERIALIZER': 'json',
+        'CELERY_TIMEZONE': 'UTC',
+        'CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP': True,
+        'CELERY_TASK_QUEUES': Raw(
+            "[" + ", ".join(f"Queue('{queue}')" for queue in CELERY_QUEUES) + "]"),
+        'CELERY_TASK_DEFAULT_QUEUE': 'default',
+        'CELERY_WORKER_PREFETCH_MULTIPLIER': Raw(
+            "int(os.environ.get('CELERY_WORKER_PREFETCH_MULTIPLIER', '1'))"),
+        'CELERY_TASK_ACKS_LATE': True,
+        'CELERY_TASK_REJECT_ON_WORKER_LOST': True,
+        'CELERY_TASK_SOFT_TIME_LIMIT': Raw("int(os.environ.get('CELERY_TASK_SOFT_TIME_LIMIT', '300'))"),
+        'CELERY_TASK_TIME_LIMIT': Raw("int(os.environ.get('CELERY_TASK_TIME_LIMIT', '360'))"),
+        'CELERY_BROKER_TRANSPORT_OPTIONS': {
+            'visibility_timeout': Raw("int(os.environ.get('CELERY_VISIBILITY_TIMEOUT', '3600'))"),
+        },
+        'CELERY_WORKER_MAX_TASKS_PER_CHILD': Raw(
+            "int(os.environ.get('CELERY_WORKER_MAX_TASKS_PER_CHILD', '1000'))"),
+        'CELERY_TASK_IGNORE_RESULT': True,
+        'CELERY_RESULT_EXPIRES': Raw("int(os.environ.get('CELERY_RESULT_EXPIRES', '3600'))"),
+        'CELERY_RESULT_COMPRESSION': 'gzip',
+    }
+    settings.add_import("from kombu import Queue")
+    for name, value in celery_settings.items():
+        settings.set_setting(name, value, section="Celery configuration")
 
     print("Celery setup complete.")
 
 
+def remove_celery_files():
+    """Remove the Celery tasks and their benchmark if use_celery is set to 'n'."""
+    for path in (f"{app_name}/tasks.py",
+                 f"{app_name}/management/commands/celery_throughput.py"):
+        if os.path.exists(path):
+            print(f"Removing {path}...")
+            os.remove(path)
+
+
+def setup_redis_cache(settings):
+    """
+    Use Redis as the default cache and keep sessions in it.
+
+    Django's RedisCache hands OPTIONS to redis-py's connection pool, so every
+    worker process reuses at most REDIS_MAX_CONNECTIONS connections. Sessions
+    use the cached_db engine by default: reads come from Redis and writes still
+    reach the database, so sessions survive a cache flush. Set SESSION_ENGINE
+    to django.contrib.sessions.backends.cache to keep them in Redis only.
+    """
+    print("Setting up Redis cache...")
+    cache_settings = {
+        'CACHES': {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': env('REDIS_URL', 'redis://localhost:6379/1'),
+                'TIMEOUT': Raw("int(os.environ.get('CACHE_TIMEOUT', '300'))"),
+                'KEY_PREFIX': project_slug,
+                'OPTIONS': {
+                    'max_connections': Raw("int(os.environ.get('REDIS_MAX_CONNECTIONS', '50'))"),
+                    'socket_connect_timeout': 5,
+                    'socket_timeout': 5,
+                    'health_check_interval': 30,
+                },
+            },
+        },
+        'SESSION_ENGINE': env('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'),
+    }
+    for name, value in cache_settings.items():
+        settings.set_setting(name, value, section="Cache configuration")
+
+
+def remove_cache_helpers():
+    """Remove the cache helpers module if use_redis is set to 'n'."""
+    cache_module = f"{app_name}/cache.py"
+    if os.path.exists(cache_module):
+        print(f"Removing {cache_module}...")
+        os.remove(cache_module)
+
+
+def setup_asgi(settings):
+    """
+    Configure the outbound HTTP client used by the async views.
+
+    The client keeps up to HTTP_CLIENT_MAX_CONNECTIONS connections per worker
+    open between requests, see http_client.py in the app.
+    """
+    print("Setting up ASGI...")
+    asgi_settings = {
+        'HTTP_CLIENT_MAX_CONNECTIONS': Raw("int(os.environ.get('HTTP_CLIENT_MAX_CONNECTIONS', '100'))"),
+        'HTTP_CLIENT_TIMEOUT': Raw("float(os.environ.get('HTTP_CLIENT_TIMEOUT', '10'))"),
+        'NOTIFICATION_WEBHOOK_URL': env('NOTIFICATION_WEBHOOK_URL', ''),
+    }
+    for name, value in asgi_settings.items():
+        settings.set_setting(name, value, section="Async HTTP client")
+
+
+def remove_async_helpers():
+    """Remove the async HTTP client module if use_asgi is set to 'n'."""
+    client_module = f"{app_name}/http_client.py"
+    if os.path.exists(client_module):
+        print(f"Removing {client_module}...")
+        os.remove(client_module)
+
+
 def setup_docker():
     """
     Set up Dockerfile and docker-compose.yml for the project.
 
-    Installs gunicorn, copies the requirements.txt file to the Docker image, and
-    runs the collectstatic management command to collect static files. Uses the
-    Docker Compose file to define a service for the web application and a service
-    for the database.
+    The Dockerfile has several stages, built with BuildKit: a builder installs the
+    locked runtime dependencies (requirements.lock) into a virtualenv, using the
+    Python version the lock was generated for; only that virtualenv is copied
+    into the slim runtime image. collectstatic runs in a stage of its own, so
+    its layer stays cached until the code it imports changes.
 
-    The Docker Compose file defines a service for the web application and a
-    service for the database. The web application service uses the Dockerfile to
+    The Docker Compose file (see compose_services()) defines a service for the
+    web application plus the services the selected options need, such as the
+    database. The web application service uses the Dockerfile to
     build the image, sets the environment variables from the .env file, and maps
     port 8000 on the host to port 8000 in the container.
 
@@ -396,63 +1489,59 @@ def setup_docker():
     """
 
     print("\n=====Setting up docker...\n=======")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "gunicorn"])
 
     dockerfile = "Dockerfile"
     if not os.path.exists(dockerfile):
+        python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
         with open(dockerfile, 'w') as file:
+            # requirements.lock is resolved for the Python running this hook.
+            file.write(f"""# syntax=docker/dockerfile:1
+ARG PYTHON_VERSION={python_version}
+""")
             file.write("""
-FROM python:3.9
+# Install the locked requirements into a virtualenv. The full image has the
+# compilers and headers packages without wheels need; the cache mount keeps
+# pip's downloads between builds without storing them in a layer.
+FROM python:${PYTHON_VERSION} AS builder
 
-ENV PYTHONUNBUFFERED 1
-ENV DJANGO_SETTINGS_MODULE {{ cookiecutter.project_slug }}.settings
+RUN python -m venv /opt/venv
+COPY requirements.lock /tmp/
+RUN --mount=type=cache,target=/root/.cache/pip \\
+    /opt/venv/bin/pip install --require-hashes --no-deps -r /tmp/requirements.lock
+
+FROM python:${PYTHON_VERSION}-slim AS base
+
+ENV PYTHONUNBUFFERED=1 \\
+    PATH=/opt/venv/bin:$PATH \\
+    DJANGO_SETTINGS_MODULE={{ cookiecutter.project_slug }}.settings
 
 WORKDIR /app
+COPY --from=builder /opt/venv /opt/venv
 
-COPY requirements.txt /app/
-RUN pip install -r requirements.txt
+# collectstatic only needs the code it imports, so code elsewhere in the
+# project can change without re-running it. Copy new apps here as well.
+FROM base AS static
 
-COPY . /app/
+COPY manage.py /app/
+COPY {{ cookiecutter.project_slug }}/ /app/{{ cookiecutter.project_slug }}/
+COPY {{ cookiecutter.app_name }}/ /app/{{ cookiecutter.app_name }}/
+RUN SECRET_KEY=collectstatic ALLOWED_HOSTS=localhost \\
+    python manage.py collectstatic --noinput
 
-RUN python manage.py collectstatic --noinput
+FROM base AS runtime
+
+COPY --from=static /app/staticfiles /app/staticfiles
+COPY . /app/
 
 EXPOSE 8000
 
-CMD ["gunicorn", "--bind", "0.0.0.0:8000",
-    "{{ cookiecutter.project_slug }}.wsgi:application"]
-            """)
+CMD ["gunicorn", "-c", "gunicorn.conf.py"]
+""")
 
     docker_compose = "docker-compose.yml"
     if not os.path.exists(docker_compose):
         with open(docker_compose, 'w') as file:
-            file.write("""
-version: '3'
-
-services:
-  web:
-    build: .
-    command: gunicorn {{ cookiecutter.project_slug }}.wsgi:application --bind 0.0.0.0:8000
-    volumes:
-      - .:/app
-    ports:
-      - "8000:8000"
-    env_file:
-      - .env
-    depends_on:
-      - db
-  db:
-    image: postgres:13
-    volumes:
-      - postgres_data:/var/lib/postgresql/data/
-    environment:
-      - POSTGRES_DB=${DB_NAME}
-      - POSTGRES_USER=${DB_USER}
-      - POSTGRES_PASSWORD=${DB_PASSWORD}
-
-volumes:
-  postgres_data:
-            """)
+            file.write(format_yaml(compose_file()))
 
     dockerignore = ".dockerignore"
     if not os.path.exists(dockerignore):
@@ -474,18 +1563,168 @@ volumes:
             file.write("*.envs/\n")
 
 
-def setup_sentry():
-    settings_file = f"{project_slug}/settings.py"
-    with open(settings_file, 'r') as file:
-        settings = file.read()
+def yaml_scalar(value):
+    """Render a scalar for format_yaml(), quoting strings YAML could misread."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    plain = re.fullmatch(r"[A-Za-z_/.$][\w./${}=,-]*", value)
+    if plain and value.lower() not in ("true", "false", "yes", "no", "on", "off", "null"):
+        return value
+    return json.dumps(value)
+
 
-    settings = settings.replace(
-        "MIDDLEWARE = [",
-        """MIDDLEWARE = [
-    'sentry_sdk.integrations.django.DjangoIntegration',"""
-    )
+def format_yaml(value, indent=0):
+    """
+    Render nested dicts and lists of scalars as block-style YAML.
+
+    Only covers what docker-compose.yml needs; empty values render as bare
+    keys (e.g. named volumes).
+    """
+    pad = "  " * indent
+    lines = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{key}:")
+                lines.append(format_yaml(item, indent + 1))
+            else:
+                rendered = yaml_scalar(item)
+                lines.append(f"{pad}{key}: {rendered}" if rendered else f"{pad}{key}:")
+    else:
+        lines.extend(f"{pad}- {yaml_scalar(item)}" for item in value)
+    text = "\n".join(lines)
+    return text + "\n" if indent == 0 else text
+
+
+def compose_services():
+    """
+    Return the docker-compose services for the selected options.
+
+    The database container is only added for PostgreSQL; the other backends
+    are expected to run outside of Compose. Redis is added for the cache and
+    for the Celery broker, along with a worker service per Celery queue and a
+    beat service. With the `pgbouncer` strategy the
+    web service reaches PostgreSQL through a PgBouncer sidecar in transaction
+    mode, sized by PGBOUNCER_MAX_CLIENT_CONN and PGBOUNCER_DEFAULT_POOL_SIZE.
+    """
+    web = {
+        'build': ".",
+        'command': "gunicorn -c gunicorn.conf.py",
+        'volumes': [".:/app"],
+        'ports': ["8000:8000"],
+        'env_file': [".env"],
+        'environment': [],
+        'depends_on': [],
+        'healthcheck': {
+            'test': [
+                "CMD", "python", "-c",
+                "import urllib.request; "
+                "urllib.request.urlopen('http://127.0.0.1:8000/healthz/', timeout=2)",
+            ],
+            'interval': "10s",
+            'timeout': "3s",
+            'retries': 3,
+        },
+    }
+    services = {'web': web}
+
+    if db_type == "PostgreSQL":
+        services['db'] = {
+            'image': "postgres:13",
+            'volumes': ["postgres_data:/var/lib/postgresql/data/"],
+            'environment': [
+                "POSTGRES_DB=${DB_NAME}",
+                "POSTGRES_USER=${DB_USER}",
+                "POSTGRES_PASSWORD=${DB_PASSWORD}",
+            ],
+        }
+        web['environment'] += ["DB_HOST=db", "DB_PORT=5432"]
+        web['depends_on'].append("db")
 
-    settings += """
+    if use_redis or use_celery:
+        services['redis'] = {
+            'image': "redis:7-alpine",
+            'volumes': ["redis_data:/data"],
+        }
+        if use_redis:
+            web['environment'].append("REDIS_URL=redis://redis:6379/1")
+            if project_type == "VAS":
+                web['environment'].append("CALLBACK_REDIS_URL=redis://redis:6379/2")
+        if use_celery:
+            web['environment'] += [
+                "CELERY_BROKER_URL=redis://redis:6379/0",
+                "CELERY_RESULT_BACKEND=redis://redis:6379/0",
+            ]
+        web['depends_on'].append("redis")
+
+    if db_connection_strategy == "pgbouncer":
+        services['pgbouncer'] = {
+            'image': "edoburu/pgbouncer:latest",
+            'environment': [
+                "DB_HOST=db",
+                "DB_NAME=${DB_NAME}",
+                "DB_USER=${DB_USER}",
+                "DB_PASSWORD=${DB_PASSWORD}",
+                "AUTH_TYPE=scram-sha-256",
+                "POOL_MODE=transaction",
+                "MAX_CLIENT_CONN=${PGBOUNCER_MAX_CLIENT_CONN:-500}",
+                "DEFAULT_POOL_SIZE=${PGBOUNCER_DEFAULT_POOL_SIZE:-20}",
+            ],
+            'depends_on': ["db"],
+        }
+        web['environment'] = [
+            "DB_HOST=pgbouncer" if item == "DB_HOST=db" else item
+            for item in web['environment']
+        ]
+        web['depends_on'].append("pgbouncer")
+
+    if use_celery:
+        # One worker service per queue, so each can be scaled on its own
+        # (docker-compose up --scale worker-low=3), and a single beat.
+        def celery_service(command):
+            return {
+                'build': ".",
+                'command': f"celery -A {project_slug} {command} --loglevel info",
+                'volumes': [".:/app"],
+                'env_file': [".env"],
+                'environment': list(web['environment']),
+                'depends_on': list(web['depends_on']),
+            }
+
+        for queue, concurrency in CELERY_QUEUES.items():
+            variable = "CELERY_" + queue.upper() + "_CONCURRENCY"
+            services['worker-' + queue] = celery_service(
+                f"worker --queues {queue} --hostname {queue}@%h"
+                " --concurrency ${" + variable + ":-" + str(concurrency) + "}")
+        services['beat'] = celery_service("beat --schedule /tmp/celerybeat-schedule")
+
+    return services
+
+
+def compose_file():
+    """Return the docker-compose.yml document, with the volumes it uses."""
+    services = compose_services()
+    volumes = {}
+    for service in services.values():
+        for volume in service.get('volumes', []):
+            name = volume.split(":", 1)[0]
+            if not name.startswith((".", "/")):
+                volumes[name] = None
+    for service in services.values():
+        for key in [key for key, value in service.items() if value == []]:
+            del service[key]
+    compose = {'version': "3", 'services': services}
+    if volumes:
+        compose['volumes'] = volumes
+    return compose
+
+
+def setup_sentry(settings):
+    settings.add_block("""
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
@@ -495,88 +1734,71 @@ sentry_sdk.init(
     traces_sample_rate=1.0,
     send_default_pii=True
 )
-    """
-
-    with open(settings_file, 'w') as file:
-        file.write(settings)
-
+    """)
 
-def setup_rest_framework():
-    print("Installing drf...")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "djangorestframework"])
-
-    print("setting up django-filter...")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "django-filter"])
 
+def setup_rest_framework(settings):
     print("Setting up rest-framework...")
-    settings_file = f"{project_slug}/settings.py"
-    with open(settings_file, 'r') as file:
-        settings = file.read()
-
-    settings = settings.replace(
-        "INSTALLED_APPS = [",
-        """INSTALLED_APPS = [
-    'rest_framework',
-    'drf_yasg',"""
-    )
-
-    settings += """
-REST_FRAMEWORK = {
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-    ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
-}
-
-SWAGGER_SETTINGS = {
-    'SECURITY_DEFINITIONS': {
-        'Basic': {
-            'type': 'basic'
+    settings.add_installed_app('rest_framework')
+    settings.add_installed_app('drf_yasg')
+
+    settings.set_setting("REST_FRAMEWORK", {
+        'DEFAULT_PERMISSION_CLASSES': [
+            'rest_framework.permissions.IsAuthenticated',
+        ],
+        'DEFAULT_AUTHENTICATION_CLASSES': [
+            'rest_framework.authentication.SessionAuthentication',
+            'rest_framework.authentication.BasicAuthentication',
+        ],
+        # Cursor pagination on an indexed field: no COUNT(*) and no OFFSET
+        # scan, so deep pages cost the same as the first one.
+        'DEFAULT_PAGINATION_CLASS': f"{app_name}.pagination.KeysetPagination",
+        'PAGE_SIZE': Raw("int(os.environ.get('API_PAGE_SIZE', '10'))"),
+    })
+    settings.set_setting(
+        "API_MAX_PAGE_SIZE", Raw("int(os.environ.get('API_MAX_PAGE_SIZE', '100'))"),
+        section="REST framework pagination")
+    settings.set_setting(
+        "API_EXACT_COUNT_THRESHOLD", Raw("int(os.environ.get('API_EXACT_COUNT_THRESHOLD', '10000'))"),
+        section="REST framework pagination")
+
+    settings.set_setting("SWAGGER_SETTINGS", {
+        'SECURITY_DEFINITIONS': {
+            'Basic': {
+                'type': 'basic',
+            },
+            'Bearer': {
+                'type': 'apiKey',
+                'name': 'Authorization',
+                'in': 'header',
+            },
         },
-        'Bearer': {
-            'type': 'apiKey',
-            'name': 'Authorization',
-            'in': 'header'
-        }
-    }
-}
-    """
+    })
 
-    with open(settings_file, 'w') as file:
-        file.write(settings)
 
+def remove_serializer_benchmarks():
+    """Remove the REST framework serializer benchmarks if use_rest_framework is set to 'n'."""
+    bench_module = "benchmarks/bench_serializers.py"
+    if os.path.exists(bench_module):
+        print(f"Removing {bench_module}...")
+        os.remove(bench_module)
 
-def setup_graphql():
-    print("Installing django-graphene...")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "graphene-django"])
 
-    print("Setting up django-graphene...")
-    settings_file = f"{project_slug}/settings.py"
-    with open(settings_file, 'r') as file:
-        settings = file.read()
-
-    settings = settings.replace(
-        "INSTALLED_APPS = [",
-        """INSTALLED_APPS = [
-    'graphene_django',"""
-    )
+def remove_pagination():
+    """Remove the pagination classes, their tests and benchmark if use_rest_framework is set to 'n'."""
+    for path in (f"{app_name}/pagination.py", f"{app_name}/pagination_tests.py",
+                 f"{app_name}/management/commands/pagination_benchmark.py"):
+        if os.path.exists(path):
+            print(f"Removing {path}...")
+            os.remove(path)
 
-    settings += """
-GRAPHENE = {
-    'SCHEMA': '{{ cookiecutter.project_slug }}.schema.schema'
-}
-    """
 
-    with open(settings_file, 'w') as file:
-        file.write(settings)
+def setup_graphql(settings):
+    print("Setting up django-graphene...")
+    settings.add_installed_app('graphene_django')
+    settings.set_setting("GRAPHENE", {
+        'SCHEMA': '{{ cookiecutter.project_slug }}.schema.schema',
+    })
 
     schema_file = f"{project_slug}/schema.py"
     with open(schema_file, 'w') as file:
@@ -584,68 +1806,217 @@ GRAPHENE = {
 import graphene
 
 class Query(graphene.ObjectType):
-    pass
+    ping = graphene.String()
+
+    def resolve_ping(root, info):
+        return "pong"
 
 schema = graphene.Schema(query=Query)
         """)
 
 
-def setup_jwt():
-    print("Installing djangorestframework-simplejwt...")
-    subprocess.check_call(
-        [sys.executable, "-m", "pip", "install", "djangorestframework-simplejwt"])
-
+def setup_jwt(settings):
     print("Setting up jwt...")
-    settings_file = f"{project_slug}/settings.py"
-    with open(settings_file, 'r') as file:
-        settings = file.read()
-
-    settings = settings.replace(
-        "INSTALLED_APPS = [",
-        """INSTALLED_APPS = [
-    'rest_framework_simplejwt',"""
+    settings.add_installed_app('rest_framework_simplejwt')
+
+    # Only takes effect when REST_FRAMEWORK is configured, whichever of the two
+    # features registers first.
+    settings.extend_setting(
+        "REST_FRAMEWORK",
+        'DEFAULT_AUTHENTICATION_CLASSES',
+        ['rest_framework_simplejwt.authentication.JWTAuthentication'],
     )
 
-    settings = settings.replace(
-        "'rest_framework.authentication.BasicAuthentication',",
-        """'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',"""
-    )
+    settings.add_import("from datetime import timedelta")
+    settings.set_setting("SIMPLE_JWT", {
+        'ACCESS_TOKEN_LIFETIME': Raw("timedelta(minutes=5)"),
+        'REFRESH_TOKEN_LIFETIME': Raw("timedelta(days=1)"),
+        'ROTATE_REFRESH_TOKENS': False,
+        'BLACKLIST_AFTER_ROTATION': True,
+        'UPDATE_LAST_LOGIN': False,
 
-    settings += """
-from datetime import timedelta
+        'ALGORITHM': 'HS256',
+        'SIGNING_KEY': Raw("SECRET_KEY"),
+        'VERIFYING_KEY': None,
+        'AUDIENCE': None,
+        'ISSUER': None,
 
-SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': False,
+        'AUTH_HEADER_TYPES': ('Bearer',),
+        'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
+        'USER_ID_FIELD': 'id',
+        'USER_ID_CLAIM': 'user_id',
 
-    'ALGORITHM': 'HS256',
-    'SIGNING_KEY': SECRET_KEY,
-    'VERIFYING_KEY': None,
-    'AUDIENCE': None,
-    'ISSUER': None,
+        'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+        'TOKEN_TYPE_CLAIM': 'token_type',
 
-    'AUTH_HEADER_TYPES': ('Bearer',),
-    'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
-    'USER_ID_FIELD': 'id',
-    'USER_ID_CLAIM': 'user_id',
+        'JTI_CLAIM': 'jti',
 
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
-    'TOKEN_TYPE_CLAIM': 'token_type',
+        'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
+        'SLIDING_TOKEN_LIFETIME': Raw("timedelta(minutes=5)"),
+        'SLIDING_TOKEN_REFRESH_LIFETIME': Raw("timedelta(days=1)"),
+    })
 
-    'JTI_CLAIM': 'jti',
 
-    'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
-    'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
-    'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
-}
+def setup_notifications(settings):
     """
+    Configure the notification pipeline of Notification projects.
 
-    with open(settings_file, 'w') as file:
-        file.write(settings)
+    Every channel refuses to send, through UnconfiguredProvider, until
+    NOTIFICATION_<CHANNEL>_BACKEND names a real provider. With Celery, beat
+    starts a dispatch task per channel every NOTIFICATION_DISPATCH_INTERVAL
+    seconds, which picks up retries and scheduled notifications; enqueue()
+    starts one right away.
+    """
+    print("Setting up notifications...")
+    providers = {}
+    for channel, rate_limit in NOTIFICATION_CHANNELS.items():
+        prefix = f"NOTIFICATION_{channel.upper()}"
+        providers[channel] = {
+            'BACKEND': env(f"{prefix}_BACKEND", f"{app_name}.notifications.providers.UnconfiguredProvider"),
+            'OPTIONS': {},
+            'RATE_LIMIT': Raw(f"int(os.environ.get('{prefix}_RATE_LIMIT', '{rate_limit}'))"),
+        }
+    notification_settings = {
+        'NOTIFICATION_PROVIDERS': providers,
+        'NOTIFICATION_API_TOKEN': env('NOTIFICATION_API_TOKEN', ''),
+        'NOTIFICATION_MAX_REQUEST_SIZE': Raw("int(os.environ.get('NOTIFICATION_MAX_REQUEST_SIZE', '10000'))"),
+        'NOTIFICATION_BATCH_SIZE': Raw("int(os.environ.get('NOTIFICATION_BATCH_SIZE', '500'))"),
+        'NOTIFICATION_MAX_ATTEMPTS': Raw("int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', '5'))"),
+        'NOTIFICATION_RETRY_DELAY': Raw("int(os.environ.get('NOTIFICATION_RETRY_DELAY', '30'))"),
+        'NOTIFICATION_CLAIM_SECONDS': Raw("int(os.environ.get('NOTIFICATION_CLAIM_SECONDS', '300'))"),
+    }
+    if use_celery:
+        notification_settings['NOTIFICATION_DISPATCH_SECONDS'] = Raw(
+            "int(os.environ.get('NOTIFICATION_DISPATCH_SECONDS', '60'))")
+    for name, value in notification_settings.items():
+        settings.set_setting(name, value, section="Notifications")
+    if use_celery:
+        settings.merge_setting('CELERY_BEAT_SCHEDULE', {
+            f"dispatch-{channel}-notifications": {
+                'task': f"{app_name}.tasks.dispatch_notifications",
+                'schedule': Raw("float(os.environ.get('NOTIFICATION_DISPATCH_INTERVAL', '5'))"),
+                'args': [channel],
+            }
+            for channel in NOTIFICATION_CHANNELS
+        }, section="Notifications")
+
+
+def remove_notification_pipeline():
+    """Remove the notification pipeline unless project_type is Notification."""
+    package = f"{app_name}/notifications"
+    if os.path.exists(package):
+        print(f"Removing {package}...")
+        shutil.rmtree(package)
+    for path in (f"{app_name}/management/commands/dispatch_notifications.py",
+                 f"{app_name}/management/commands/notification_throughput.py"):
+        if os.path.exists(path):
+            print(f"Removing {path}...")
+            os.remove(path)
+
+
+def setup_subscriptions(settings):
+    """
+    Configure the subscription renewal engine of VAS projects.
+
+    Charges go through StubGateway until BILLING_GATEWAY_BACKEND names a real
+    gateway. With Celery, beat starts a renewal run every night at
+    RENEWAL_HOUR (UTC), which renews RENEWAL_CHUNK_SIZE subscriptions per
+    task on the `low` queue.
+    """
+    print("Setting up subscription renewals...")
+    subscription_settings = {
+        'BILLING_GATEWAY': {
+            'BACKEND': env('BILLING_GATEWAY_BACKEND', f"{app_name}.subscriptions.gateways.StubGateway"),
+            'OPTIONS': {},
+        },
+        'RENEWAL_CHUNK_SIZE': Raw("int(os.environ.get('RENEWAL_CHUNK_SIZE', '1000'))"),
+        'RENEWAL_MAX_FAILED_ATTEMPTS': Raw("int(os.environ.get('RENEWAL_MAX_FAILED_ATTEMPTS', '3'))"),
+        'RENEWAL_RETRY_INTERVAL': Raw("int(os.environ.get('RENEWAL_RETRY_INTERVAL', '21600'))"),
+    }
+    for name, value in subscription_settings.items():
+        settings.set_setting(name, value, section="Subscriptions")
+    if use_celery:
+        settings.add_import("from celery.schedules import crontab")
+        settings.merge_setting('CELERY_BEAT_SCHEDULE', {
+            'renew-subscriptions': {
+                'task': f"{app_name}.tasks.renew_subscriptions",
+                'schedule': Raw("crontab(minute=0, hour=os.environ.get('RENEWAL_HOUR', '1'))"),
+            },
+        }, section="Subscriptions")
+
+
+def remove_subscription_engine():
+    """Remove the subscription renewal engine unless project_type is VAS."""
+    package = f"{app_name}/subscriptions"
+    if os.path.exists(package):
+        print(f"Removing {package}...")
+        shutil.rmtree(package)
+    for path in (f"{app_name}/management/commands/renew_subscriptions.py",
+                 f"{app_name}/management/commands/renewal_benchmark.py"):
+        if os.path.exists(path):
+            print(f"Removing {path}...")
+            os.remove(path)
+
+
+def setup_callbacks(settings):
+    """
+    Configure callback ingestion of VAS projects.
+
+    POST /callbacks/ answers once the events are in the buffer: a Redis stream
+    when use_redis is set, else a staging table. With Celery, beat starts a
+    consumer every CALLBACK_CONSUME_INTERVAL seconds to apply them.
+    """
+    print("Setting up callback ingestion...")
+    callback_settings = {
+        'CALLBACK_TOKEN': env('CALLBACK_TOKEN', ''),
+        'CALLBACK_BUFFER': env('CALLBACK_BUFFER', "redis" if use_redis else "database"),
+    }
+    if use_redis:
+        # A Redis database of its own, so that a cache eviction policy never
+        # drops buffered events.
+        callback_settings['CALLBACK_REDIS_URL'] = env('CALLBACK_REDIS_URL', 'redis://localhost:6379/2')
+        callback_settings['CALLBACK_STREAM'] = env('CALLBACK_STREAM', f"{project_slug}:callbacks")
+        callback_settings['CALLBACK_CLAIM_SECONDS'] = Raw(
+            "int(os.environ.get('CALLBACK_CLAIM_SECONDS', '300'))")
+    callback_settings.update({
+        'CALLBACK_MAX_REQUEST_SIZE': Raw("int(os.environ.get('CALLBACK_MAX_REQUEST_SIZE', '1000'))"),
+        'CALLBACK_BATCH_SIZE': Raw("int(os.environ.get('CALLBACK_BATCH_SIZE', '500'))"),
+        'CALLBACK_DEDUP_DAYS': Raw("int(os.environ.get('CALLBACK_DEDUP_DAYS', '7'))"),
+    })
+    if use_celery:
+        callback_settings['CALLBACK_CONSUME_SECONDS'] = Raw(
+            "int(os.environ.get('CALLBACK_CONSUME_SECONDS', '60'))")
+    for name, value in callback_settings.items():
+        settings.set_setting(name, value, section="Callbacks")
+    if use_celery:
+        settings.merge_setting('CELERY_BEAT_SCHEDULE', {
+            'consume-callbacks': {
+                'task': f"{app_name}.tasks.consume_callbacks",
+                'schedule': Raw("float(os.environ.get('CALLBACK_CONSUME_INTERVAL', '5'))"),
+            },
+        }, section="Callbacks")
+
+
+def remove_callback_ingestion():
+    """Remove callback ingestion unless project_type is VAS."""
+    package = f"{app_name}/callbacks"
+    if os.path.exists(package):
+        print(f"Removing {package}...")
+        shutil.rmtree(package)
+    for path in (f"{app_name}/migrations/0002_callbacks.py",
+                 f"{app_name}/management/commands/consume_callbacks.py",
+                 f"{app_name}/management/commands/callback_benchmark.py"):
+        if os.path.exists(path):
+            print(f"Removing {path}...")
+            os.remove(path)
+
+
+def remove_initial_migration():
+    """Remove the app's initial migration, which only has project type models."""
+    migration = f"{app_name}/migrations/0001_initial.py"
+    if os.path.exists(migration):
+        print(f"Removing {migration}...")
+        os.remove(migration)
 
 
 def setup_documentation(project_type: str):
@@ -748,7 +2119,9 @@ exclude: '\.venv'
 
 def generate_secret_key():
     """Generate a Django secret key."""
-    chars = string.ascii_letters + string.digits + string.punctuation
+    # Quotes, backslashes, '#' and '$' are left out: python-dotenv gives them
+    # special meaning in unquoted .env values.
+    chars = string.ascii_letters + string.digits + '!%&()*+,-./:;<=>?@[]^_{|}~'
     return ''.join(random.SystemRandom().choice(chars) for _ in range(50))
 
 
@@ -844,34 +2217,17 @@ def check_env_file():
         sys.exit(1)
 
 
-def add_whitenoise_middleware():
-    settings_file = "{{ cookiecutter.project_slug }}/settings.py"
-
-    # Read the settings file
-    with open(settings_file, 'r') as file:
-        content = file.read()
-
+def add_whitenoise_middleware(settings):
     # Insert WhiteNoise middleware after SecurityMiddleware
-    security_middleware = "'django.middleware.security.SecurityMiddleware',"
-    whitenoise_middleware = "'whitenoise.middleware.WhiteNoiseMiddleware',"
-
-    if whitenoise_middleware not in content:
-        # Insert WhiteNoise middleware in the correct position
-        content = content.replace(
-            security_middleware,
-            f"{security_middleware}\n    {whitenoise_middleware}"
-        )
-
-    # Add STATIC_ROOT setting if not present
-    if "STATIC_ROOT" not in content:
-        static_root = "\nSTATIC_ROOT = BASE_DIR / 'staticfiles'\n"
-        content += static_root
+    settings.add_middleware(
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+        after='django.middleware.security.SecurityMiddleware',
+    )
 
-    # Write the updated content to the settings file
-    with open(settings_file, 'w') as file:
-        file.write(content)
+    if settings.get("STATIC_ROOT") is None:
+        settings.set_setting("STATIC_ROOT", Raw("BASE_DIR / 'staticfiles'"))
 
-    print("Whitenoise middleware and STATIC_ROOT added to settings.py.")
+    print("Whitenoise middleware and STATIC_ROOT added to settings.")
 
     # Create the templates folder if it does not exist
     templates_dir = os.path.join(
@@ -881,27 +2237,20 @@ def add_whitenoise_middleware():
         print(f"Created templates directory at: {templates_dir}")
 
     # Update the TEMPLATES setting
-    update_templates_dir_in_settings()
-
+    update_templates_dir_in_settings(settings)
 
-def update_templates_dir_in_settings():
-    settings_file = "{{ cookiecutter.project_slug }}/settings.py"
-
-    with open(settings_file, 'r') as file:
-        content = file.read()
 
-    # Check if 'DIRS' is in TEMPLATES settings and update the template directory
-    if "'DIRS':" in content:
-        content = content.replace(
-            "'DIRS': [],",
-            f"'DIRS': [BASE_DIR / 'templates'],"
-        )
+def update_templates_dir_in_settings(settings):
+    templates = settings.get("TEMPLATES")
+    if not templates:
+        return
 
-    # Write the updated settings back to the file
-    with open(settings_file, 'w') as file:
-        file.write(content)
+    for template in templates:
+        if template.get('DIRS') == []:
+            template['DIRS'] = [Raw("BASE_DIR / 'templates'")]
+    settings.set_setting("TEMPLATES", templates)
 
-    print("TEMPLATES DIR updated in settings.py.")
+    print("TEMPLATES DIR updated in settings.")
 
 
 def replace_app_name():
@@ -927,35 +2276,50 @@ def replace_app_name():
 
 
 def setup_virtualenv():
-    try:
-        if not os.path.exists('venv'):
-            subprocess.check_call(
-                [sys.executable, "-m", "venv", "venv"])
-
-        if os.name == 'nt':  # Windows
-            activate_script = os.path.join(
-                'venv', 'Scripts', 'activate.bat')
-        else:
-            activate_script = os.path.join('venv', 'bin', 'activate')
-
-        if os.name == 'nt':
-            subprocess.call(activate_script, shell=True)
-        else:
-            subprocess.call(f"source {activate_script}", shell=True)
+    """
+    Create the project's virtualenv and return the path of its interpreter.
 
-        print("Virtual environment created and activated.")
+    Activating a virtualenv from a subprocess has no effect on the hook, so
+    nothing is activated: every later install and tool call uses the
+    virtualenv's executables directly (see venv_executable()), which keeps
+    the interpreter running cookiecutter untouched.
+    """
+    try:
+        if not os.path.exists(venv_python()):
+            if installer_backend == "uv":
+                # --seed installs pip, which locking relies on.
+                check_call(["uv", "venv", "--seed", "--python", sys.executable,
+                            VENV_DIR])
+            else:
+                check_call([sys.executable, "-m", "venv", VENV_DIR])
+
+        print(f"Virtual environment ready at {VENV_DIR}.")
+        return venv_python()
     except subprocess.CalledProcessError as e:
         print(f"Error creating virtual environment: {str(e)}")
         sys.exit(1)
     except OSError as e:
-        print(f"Error activating virtual environment: {str(e)}")
+        print(f"Error creating virtual environment: {str(e)}")
         sys.exit(1)
 
 
 if __name__ == '__main__':
     print("Project setup started...")
-    install_requirements()
-    setup_project()
-    initialize_git_and_push()
-    update_requirements()
+    configure_non_interactive()
+    installer_backend = resolve_installer()
+    db_connection_strategy = resolve_db_pooling()
+    with timed_phase("install"):
+        install_requirements()
+    with timed_phase("project setup"):
+        setup_project()
+    with timed_phase("requirements"):
+        update_requirements()
+    with timed_phase("benchmark baseline"):
+        record_benchmark_baseline()
+    with timed_phase("git"):
+        initialize_git_and_push()
+    with timed_phase("pre-commit install"):
+        install_pre_commit_hooks()
+    print_phase_timings()
+    write_generation_profile()
     print("Project setup complete!")
@@ -0,0 +1,260 @@
+"""
+Generate and smoke-test option combinations of the template in parallel.
+
+Every combination of the matrix axes below is rendered with
+`cookiecutter --no-input` in its own working directory, then checked with
+`compileall` and `manage.py check`. Combinations run in a process pool and
+share one pip cache and, optionally, one offline wheelhouse. A pass/fail and
+timing report is printed at the end and written as JSON.
+
+Usage:
+    python scripts/generate_matrix.py --workers 8 --report matrix.json
+    python scripts/generate_matrix.py --filter db_type=SQLite --filter use_celery=n
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+TEMPLATE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MATRIX_AXES = [
+    "project_type",
+    "db_type",
+    "db_pooling",
+    "use_celery",
+    "use_rest_framework",
+    "use_graphql",
+    "use_jwt",
+    "use_docker",
+]
+
+# Values used for every combination: nothing is pushed anywhere and the hook
+# never waits for input.
+FIXED_CONTEXT = {
+    "project_name": "matrix project",
+    "repo_link": "",
+}
+
+
+def load_matrix(filters):
+    """
+    Build the list of combinations from the choices in cookiecutter.json.
+
+    Args:
+        filters: Mapping of axis name to the single value it is pinned to.
+
+    Returns:
+        A list of dicts mapping each axis to a value. Pooling strategies other
+        than `persistent` are PostgreSQL-only (the hook falls back to
+        persistent connections), so they are only combined with PostgreSQL.
+    """
+    with open(os.path.join(TEMPLATE_DIR, "cookiecutter.json")) as file:
+        context = json.load(file)
+
+    choices = []
+    for axis in MATRIX_AXES:
+        if axis in filters:
+            choices.append([filters[axis]])
+        else:
+            choices.append(context[axis])
+
+    combinations = [dict(zip(MATRIX_AXES, values))
+                    for values in itertools.product(*choices)]
+    return [combination for combination in combinations
+            if combination["db_pooling"] == "persistent"
+            or combination["db_type"] == "PostgreSQL"]
+
+
+def combination_name(combination):
+    return "-".join(
+        str(value).replace(" ", "").lower() for value in combination.values())
+
+
+def warm_up_combinations(matrix):
+    """
+    Pick the combinations that need the most packages, one per database.
+
+    They run serially before the pool starts, so the shared caches are filled
+    once instead of by several workers at the same time.
+    """
+    warm_up = {}
+    for combination in matrix:
+        score = sum(value == "y" for value in combination.values())
+        db = combination["db_type"]
+        if db not in warm_up or score > warm_up[db][0]:
+            warm_up[db] = (score, combination)
+    return [combination for _, combination in warm_up.values()]
+
+
+def run_step(command, cwd, env, log):
+    start = time.perf_counter()
+    log.write(f"$ {' '.join(command)}\n")
+    log.flush()
+    returncode = subprocess.call(
+        command, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+        stdout=log, stderr=subprocess.STDOUT)
+    return returncode == 0, time.perf_counter() - start
+
+
+def generate_combination(combination, base_context, work_root, shared_env, keep):
+    """
+    Render one combination and smoke-test the generated project.
+
+    Returns:
+        A report entry with the status, the failed stage (if any) and the
+        timings of each stage.
+    """
+    name = combination_name(combination)
+    output_dir = tempfile.mkdtemp(prefix=f"{name}-", dir=work_root)
+    log_path = os.path.join(work_root, f"{name}.log")
+    env = dict(os.environ, **shared_env)
+
+    context = dict(base_context, **combination)
+    result = {"name": name, "combination": combination,
+              "status": "pass", "failed_stage": None, "timings": {},
+              "log": log_path}
+
+    with open(log_path, "w") as log:
+        command = [sys.executable, "-m", "cookiecutter", "--no-input",
+                   "--output-dir", output_dir, TEMPLATE_DIR]
+        command += [f"{key}={value}" for key, value in context.items()]
+        ok, elapsed = run_step(command, TEMPLATE_DIR, env, log)
+        result["timings"]["generate"] = round(elapsed, 2)
+
+        if ok:
+            entries = [entry for entry in os.listdir(output_dir)
+                       if os.path.isdir(os.path.join(output_dir, entry))]
+            project_dir = os.path.join(output_dir, entries[0])
+            # The hook installs everything into the project's own virtualenv.
+            python = os.path.join(project_dir, "venv", "bin", "python")
+            checks = [
+                ("compile", [python, "-m", "compileall", "-q", "-x", "venv", "."]),
+                ("check", [python, "manage.py", "check"]),
+            ]
+            for stage, check in checks:
+                ok, elapsed = run_step(check, project_dir, env, log)
+                result["timings"][stage] = round(elapsed, 2)
+                if not ok:
+                    result["status"] = "fail"
+                    result["failed_stage"] = stage
+                    break
+        else:
+            result["status"] = "fail"
+            result["failed_stage"] = "generate"
+
+    result["timings"]["total"] = round(sum(result["timings"].values()), 2)
+    if not keep and result["status"] == "pass":
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return result
+
+
+def print_report(results, elapsed):
+    width = max(len(result["name"]) for result in results)
+    print(f"\n{'combination'.ljust(width)}  status  stage      seconds")
+    for result in sorted(results, key=lambda item: item["name"]):
+        stage = result["failed_stage"] or "-"
+        print(f"{result['name'].ljust(width)}  {result['status']:<6}  "
+              f"{stage:<9}  {result['timings']['total']:7.2f}")
+
+    failed = [result for result in results if result["status"] == "fail"]
+    print(f"\n{len(results) - len(failed)}/{len(results)} combinations passed "
+          f"in {elapsed:.1f}s wall time.")
+    for result in failed:
+        print(f"- {result['name']} failed at {result['failed_stage']}, "
+              f"see {result['log']}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of combinations generated concurrently")
+    parser.add_argument("--filter", action="append", default=[],
+                        metavar="AXIS=VALUE",
+                        help="pin an axis to a single value (repeatable)")
+    parser.add_argument("--work-dir", default=None,
+                        help="where projects and logs are written "
+                             "(default: a new temporary directory)")
+    parser.add_argument("--cache-dir",
+                        default=os.path.expanduser("~/.cache/cookiecutter-django"),
+                        help="pip cache shared by all combinations")
+    parser.add_argument("--wheelhouse", default=None,
+                        help="install offline from this shared wheelhouse")
+    parser.add_argument("--report", default="matrix-report.json",
+                        help="path of the JSON report")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep generated projects that passed")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    filters = dict(item.split("=", 1) for item in args.filter)
+    unknown = set(filters) - set(MATRIX_AXES)
+    if unknown:
+        sys.exit(f"Unknown matrix axis: {', '.join(sorted(unknown))}")
+
+    matrix = load_matrix(filters)
+    work_root = args.work_dir or tempfile.mkdtemp(prefix="cookiecutter-matrix-")
+    os.makedirs(work_root, exist_ok=True)
+
+    shared_env = {
+        "COOKIECUTTER_NO_INPUT": "1",
+        "PIP_CACHE_DIR": os.path.join(args.cache_dir, "pip"),
+        "PIP_DISABLE_PIP_VERSION_CHECK": "1",
+        # The hook commits the generated project.
+        "GIT_AUTHOR_NAME": "cookiecutter matrix",
+        "GIT_AUTHOR_EMAIL": "matrix@localhost",
+        "GIT_COMMITTER_NAME": "cookiecutter matrix",
+        "GIT_COMMITTER_EMAIL": "matrix@localhost",
+    }
+    base_context = dict(FIXED_CONTEXT)
+    if args.wheelhouse:
+        base_context["install_mode"] = "offline"
+        base_context["wheelhouse_dir"] = os.path.abspath(args.wheelhouse)
+
+    print(f"Generating {len(matrix)} combinations with {args.workers} workers "
+          f"in {work_root}...")
+    start = time.perf_counter()
+
+    warm_up = warm_up_combinations(matrix)
+    results = []
+    for combination in warm_up:
+        print(f"warm-up: {combination_name(combination)}")
+        results.append(generate_combination(
+            combination, base_context, work_root, shared_env, args.keep))
+
+    remaining = [combination for combination in matrix
+                 if combination not in warm_up]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(generate_combination, combination, base_context,
+                            work_root, shared_env, args.keep)
+            for combination in remaining
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"{result['status']}: {result['name']} "
+                  f"({result['timings']['total']:.1f}s)")
+            results.append(result)
+
+    elapsed = time.perf_counter() - start
+    print_report(results, elapsed)
+
+    with open(args.report, "w") as file:
+        json.dump({"wall_time": round(elapsed, 2), "results": results},
+                  file, indent=2)
+    print(f"Report written to {args.report}")
+
+    if any(result["status"] == "fail" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
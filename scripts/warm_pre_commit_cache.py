@@ -0,0 +1,88 @@
+"""
+Pre-warm the pre-commit hook environments used by generated projects.
+
+Run once per build agent (or after bumping a hook rev in the template). It
+builds every hook environment the template's .pre-commit-config.yaml needs in
+pre-commit's store and marks the config's cache key as ready, so the
+post-generation hook only has to install the git hook.
+
+Usage:
+    python scripts/warm_pre_commit_cache.py
+    PRE_COMMIT_HOME=/cache/pre-commit python scripts/warm_pre_commit_cache.py
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+TEMPLATE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(
+    TEMPLATE_DIR, "{{cookiecutter.project_slug}}", ".pre-commit-config.yaml")
+
+
+def pre_commit_home():
+    """Return the directory pre-commit keeps hook environments in."""
+    if os.environ.get("PRE_COMMIT_HOME"):
+        return os.environ["PRE_COMMIT_HOME"]
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_dir, "pre-commit")
+
+
+def pre_commit_cache_key(config_file):
+    """Same key as pre_commit_cache_key() in hooks/post_gen_project.py."""
+    pattern = re.compile(
+        r"^[\s-]*(repo|rev|python|language_version|additional_dependencies)\s*:\s*(.*?)\s*$")
+    entries = set()
+    with open(config_file, 'r') as file:
+        for line in file:
+            match = pattern.match(line)
+            if match:
+                entries.add(f"{match.group(1)}={match.group(2)}")
+    digest = hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+    return digest[:16]
+
+
+def warm(config_file, force=False):
+    home = pre_commit_home()
+    key = pre_commit_cache_key(config_file)
+    marker = os.path.join(home, f"cookiecutter-{key}.ready")
+
+    if os.path.exists(marker) and not force:
+        print(f"Hook environments {key} are already cached in {home}.")
+        return
+
+    # pre-commit only runs inside a git repository.
+    workdir = tempfile.mkdtemp(prefix="pre-commit-warm-")
+    try:
+        shutil.copy(config_file, os.path.join(workdir, ".pre-commit-config.yaml"))
+        subprocess.check_call(["git", "init", "-q"], cwd=workdir)
+        start = time.perf_counter()
+        subprocess.check_call(
+            [sys.executable, "-m", "pre_commit", "install-hooks"], cwd=workdir)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(home, exist_ok=True)
+    with open(marker, 'w') as file:
+        file.write(time.strftime("%Y-%m-%dT%H:%M:%SZ\n", time.gmtime()))
+    print(f"Hook environments {key} cached in {home} in {elapsed:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", default=DEFAULT_CONFIG,
+                        help="pre-commit config to warm (default: the template's)")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild even if the key is already marked ready")
+    args = parser.parse_args()
+    warm(args.config, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Tests for the GitLab client of the post-generation hook, against a local
+stand-in for the GitLab API.
+
+    python -m unittest discover tests
+"""
+import importlib.util
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+HOOK = Path(__file__).resolve().parent.parent / "hooks" / "post_gen_project.py"
+
+
+def load_hook():
+    spec = importlib.util.spec_from_file_location("post_gen_project", HOOK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+hook = load_hook()
+
+
+class FakeGitLab(BaseHTTPRequestHandler):
+    """
+    Answers variable requests from the server's script.
+
+    The script maps (method, key) to the responses to give in turn, each a
+    (status, body, headers) tuple, or None to drop the connection unanswered.
+    Variables not in the script are created.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.answer(json.loads(self.body())["key"])
+
+    def do_PUT(self):
+        self.body()
+        self.answer(self.path.rsplit("/", 1)[1])
+
+    def body(self):
+        return self.rfile.read(int(self.headers["Content-Length"]))
+
+    def answer(self, key):
+        self.server.requests.append((self.command, key, self.headers["PRIVATE-TOKEN"]))
+        responses = self.server.script.get((self.command, key), [])
+        response = responses.pop(0) if responses else (201, {"key": key}, {})
+        if response is None:
+            self.close_connection = True
+            return
+        status, body, headers = response
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GitLabClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitLab)
+        self.server.script = {}
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host, port = self.server.server_address
+        self.client = hook.GitLabClient(f"http://{host}:{port}", "token", backoff=0.01)
+        self.addCleanup(self.client._reset_connection)
+        sleep = mock.patch.object(hook.time, "sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def set_variable(self, key="SECRET_KEY", value="value"):
+        return self.client.set_variable(42, key, value)
+
+    def test_created(self):
+        self.assertEqual(self.set_variable(), ("created", ""))
+        self.assertEqual(self.server.requests, [("POST", "SECRET_KEY", "token")])
+
+    def test_existing_variable_is_updated(self):
+        self.server.script[("POST", "SECRET_KEY")] = [
+            (400, {"message": {"key": ["(SECRET_KEY) has already been taken"]}}, {})]
+        self.server.script[("PUT", "SECRET_KEY")] = [(200, {"key": "SECRET_KEY"}, {})]
+
+        self.assertEqual(self.set_variable(), ("updated", ""))
+        self.assertEqual([request[:2] for request in self.server.requests],
+                         [("POST", "SECRET_KEY"), ("PUT", "SECRET_KEY")])
+
+    def test_other_client_errors_fail(self):
+        self.server.script[("POST", "SECRET_KEY")] = [(400, {"message": "value is invalid"}, {})]
+
+        outcome, detail = self.set_variable()
+        self.assertEqual(outcome, "failed")
+        self.assertIn("400", detail)
+
+    def test_rate_limit_honours_retry_after(self):
+        self.server.script[("POST", "SECRET_KEY")] = [(429, {}, {"Retry-After": "7"})]
+
+        self.assertEqual(self.set_variable(), ("created", ""))
+        self.assertEqual(len(self.server.requests), 2)
+        self.sleep.assert_called_once_with(7)
+
+    def test_dropped_connection_is_retried(self):
+        self.server.script[("POST", "SECRET_KEY")] = [None]
+
+        self.assertEqual(self.set_variable(), ("created", ""))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_gives_up_after_the_last_retry(self):
+        self.server.script[("POST", "SECRET_KEY")] = [None] * (self.client.retries + 1)
+
+        outcome, _ = self.set_variable()
+        self.assertEqual(outcome, "failed")
+        self.assertEqual(len(self.server.requests), self.client.retries + 1)
+
+    def test_provision_masks_only_maskable_values(self):
+        client = mock.Mock()
+        client.set_variable.return_value = ("created", "")
+
+        hook.provision_gitlab_variables(client, 42, {
+            "TOKEN": "Ab3+/=_-@:.~xyz",
+            "SHORT": "abc",
+            "SPACES": "two words here",
+            "MULTILINE": "line-one\nline-two",
+            "QUOTES": 'say-"hello"-now',
+        })
+        masked = {call.args[1]: call.kwargs["masked"] for call in client.set_variable.call_args_list}
+        self.assertEqual(masked, {"TOKEN": True, "SHORT": False, "SPACES": False,
+                                  "MULTILINE": False, "QUOTES": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
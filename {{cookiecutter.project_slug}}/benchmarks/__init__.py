@@ -0,0 +1,42 @@
+"""
+Micro-benchmarks, run with `python manage.py benchmark`.
+
+Benchmarks live in the bench_*.py modules of this package and register with
+the @benchmark decorator:
+
+    from benchmarks import benchmark
+
+    def create_articles():
+        Article.objects.bulk_create(Article(title=str(i)) for i in range(500))
+        return list(Article.objects.all())
+
+    @benchmark(setup=create_articles)
+    def serialize_articles(articles):
+        ArticleSerializer(articles, many=True).data
+
+A benchmark runs one operation per call. The setup function runs once,
+before timing, in the benchmark database; its return value is passed to every
+benchmark registered with it. The baseline the results are compared with is
+baseline.json, recorded with `manage.py benchmark --save`; locustfile.py has the
+HTTP load scenario.
+"""
+import importlib
+import pkgutil
+
+BENCHMARKS = {}
+
+
+def benchmark(func=None, *, name=None, setup=None):
+    """Register a benchmark under `name`, the function name by default."""
+    def register(func):
+        BENCHMARKS[name or func.__name__] = (func, setup)
+        return func
+    return register(func) if func else register
+
+
+def load_benchmarks():
+    """Import every bench_* module and return the registered benchmarks."""
+    for module in pkgutil.iter_modules(__path__):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"{__name__}.{module.name}")
+    return BENCHMARKS
@@ -0,0 +1,48 @@
+"""Queryset benchmarks on the auth models, which every project has."""
+from django.contrib.auth.models import Group, User
+
+from benchmarks import benchmark
+
+USERS = 500
+
+
+def create_users():
+    """Create USERS users in two groups each, unless done already; return their ids."""
+    if not User.objects.exists():
+        Group.objects.bulk_create(Group(name=f"group{i}") for i in range(10))
+        User.objects.bulk_create(
+            User(username=f"user{i}", email=f"user{i}@example.com") for i in range(USERS))
+        # Not every backend returns primary keys from bulk_create().
+        groups = list(Group.objects.order_by("pk"))
+        users = list(User.objects.order_by("pk"))
+        Membership = User.groups.through
+        Membership.objects.bulk_create(
+            Membership(user_id=user.pk, group_id=groups[(i + offset) % len(groups)].pk)
+            for i, user in enumerate(users) for offset in (0, 1))
+    return list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+
+@benchmark(setup=create_users)
+def orm_get_by_pk(user_ids):
+    User.objects.get(pk=user_ids[len(user_ids) // 2])
+
+
+@benchmark(setup=create_users)
+def orm_list_models(user_ids):
+    list(User.objects.all())
+
+
+@benchmark(setup=create_users)
+def orm_values_list(user_ids):
+    list(User.objects.values_list("id", "username"))
+
+
+@benchmark(setup=create_users)
+def orm_filter_count(user_ids):
+    User.objects.filter(username__startswith="user1", is_active=True).count()
+
+
+@benchmark(setup=create_users)
+def orm_prefetch_related(user_ids):
+    for user in User.objects.prefetch_related("groups"):
+        list(user.groups.all())
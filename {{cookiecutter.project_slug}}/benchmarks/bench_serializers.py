@@ -0,0 +1,33 @@
+"""Django REST framework serializer benchmarks."""
+from django.contrib.auth.models import User
+from rest_framework import serializers
+
+from benchmarks import benchmark
+from benchmarks.bench_orm import create_users
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username", "email", "is_active", "date_joined"]
+
+
+def load_users():
+    create_users()
+    return list(User.objects.all())
+
+
+def user_payloads():
+    return [{"username": f"new{i}", "email": f"new{i}@example.com"} for i in range(100)]
+
+
+@benchmark(setup=load_users)
+def serializer_to_representation(users):
+    UserSerializer(users, many=True).data
+
+
+@benchmark(setup=user_payloads)
+def serializer_validation(payloads):
+    # Validation includes the unique check on username, one query per item.
+    serializer = UserSerializer(data=payloads, many=True)
+    serializer.is_valid(raise_exception=True)
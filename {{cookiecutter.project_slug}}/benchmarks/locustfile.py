@@ -0,0 +1,78 @@
+"""
+HTTP load scenario for the running application.
+
+Locust is not in the requirements (it pulls in gevent and Flask); install it
+where the load is generated:
+
+    pip install locust
+    locust -f benchmarks/locustfile.py --host http://localhost:8000
+
+Headless, e.g. against a staging deploy:
+
+    locust -f benchmarks/locustfile.py --host https://staging.example.com \\
+        --headless --users 50 --spawn-rate 10 --run-time 2m --csv benchmarks/locust
+
+The run exits with status 1 when more than LOCUST_MAX_FAILURE_RATIO of the
+requests failed or the 95th percentile response time exceeded
+LOCUST_MAX_P95_MS. Endpoints behind authentication use LOCUST_USERNAME and
+LOCUST_PASSWORD (HTTP basic auth).
+"""
+import os
+
+from locust import HttpUser, between, events, task
+
+MAX_FAILURE_RATIO = float(os.environ.get("LOCUST_MAX_FAILURE_RATIO", "0.01"))
+MAX_P95_MS = float(os.environ.get("LOCUST_MAX_P95_MS", "500"))
+
+
+class ProjectUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        if os.environ.get("LOCUST_USERNAME"):
+            self.client.auth = (os.environ["LOCUST_USERNAME"],
+                                os.environ.get("LOCUST_PASSWORD", ""))
+
+    @task(5)
+    def liveness(self):
+        self.client.get("/healthz/")
+
+    @task(2)
+    def readiness(self):
+        self.client.get("/readyz/")
+{%- if cookiecutter.use_asgi == "y" %}
+
+    @task(5)
+    def async_ping(self):
+        self.client.get("/async/ping/")
+{%- endif %}
+{%- if cookiecutter.use_rest_framework == "y" %}
+
+    @task(1)
+    def api_schema(self):
+        # Generating the OpenAPI schema walks every API view and serializer.
+        self.client.get("/docs/?format=openapi", name="/docs/ (OpenAPI schema)")
+{%- endif %}
+{%- if cookiecutter.use_graphql == "y" %}
+
+    @task(3)
+    def graphql_query(self):
+        with self.client.post("/graphql/", json={"query": "{ ping }"},
+                              catch_response=True) as response:
+            if response.ok and response.json().get("errors"):
+                response.failure(response.json()["errors"][0]["message"])
+{%- endif %}
+
+
+@events.quitting.add_listener
+def check_thresholds(environment, **kwargs):
+    total = environment.stats.total
+    if total.num_requests == 0:
+        return
+    p95 = total.get_response_time_percentile(0.95)
+    if total.fail_ratio > MAX_FAILURE_RATIO:
+        print(f"Failure ratio {total.fail_ratio:.2%} exceeds {MAX_FAILURE_RATIO:.2%}")
+        environment.process_exit_code = 1
+    elif p95 > MAX_P95_MS:
+        print(f"95th percentile {p95:.0f} ms exceeds {MAX_P95_MS:.0f} ms")
+        environment.process_exit_code = 1
@@ -0,0 +1,135 @@
+#!/bin/sh
+# Zero-downtime (blue/green) deploy, run on the deployment server.
+#
+# The application runs as one of two containers, APP-blue or APP-green, behind
+# an nginx container that owns the public port. A deploy starts the new image
+# as the idle colour, waits until its /readyz/ probe passes, points nginx at
+# it with a graceful reload (in-flight requests finish on the old upstream),
+# then drains and stops the old container. If the new container never becomes
+# ready it is removed and the old one keeps serving.
+#
+# .gitlab-ci.yml pipes this script over ssh:
+#
+#   ssh user@server "IMAGE=registry/app:sha PORT=8000 sh -s" < deploy/deploy.sh
+#
+# Settings (environment variables):
+#   IMAGE          image to deploy (required)
+#   PORT           public port nginx listens on (default 8000)
+#   DEPLOY_DIR     directory for the nginx config and .env (default ~/APP)
+#   ENV_FILE       env file passed to the application (default DEPLOY_DIR/.env)
+#   READY_TIMEOUT  seconds to wait for the new container (default 60)
+#   DRAIN_SECONDS  seconds the old container keeps running after the switch,
+#                  for keep-alive connections to finish (default 10)
+#   STOP_TIMEOUT   seconds gunicorn gets to finish in-flight requests on
+#                  SIGTERM; keep it above GUNICORN_GRACEFUL_TIMEOUT (default 35)
+set -eu
+
+APP={{ cookiecutter.project_slug }}
+IMAGE=${IMAGE:?IMAGE is required}
+PORT=${PORT:-8000}
+DEPLOY_DIR=${DEPLOY_DIR:-$HOME/$APP}
+ENV_FILE=${ENV_FILE:-$DEPLOY_DIR/.env}
+READY_TIMEOUT=${READY_TIMEOUT:-60}
+DRAIN_SECONDS=${DRAIN_SECONDS:-10}
+STOP_TIMEOUT=${STOP_TIMEOUT:-35}
+NETWORK=$APP
+PROXY=$APP-proxy
+PROXY_IMAGE=${PROXY_IMAGE:-nginx:1.27-alpine}
+
+log() {
+    echo "[deploy] $*"
+}
+
+is_running() {
+    [ "$(docker inspect -f '{% raw %}{{.State.Running}}{% endraw %}' "$1" 2>/dev/null)" = "true" ]
+}
+
+write_proxy_config() {
+    mkdir -p "$DEPLOY_DIR/nginx"
+    cat > "$DEPLOY_DIR/nginx/default.conf" <<'EOF'
+server {
+    listen 80;
+
+    location / {
+        proxy_pass http://app;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+    }
+}
+EOF
+    # Written last and renamed, so nginx never reads a half-written file.
+    printf 'upstream app {\n    server %s:8000;\n    keepalive 32;\n}\n' "$1" \
+        > "$DEPLOY_DIR/nginx/upstream.conf.tmp"
+    mv "$DEPLOY_DIR/nginx/upstream.conf.tmp" "$DEPLOY_DIR/nginx/upstream.conf"
+}
+
+if is_running "$APP-blue"; then
+    OLD=$APP-blue
+    NEW=$APP-green
+elif is_running "$APP-green"; then
+    OLD=$APP-green
+    NEW=$APP-blue
+else
+    OLD=
+    NEW=$APP-blue
+fi
+
+docker network inspect "$NETWORK" >/dev/null 2>&1 || docker network create "$NETWORK" >/dev/null
+docker rm -f "$NEW" >/dev/null 2>&1 || true
+
+log "starting $NEW from $IMAGE"
+if [ -f "$ENV_FILE" ]; then
+    set -- --env-file "$ENV_FILE"
+else
+    set --
+fi
+docker run -d --name "$NEW" --network "$NETWORK" --restart unless-stopped \
+    "$@" \
+    -e DJANGO_SETTINGS_MODULE={{ cookiecutter.project_slug }}.settings \
+    -e PORT=8000 \
+    -e GUNICORN_GRACEFUL_TIMEOUT="$((STOP_TIMEOUT - 5))" \
+    "$IMAGE" gunicorn -c gunicorn.conf.py >/dev/null
+
+log "waiting for $NEW to become ready"
+waited=0
+until docker exec "$NEW" python -c \
+        "import urllib.request; urllib.request.urlopen('http://127.0.0.1:8000/readyz/', timeout=2)" \
+        >/dev/null 2>&1; do
+    if ! is_running "$NEW" || [ "$waited" -ge "$READY_TIMEOUT" ]; then
+        log "$NEW did not become ready, keeping ${OLD:-the current setup}"
+        docker logs --tail 50 "$NEW" || true
+        docker rm -f "$NEW" >/dev/null 2>&1 || true
+        exit 1
+    fi
+    sleep 1
+    waited=$((waited + 1))
+done
+log "$NEW ready after ${waited}s"
+
+write_proxy_config "$NEW"
+if is_running "$PROXY"; then
+    # Graceful reload: new connections go to NEW, old nginx workers finish
+    # the requests they are proxying to OLD before exiting.
+    docker exec "$PROXY" nginx -t -q
+    docker exec "$PROXY" nginx -s reload
+else
+    # First blue/green deploy: the container of the previous single-container
+    # deploy still holds the public port.
+    docker rm -f "$APP" >/dev/null 2>&1 || true
+    docker rm -f "$PROXY" >/dev/null 2>&1 || true
+    docker run -d --name "$PROXY" --network "$NETWORK" --restart unless-stopped \
+        -p "$PORT:80" -v "$DEPLOY_DIR/nginx:/etc/nginx/conf.d:ro" "$PROXY_IMAGE" >/dev/null
+fi
+log "traffic switched to $NEW"
+
+if [ -n "$OLD" ]; then
+    log "draining $OLD for ${DRAIN_SECONDS}s"
+    sleep "$DRAIN_SECONDS"
+    # SIGTERM: gunicorn stops accepting and finishes in-flight requests.
+    docker stop -t "$STOP_TIMEOUT" "$OLD" >/dev/null
+    docker rm "$OLD" >/dev/null
+    log "stopped $OLD"
+fi
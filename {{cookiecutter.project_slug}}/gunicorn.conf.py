@@ -0,0 +1,140 @@
+"""
+Gunicorn configuration shared by the Dockerfile, docker-compose and the deploy
+job:
+
+    gunicorn -c gunicorn.conf.py
+
+Every value can be overridden with an environment variable (GUNICORN_*), so
+the same file serves a laptop and a production host. Worker counts are sized
+from the CPUs the container may actually use, not the host's CPU count.
+"""
+import multiprocessing
+import os
+import shutil
+
+# Worker class name -> the gunicorn worker implementing it.
+WORKER_CLASSES = {
+    "gthread": "gthread",
+    "gevent": "gevent",
+    "uvicorn": "uvicorn_worker.UvicornWorker",
+}
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def available_cpus():
+    """
+    Return the CPUs this process may use.
+
+    Honours the cgroup v2 CPU quota (docker run --cpus) and the CPU affinity
+    mask, both of which multiprocessing.cpu_count() ignores.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# The worker class the project was generated for: only its packages are
+# installed. gthread comes with gunicorn, so it is always available too.
+{%- if cookiecutter.use_asgi == "y" %}
+GENERATED_WORKER_CLASS = "uvicorn"
+{%- else %}
+GENERATED_WORKER_CLASS = "{{ cookiecutter.gunicorn_worker_class }}"
+{%- endif %}
+AVAILABLE_WORKER_CLASSES = sorted({"gthread", GENERATED_WORKER_CLASS})
+
+cpus = available_cpus()
+worker_type = os.environ.get("GUNICORN_WORKER_CLASS", GENERATED_WORKER_CLASS)
+if worker_type not in AVAILABLE_WORKER_CLASSES:
+    raise RuntimeError(
+        f"GUNICORN_WORKER_CLASS={worker_type!r} is not installed in this project "
+        f"(available: {', '.join(AVAILABLE_WORKER_CLASSES)}); add its packages to the "
+        f"requirements first.")
+worker_class = WORKER_CLASSES[worker_type]
+
+if worker_type == "uvicorn":
+    wsgi_app = "{{ cookiecutter.project_slug }}.asgi:application"
+    # One event loop per CPU.
+    workers = env_int("GUNICORN_WORKERS", cpus)
+elif worker_type == "gevent":
+    wsgi_app = "{{ cookiecutter.project_slug }}.wsgi:application"
+    # Every greenlet holds its own database connection: keep
+    # worker_connections below what the database (or its pool) can take.
+    workers = env_int("GUNICORN_WORKERS", cpus)
+    worker_connections = env_int("GUNICORN_WORKER_CONNECTIONS", 100)
+
+    def post_fork(server, worker):
+        # psycopg2 waits for the database in C, blocking every greenlet of the
+        # worker; psycogreen makes it wait through gevent instead. psycopg 3
+        # cooperates with gevent by itself.
+        try:
+            import psycopg2  # noqa: F401
+        except ImportError:
+            return
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+else:
+    wsgi_app = "{{ cookiecutter.project_slug }}.wsgi:application"
+    # Threads cover requests waiting on I/O; processes cover CPU.
+    workers = env_int("GUNICORN_WORKERS", cpus * 2 + 1)
+    threads = env_int("GUNICORN_THREADS", 4)
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# Import the application once in the master so workers share its memory pages
+# copy-on-write. The application must not open connections (database, Redis)
+# at import time, or every worker would inherit the same socket. gevent workers
+# load it themselves, after gevent has patched the standard library.
+preload_app = env_bool("GUNICORN_PRELOAD", worker_type != "gevent")
+
+# Recycle workers after a number of requests to contain memory leaks; the
+# jitter keeps them from all restarting at once.
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+# Keep-alive must outlast the proxy's idle timeout towards gunicorn, or the
+# proxy may reuse a connection gunicorn just closed.
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+# Worker heartbeats go to a file; keep it in memory so a slow disk cannot get
+# healthy workers killed.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+# With request profiling on, every worker writes its Prometheus metrics to
+# files in this directory, so /metrics reports all workers whichever one
+# answers the scrape. It must be set before the application is imported.
+if env_bool("PROFILING_ENABLED", False):
+    os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR",
+        "/dev/shm/prometheus" if os.path.isdir("/dev/shm") else "/tmp/prometheus")
+
+    def on_starting(server):
+        # Metrics of a previous run would be added to this one's.
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+        os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+    def child_exit(server, worker):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,94 @@
+"""
+Cache helpers for views and querysets.
+
+Everything goes through the default cache (Redis, see CACHES in settings).
+Queryset results are cached under per-model keys that carry a generation
+number, so invalidate_model() drops every cached result for a model with a
+single write instead of tracking and deleting keys one by one.
+
+    from .cache import cache_view, cached_queryset, invalidate_model
+
+    @cache_view(60)
+    def article_list(request):
+        ...
+
+    articles = cached_queryset(Article.objects.filter(published=True), "published")
+
+    # e.g. from a post_save signal handler
+    invalidate_model(Article)
+"""
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_headers
+
+
+def cache_view(timeout, per_user=False):
+    """
+    Cache whole responses of a view for `timeout` seconds.
+
+    With per_user, responses also vary on the Cookie and Authorization
+    headers so that one user's page is never served to another.
+    """
+    def decorator(view):
+        if per_user:
+            # Vary must be set before cache_page builds the cache key.
+            view = vary_on_headers("Cookie", "Authorization")(view)
+        return cache_page(timeout)(view)
+    return decorator
+
+
+def _generation_key(model):
+    return f"generation:{model._meta.label_lower}"
+
+
+def model_generation(model):
+    """
+    Return the current cache generation of a model.
+
+    A new generation starts from the current time rather than 1, so keys left
+    over from before the generation itself was evicted are never reused.
+    """
+    return cache.get_or_set(_generation_key(model), time.time_ns, timeout=None)
+
+
+def invalidate_model(model):
+    """Invalidate every queryset cached for a model."""
+    try:
+        cache.incr(_generation_key(model))
+    except ValueError:
+        # No generation yet, so nothing is cached for the model.
+        pass
+
+
+def model_cache_key(model, name):
+    return f"qs:{model._meta.label_lower}:{model_generation(model)}:{name}"
+
+
+def cached_queryset(queryset, name, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the results of a queryset as a list, cached under `name`.
+
+    The key is scoped to the queryset's model, so invalidate_model() on that
+    model makes the next call hit the database again.
+    """
+    key = model_cache_key(queryset.model, name)
+    return cache.get_or_set(key, lambda: list(queryset), timeout)
+
+
+def cached(key_prefix, timeout=DEFAULT_TIMEOUT):
+    """
+    Memoize a function in the cache, keyed on its positional arguments.
+
+    Arguments must have stable string representations (ids, slugs, ...).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            key = ":".join([key_prefix, *(str(arg) for arg in args)])
+            return cache.get_or_set(key, lambda: func(*args), timeout)
+        return wrapper
+    return decorator
@@ -0,0 +1,14 @@
+"""
+Callback ingestion: accept bursts of telco callbacks fast, apply them in batches.
+
+    views.py      POST /callbacks/ validates the events, appends them to the
+                  buffer and answers 202 without applying them.
+    buffers.py    the append-only buffer: a Redis stream or a staging table.
+    consumer.py   reads batches from the buffer, drops events applied before
+                  (by idempotency key) and hands the rest to the handlers.
+    handlers.py   what each event type does: subscription events and
+                  delivery reports; register more with @handler.
+
+The models are imported by the app's models.py, so they belong to the app and
+its migrations.
+"""
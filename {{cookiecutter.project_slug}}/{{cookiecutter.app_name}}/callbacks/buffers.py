@@ -0,0 +1,153 @@
+"""
+The append-only buffer between the callback endpoint and the consumer.
+
+The endpoint appends cleaned events and answers; consumers take batches off
+the other end. A buffer implements two methods:
+
+    append(events)            store events, in order, before the response is sent
+    consume(batch_size, apply)
+                              pass up to batch_size of the oldest events to apply()
+                              and remove them once it returns; return how many
+
+CALLBACK_BUFFER picks the buffer:
+{%- if cookiecutter.use_redis == "y" %}
+
+    "redis"     RedisStreamBuffer, the default: appending is one round trip to
+                Redis and never touches the database, so bursts of callbacks
+                do not compete with the consumer for rows and locks.
+    "database"  DatabaseBuffer, a staging table.
+{%- else %}
+
+    "database"  DatabaseBuffer, a staging table, the only one available
+                without Redis.
+{%- endif %}
+
+Consumers may run side by side, and an event may be handed to apply() more
+than once, e.g. when a consumer dies mid-batch. The consumer skips events it
+has applied before by their idempotency key.
+"""
+import functools
+import json
+{%- if cookiecutter.use_redis == "y" %}
+import os
+import socket
+
+import redis
+from django.conf import settings
+{%- else %}
+
+from django.conf import settings
+{%- endif %}
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .models import CallbackEvent
+
+
+class DatabaseBuffer:
+    """
+    Events as rows of the CallbackEvent table, consumed in the order they were appended.
+
+    A batch is locked with SELECT ... FOR UPDATE SKIP LOCKED and deleted in
+    the transaction that applies it, so consumers never share a batch and a
+    failed one stays buffered. SQLite has no row locks; run one consumer there.
+    """
+
+    def append(self, events):
+        CallbackEvent.objects.bulk_create(CallbackEvent(data=json.dumps(event)) for event in events)
+
+    def consume(self, batch_size, apply):
+        with transaction.atomic():
+            rows = list(CallbackEvent.objects.select_for_update(skip_locked=True)
+                        .order_by("pk").values_list("pk", "data")[:batch_size])
+            if not rows:
+                return 0
+            apply([json.loads(data) for _, data in rows])
+            CallbackEvent.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+        return len(rows)
+{%- if cookiecutter.use_redis == "y" %}
+
+
+class RedisStreamBuffer:
+    """
+    Events as entries of the CALLBACK_STREAM Redis stream, read by a consumer group.
+
+    Each consumer reads new entries with XREADGROUP, so consumers never share
+    a batch, and acknowledges and deletes them once they are applied. Entries
+    a consumer read but did not acknowledge within CALLBACK_CLAIM_SECONDS,
+    because it died, are claimed by the next consumer looking for work.
+    """
+
+    group = "consumers"
+
+    def __init__(self, url=None, stream=None):
+        self.redis = redis.Redis.from_url(url or settings.CALLBACK_REDIS_URL)
+        self.stream = stream or settings.CALLBACK_STREAM
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.group_created = False
+
+    def append(self, events):
+        with self.redis.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(self.stream, {"event": json.dumps(event)})
+            pipe.execute()
+
+    def consume(self, batch_size, apply):
+        self.create_group()
+        entries = self.claim_stale(batch_size) or self.read(batch_size)
+        if not entries:
+            return 0
+        with transaction.atomic():
+            apply([json.loads(fields[b"event"]) for _, fields in entries])
+        ids = [entry_id for entry_id, _ in entries]
+        with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xack(self.stream, self.group, *ids)
+            pipe.xdel(self.stream, *ids)
+            pipe.execute()
+        return len(entries)
+
+    def create_group(self):
+        if self.group_created:
+            return
+        try:
+            # From the start of the stream, so events appended before the
+            # first consumer ran are read too.
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        self.group_created = True
+
+    def claim_stale(self, count):
+        min_idle_time = settings.CALLBACK_CLAIM_SECONDS * 1000
+        pending = self.redis.xpending_range(self.stream, self.group, min="-", max="+", count=count)
+        stale = [entry["message_id"] for entry in pending
+                 if entry["time_since_delivered"] >= min_idle_time]
+        if not stale:
+            return []
+        claimed = self.redis.xclaim(self.stream, self.group, self.consumer, min_idle_time, stale)
+        # Entries deleted from the stream in the meantime come back as (None, None).
+        return [entry for entry in claimed if entry[0] is not None]
+
+    def read(self, count):
+        response = self.redis.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=count)
+        return response[0][1] if response else []
+{%- endif %}
+
+
+BUFFERS = {
+    "database": DatabaseBuffer,
+{%- if cookiecutter.use_redis == "y" %}
+    "redis": RedisStreamBuffer,
+{%- endif %}
+}
+
+
+@functools.cache
+def get_buffer():
+    """Return the buffer named by CALLBACK_BUFFER, created once per process."""
+    try:
+        return BUFFERS[settings.CALLBACK_BUFFER]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"CALLBACK_BUFFER must be one of {', '.join(BUFFERS)}.") from None
@@ -0,0 +1,107 @@
+"""
+Applying buffered callbacks in batches.
+
+Every event carries an idempotency key, "<type>:<id>". An event whose key is
+in ProcessedCallback has been applied already and is skipped, whether the
+sender retried it or the buffer handed it out twice; the keys are recorded in
+the transaction that applies the events, so the two cannot disagree. Keys are
+forgotten after CALLBACK_DEDUP_DAYS.
+
+A batch is applied in one transaction, with one handler call per event type.
+If it fails, its events are applied one at a time so that one bad event does
+not hold up the others; events that still fail are logged and dropped.
+{%- if cookiecutter.use_celery == "y" %}
+
+drain() runs in the consume_callbacks Celery task, started every few seconds
+by beat (see CELERY_BEAT_SCHEDULE).
+{%- else %}
+
+drain() runs in the consume_callbacks management command.
+{%- endif %}
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .buffers import get_buffer
+from .handlers import HANDLERS
+from .models import ProcessedCallback
+
+logger = logging.getLogger(__name__)
+
+
+def apply_events(events):
+    """Apply the events not applied before; return how many were applied."""
+    fresh = {}
+    for event in events:
+        fresh.setdefault(event["key"], event)
+    applied = set(ProcessedCallback.objects.filter(key__in=list(fresh)).values_list("key", flat=True))
+    fresh = [event for key, event in fresh.items() if key not in applied]
+    if not fresh:
+        return 0
+
+    try:
+        with transaction.atomic():
+            apply_batch(fresh)
+        return len(fresh)
+    except Exception:
+        logger.warning("Applying %d callbacks failed, retrying them one by one",
+                       len(fresh), exc_info=True)
+
+    count = 0
+    for event in fresh:
+        try:
+            with transaction.atomic():
+                apply_batch([event])
+            count += 1
+        except Exception:
+            logger.exception("Dropping callback %s", event["key"])
+    return count
+
+
+def apply_batch(events):
+    # The unique key makes a concurrent consumer applying the same event fail
+    # here rather than apply it twice.
+    ProcessedCallback.objects.bulk_create(ProcessedCallback(key=event["key"]) for event in events)
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event["type"], []).append(event["data"])
+    for event_type, data in by_type.items():
+        _, apply = HANDLERS[event_type]
+        apply(data)
+
+
+def forget_processed():
+    """Delete idempotency keys older than CALLBACK_DEDUP_DAYS, at most once an hour."""
+    if cache.add("callbacks:forget-processed", True, 3600):
+        cutoff = timezone.now() - timedelta(days=settings.CALLBACK_DEDUP_DAYS)
+        ProcessedCallback.objects.filter(processed_at__lt=cutoff).delete()
+
+
+def consume_batch(buffer=None, batch_size=None):
+    """Apply one batch from the buffer; return the number of events it held."""
+    buffer = buffer or get_buffer()
+    return buffer.consume(batch_size or settings.CALLBACK_BATCH_SIZE, apply_events)
+
+
+def drain(max_seconds=None, **kwargs):
+    """
+    Apply batches until the buffer is empty or max_seconds have passed.
+
+    Return the number of events consumed; keyword arguments go to
+    consume_batch().
+    """
+    forget_processed()
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    consumed = 0
+    while deadline is None or time.monotonic() < deadline:
+        count = consume_batch(**kwargs)
+        if not count:
+            break
+        consumed += count
+    return consumed
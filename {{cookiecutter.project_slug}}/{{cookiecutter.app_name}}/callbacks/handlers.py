@@ -0,0 +1,160 @@
+"""
+Event types and how a batch of each is applied.
+
+A callback is a JSON object with a `type`, an `id` unique per type at the
+sender, and the type's fields:
+
+    {"type": "subscription", "id": "sdp-81723", "msisdn": "255700000001",
+     "service": "news", "action": "subscribe", "price": 100, "period_days": 1}
+
+    {"type": "delivery_report", "id": "dlr-5521", "message_id": "m-1",
+     "msisdn": "255700000001", "status": "DELIVRD", "reported_at": "2024-05-01T10:00:00Z"}
+
+Other fields are ignored. Each type registers a clean function, run by the
+endpoint to reject bad events before they are buffered, and an apply
+function, run by the consumer with a batch of cleaned events in their order
+of arrival:
+
+    @handler("balance", clean=clean_balance_event)
+    def apply_balance_events(events):
+        ...
+"""
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..subscriptions.models import Subscription
+from .models import DeliveryReport
+
+HANDLERS = {}
+
+
+def handler(event_type, clean):
+    """Register the decorated function to apply batches of event_type."""
+    def decorator(apply):
+        HANDLERS[event_type] = (clean, apply)
+        return apply
+    return decorator
+
+
+def clean_event(data):
+    """Validate an event from the sender; return it as buffered, or raise ValidationError."""
+    if not isinstance(data, dict):
+        raise ValidationError("An event must be an object.")
+    event_type = data.get("type")
+    if event_type not in HANDLERS:
+        raise ValidationError(f"type must be one of {', '.join(HANDLERS)}.")
+    if isinstance(data.get("id"), int) and not isinstance(data["id"], bool):
+        data = {**data, "id": str(data["id"])}
+    event_id = string(data, "id", 100)
+    clean, _ = HANDLERS[event_type]
+    return {"key": f"{event_type}:{event_id}", "type": event_type, "data": clean(data)}
+
+
+def string(data, field, max_length):
+    value = data.get(field)
+    if not isinstance(value, str) or not value or len(value) > max_length:
+        raise ValidationError(f"{field} must be a string of 1 to {max_length} characters.")
+    return value
+
+
+def positive_int(data, field, default=None):
+    value = data.get(field, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValidationError(f"{field} must be a positive integer.")
+    return value
+
+
+def clean_subscription_event(data):
+    event = {
+        "msisdn": string(data, "msisdn", 32),
+        "service": string(data, "service", 64),
+        "action": data.get("action"),
+    }
+    if event["action"] == "subscribe":
+        event["price"] = positive_int(data, "price")
+        event["period_days"] = positive_int(data, "period_days", default=1) or 1
+    elif event["action"] != "unsubscribe":
+        raise ValidationError("action must be subscribe or unsubscribe.")
+    return event
+
+
+@handler("subscription", clean=clean_subscription_event)
+def apply_subscription_events(events):
+    """
+    Subscribe and unsubscribe; the last event of a batch for a subscription wins.
+
+    Subscribing again while subscribed only updates the price and period, so
+    it does not move the next charge. A cancelled or suspended subscription
+    is reactivated and charged right away.
+    """
+    latest = {}
+    for event in events:
+        latest[event["msisdn"], event["service"]] = event
+
+    now = timezone.now()
+    for service, msisdns in by_service(latest.values(), "subscribe").items():
+        Subscription.objects.filter(service=service, msisdn__in=msisdns).exclude(
+            status__in=Subscription.RENEWABLE).update(
+            status=Subscription.Status.ACTIVE, next_renewal_at=now, failed_attempts=0)
+    subscribed = [
+        Subscription(msisdn=event["msisdn"], service=event["service"], price=event["price"],
+                     period_days=event["period_days"], status=Subscription.Status.ACTIVE,
+                     paid_until=now, next_renewal_at=now, failed_attempts=0)
+        for event in latest.values() if event["action"] == "subscribe"
+    ]
+    if subscribed and connection.features.supports_update_conflicts_with_target:
+        Subscription.objects.bulk_create(
+            subscribed, update_conflicts=True, unique_fields=["msisdn", "service"],
+            update_fields=["price", "period_days"])
+    else:
+        for subscription in subscribed:
+            Subscription.objects.update_or_create(
+                msisdn=subscription.msisdn, service=subscription.service,
+                defaults={"price": subscription.price, "period_days": subscription.period_days},
+                create_defaults={field: getattr(subscription, field) for field in (
+                    "price", "period_days", "status", "paid_until", "next_renewal_at",
+                    "failed_attempts")})
+
+    for service, msisdns in by_service(latest.values(), "unsubscribe").items():
+        Subscription.objects.filter(service=service, msisdn__in=msisdns).update(
+            status=Subscription.Status.CANCELLED)
+
+
+def by_service(events, action):
+    """Return the msisdns of the events with action, by service."""
+    msisdns = {}
+    for event in events:
+        if event["action"] == action:
+            msisdns.setdefault(event["service"], []).append(event["msisdn"])
+    return msisdns
+
+
+def clean_delivery_report(data):
+    reported_at = data.get("reported_at")
+    if reported_at is None:
+        reported_at = timezone.now()
+    else:
+        try:
+            reported_at = parse_datetime(reported_at) if isinstance(reported_at, str) else None
+        except ValueError:
+            reported_at = None
+        if reported_at is None:
+            raise ValidationError("reported_at must be an ISO 8601 date and time.")
+        if timezone.is_naive(reported_at):
+            reported_at = timezone.make_aware(reported_at)
+    return {
+        "message_id": string(data, "message_id", 255),
+        "msisdn": string(data, "msisdn", 32),
+        "status": string(data, "status", 32),
+        "reported_at": reported_at.isoformat(),
+    }
+
+
+@handler("delivery_report", clean=clean_delivery_report)
+def apply_delivery_reports(events):
+    DeliveryReport.objects.bulk_create(
+        DeliveryReport(message_id=event["message_id"], msisdn=event["msisdn"],
+                       status=event["status"], reported_at=parse_datetime(event["reported_at"]))
+        for event in events)
@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+
+class CallbackEvent(models.Model):
+    """A received event waiting to be applied, when the buffer is the database."""
+
+    # The event as JSON text, exactly as it would sit in the Redis stream.
+    data = models.TextField()
+    received_at = models.DateTimeField(default=timezone.now)
+
+
+class ProcessedCallback(models.Model):
+    """The idempotency key of an applied event, kept for CALLBACK_DEDUP_DAYS."""
+
+    key = models.CharField(max_length=255, unique=True)
+    processed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class DeliveryReport(models.Model):
+    """A telco's report on a message sent to a subscriber."""
+
+    message_id = models.CharField(max_length=255, db_index=True)
+    msisdn = models.CharField(max_length=32)
+    status = models.CharField(max_length=32)
+    # When the telco says it happened; when the callback was received if it does not say.
+    reported_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.message_id} {self.status}"
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..subscriptions.models import Subscription
+from .consumer import apply_events
+from .handlers import clean_event
+from .models import ProcessedCallback
+
+
+def subscription_event(event_id, action="subscribe", msisdn="255700000001", **fields):
+    data = {"type": "subscription", "id": event_id, "msisdn": msisdn, "service": "news",
+            "action": action, **fields}
+    if action == "subscribe":
+        data.setdefault("price", 100)
+    return clean_event(data)
+
+
+class ApplyEventsTests(TestCase):
+    def test_duplicate_keys_are_applied_once(self):
+        event = subscription_event("sub-1")
+
+        self.assertEqual(apply_events([event, event]), 1)
+        self.assertEqual(apply_events([event]), 0)
+        self.assertEqual(ProcessedCallback.objects.count(), 1)
+        self.assertEqual(Subscription.objects.count(), 1)
+
+    def test_bad_event_does_not_hold_up_its_batch(self):
+        good = [subscription_event("sub-1"), subscription_event("sub-2", msisdn="255700000002")]
+        bad = subscription_event("sub-3", msisdn="255700000003")
+        bad["data"]["price"] = None
+
+        with self.assertLogs("{{ cookiecutter.app_name }}.callbacks.consumer") as logs:
+            self.assertEqual(apply_events([good[0], bad, good[1]]), 2)
+
+        self.assertIn("Dropping callback subscription:sub-3", logs.output[-1])
+        self.assertEqual(set(Subscription.objects.values_list("msisdn", flat=True)),
+                         {"255700000001", "255700000002"})
+        self.assertEqual(set(ProcessedCallback.objects.values_list("key", flat=True)),
+                         {"subscription:sub-1", "subscription:sub-2"})
+
+    def test_last_event_of_a_batch_wins(self):
+        apply_events([subscription_event("sub-1"), subscription_event("unsub-1", "unsubscribe")])
+        self.assertFalse(Subscription.objects.exists())
+
+        apply_events([subscription_event("sub-2")])
+        apply_events([subscription_event("sub-3"), subscription_event("unsub-2", "unsubscribe")])
+        self.assertEqual(Subscription.objects.get().status, Subscription.Status.CANCELLED)
+
+
+class SubscriptionEventTests(TestCase):
+    def setUp(self):
+        self.next_renewal_at = timezone.now() + timedelta(days=1)
+        self.subscription = Subscription.objects.create(
+            msisdn="255700000001", service="news", price=100,
+            next_renewal_at=self.next_renewal_at, failed_attempts=2)
+
+    def test_subscribing_again_keeps_the_renewal_schedule(self):
+        apply_events([subscription_event("sub-1", price=200, period_days=7)])
+
+        self.subscription.refresh_from_db()
+        self.assertEqual((self.subscription.price, self.subscription.period_days), (200, 7))
+        self.assertEqual(self.subscription.next_renewal_at, self.next_renewal_at)
+        self.assertEqual(self.subscription.failed_attempts, 2)
+
+    def test_subscribing_again_reactivates_a_cancelled_subscription(self):
+        self.subscription.status = Subscription.Status.CANCELLED
+        self.subscription.save()
+
+        apply_events([subscription_event("sub-1")])
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, Subscription.Status.ACTIVE)
+        self.assertLessEqual(self.subscription.next_renewal_at, timezone.now())
+        self.assertEqual(self.subscription.failed_attempts, 0)
@@ -0,0 +1,62 @@
+import hmac
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .buffers import get_buffer
+from .handlers import clean_event
+
+
+@csrf_exempt
+@require_POST
+def ingest_callbacks(request):
+    """
+    Buffer the callbacks posted as JSON and answer 202 without applying them.
+
+        POST /callbacks/
+        Authorization: Bearer <CALLBACK_TOKEN>
+
+        {"type": "subscription", "id": "sdp-81723", "msisdn": "255700000001", ...}
+
+    The body is one event or a list of up to CALLBACK_MAX_REQUEST_SIZE events;
+    see handlers.py for the types. A single event may leave out its id and
+    send an Idempotency-Key header instead. The whole request is rejected if
+    any event is invalid, and an event is applied once however often it is
+    sent, so a sender can always resend.
+    """
+    if not settings.CALLBACK_TOKEN:
+        return JsonResponse({"error": "CALLBACK_TOKEN is not set."}, status=503)
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization, f"Bearer {settings.CALLBACK_TOKEN}"):
+        return JsonResponse({"error": "Invalid token."}, status=401)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Expected an event or a list of events."}, status=400)
+    if isinstance(payload, dict):
+        if "id" not in payload and "Idempotency-Key" in request.headers:
+            payload["id"] = request.headers["Idempotency-Key"]
+        payload = [payload]
+    if not isinstance(payload, list) or not payload:
+        return JsonResponse({"error": "Expected an event or a list of events."}, status=400)
+    if len(payload) > settings.CALLBACK_MAX_REQUEST_SIZE:
+        return JsonResponse(
+            {"error": f"At most {settings.CALLBACK_MAX_REQUEST_SIZE} events per request."},
+            status=400)
+
+    events, errors = [], {}
+    for index, data in enumerate(payload):
+        try:
+            events.append(clean_event(data))
+        except ValidationError as exc:
+            errors[index] = exc.messages
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+
+    get_buffer().append(events)
+    return JsonResponse({"accepted": len(events)}, status=202)
@@ -0,0 +1,70 @@
+"""
+Liveness and readiness probes for the deploy script and load balancers.
+
+    /healthz/  the process is up and serving requests
+    /readyz/   the database (and cache) can be reached, so traffic can be sent
+
+Both are answered by HealthCheckMiddleware, first in MIDDLEWARE, before host
+validation, HTTPS redirects, sessions and authentication: probes work with
+any Host header and never touch the session store.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+
+LIVENESS_PATH = "/healthz/"
+READINESS_PATH = "/readyz/"
+
+
+def readiness():
+    checks = {}
+    try:
+        connection.ensure_connection()
+        checks["database"] = "ok" if connection.is_usable() else "unusable"
+    except Exception as error:
+        # Only the error type: probes are unauthenticated.
+        checks["database"] = type(error).__name__
+    try:
+        cache.get("readyz")
+        checks["cache"] = "ok"
+    except Exception as error:
+        checks["cache"] = type(error).__name__
+
+    ready = all(result == "ok" for result in checks.values())
+    return JsonResponse({"status": "ok" if ready else "unavailable", "checks": checks},
+                        status=200 if ready else 503)
+
+
+def probe(request):
+    """Return the probe response for request, or None if it is not a probe."""
+    if request.path == LIVENESS_PATH:
+        return JsonResponse({"status": "ok"})
+    if request.path == READINESS_PATH:
+        return readiness()
+    return None
+
+
+class HealthCheckMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI, so ordinary requests do not pay for a
+        # thread switch through this middleware.
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = probe(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        if request.path in (LIVENESS_PATH, READINESS_PATH):
+            return await sync_to_async(probe)(request)
+        return await self.get_response(request)
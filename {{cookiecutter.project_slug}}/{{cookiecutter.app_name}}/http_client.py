@@ -0,0 +1,78 @@
+"""
+Shared async HTTP client for outbound calls from async views.
+
+One httpx.AsyncClient is kept per event loop, so connections to upstream
+services stay open between requests instead of paying for a TCP and TLS
+handshake on every call. Under the uvicorn worker there is one event loop per
+process; the development server runs every async view in its own loop, so
+there each request gets a client of its own. A client is closed when its
+event loop shuts down.
+
+    from .http_client import post_many
+
+    results = await post_many(url, payloads, concurrency=50)
+"""
+import asyncio
+import weakref
+
+import httpx
+from django.conf import settings
+
+# Event loop -> (its client, the async generator that closes the client).
+_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_on_shutdown(loop, client):
+    # Event loops close the async generators still open when they shut down
+    # (asyncio.run(), asgiref and uvicorn all do), which runs this finally.
+    try:
+        yield
+    finally:
+        if _clients.get(loop, (None,))[0] is client:
+            del _clients[loop]
+        await client.aclose()
+
+
+async def _start(closer):
+    await closer.__anext__()
+
+
+def get_client():
+    """Return the client of the running event loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    client, _ = _clients.get(loop, (None, None))
+    if client is None or client.is_closed:
+        max_connections = settings.HTTP_CLIENT_MAX_CONNECTIONS
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=30,
+            ),
+        )
+        closer = _close_on_shutdown(loop, client)
+        # Once started, the loop knows about it; it then waits for shutdown.
+        loop.create_task(_start(closer))
+        _clients[loop] = (client, closer)
+    return client
+
+
+async def post_many(url, payloads, concurrency=50):
+    """
+    POST every payload as JSON to url concurrently.
+
+    At most `concurrency` requests are in flight at once (beyond that they
+    would only queue for one of the pooled connections). Returns one entry per
+    payload, in order: the response status code, or the exception raised.
+    """
+    client = get_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(payload):
+        async with semaphore:
+            response = await client.post(url, json=payload)
+            return response.status_code
+
+    return await asyncio.gather(*(post(payload) for payload in payloads),
+                                return_exceptions=True)
@@ -0,0 +1,159 @@
+"""
+Run the micro-benchmarks in benchmarks/ and compare them with the baseline.
+
+Benchmarks run against a throwaway test database, like the test suite. Each
+one is timed with timeit: enough calls per round to last at least 0.2s, best
+of --repeat rounds. The best round is the least disturbed by other load on the
+machine, which makes it the most stable number to compare.
+
+The baseline holds a calibration time, a fixed pure-Python workload timed
+along with the benchmarks. Baseline times are scaled by how much faster or
+slower the calibration ran on this machine, so a baseline recorded on one CI
+runner stays usable on another. A benchmark slower than its scaled baseline by
+more than --threshold (a fraction) is a regression, and the command fails.
+Without a baseline the command exits with status 3 (NO_BASELINE), as there
+is nothing to compare with; the --output report it still writes can be
+committed as the baseline. Benchmarks missing from an existing baseline are
+reported as new. Generating the project records a first baseline.
+
+    python manage.py benchmark
+    python manage.py benchmark -k orm --repeat 10
+    python manage.py benchmark --save         # record a new baseline
+"""
+import fnmatch
+import json
+import platform
+import timeit
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import load_benchmarks
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+# Exit status without a baseline, told apart from regressions by the CI job.
+NO_BASELINE = 3
+
+
+def calibration_workload():
+    values = {str(i): i * i for i in range(2000)}
+    json.loads(json.dumps(values))
+    sorted(values, key=values.get)
+
+
+def best_time(func, repeat):
+    """Return the best time of one call of func, in seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange(lambda number, elapsed: elapsed)
+    # autorange stops at 0.2s; run every round with the number it found.
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+class Command(BaseCommand):
+    help = "Run the benchmarks in benchmarks/ and fail on regressions against the baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-k", dest="pattern", default="*",
+                            help="only run benchmarks matching this glob, e.g. 'orm_*'")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="timed rounds per benchmark (default: 5)")
+        parser.add_argument("--threshold", type=float, default=0.25,
+                            help="allowed slowdown against the baseline (default: 0.25)")
+        parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                            help="baseline file (default: benchmarks/baseline.json)")
+        parser.add_argument("--save", action="store_true",
+                            help="write the results to the baseline file instead of comparing")
+        parser.add_argument("--output", type=Path,
+                            help="also write the results and comparison to this JSON file")
+
+    def handle(self, *args, **options):
+        benchmarks = {name: entry for name, entry in sorted(load_benchmarks().items())
+                      if fnmatch.fnmatch(name, options["pattern"])}
+        if not benchmarks:
+            raise CommandError(f"No benchmark matches {options['pattern']!r}.")
+
+        results = {"python": platform.python_version(), "results": {}}
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            results["calibration"] = best_time(calibration_workload, options["repeat"])
+            setups = {}
+            for name, (func, setup) in benchmarks.items():
+                if setup is not None and setup not in setups:
+                    setups[setup] = setup()
+                if setup is None:
+                    call = func
+                else:
+                    call = lambda func=func, value=setups[setup]: func(value)
+                results["results"][name] = best_time(call, options["repeat"])
+                self.stdout.write(f"{name:<40} {results['results'][name] * 1000:>10.3f} ms")
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if options["save"]:
+            options["baseline"].write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            return
+
+        baseline = self.load_baseline(options["baseline"])
+        regressions = self.compare(results, baseline, options["baseline"], options["threshold"])
+        if options["output"]:
+            options["output"].write_text(json.dumps(results, indent=2) + "\n")
+        if not baseline:
+            raise CommandError(
+                f"No baseline in {options['baseline']}, so nothing was compared. Record one "
+                f"with `python manage.py benchmark --save`, or commit the --output report "
+                f"of a CI run as the baseline file.", returncode=NO_BASELINE)
+        new = [name for name, entry in results["comparison"].items() if entry["status"] == "new"]
+        if new:
+            self.stdout.write(self.style.WARNING(
+                f"{len(new)} benchmark(s) not in the baseline, not compared: {', '.join(new)}"))
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} benchmark(s) slower than the baseline by more than "
+                f"{options['threshold']:.0%}: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def load_baseline(self, path):
+        """Return the baseline in path, or None if there is none or it is empty."""
+        try:
+            baseline = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        if not baseline.get("calibration") or not baseline.get("results"):
+            return None
+        return baseline
+
+    def compare(self, results, baseline, baseline_path, threshold):
+        """Add the comparison to results and return the names of regressions."""
+        baseline = baseline or {}
+        # How much slower this machine is than the one the baseline came from.
+        scale = 1.0
+        if baseline.get("calibration"):
+            scale = results["calibration"] / baseline["calibration"]
+
+        self.stdout.write(f"\nAgainst {baseline_path} (machine speed factor {scale:.2f}):")
+        self.stdout.write(f"{'benchmark':<40} {'ms':>10} {'baseline':>10} {'change':>8}")
+        comparison = {}
+        regressions = []
+        for name, seconds in results["results"].items():
+            if name not in baseline.get("results", {}):
+                comparison[name] = {"status": "new"}
+                self.stdout.write(f"{name:<40} {seconds * 1000:>10.3f} {'-':>10} {'new':>8}")
+                continue
+            expected = baseline["results"][name] * scale
+            change = seconds / expected - 1
+            status = "regression" if change > threshold else "ok"
+            comparison[name] = {"baseline": expected, "change": change, "status": status}
+            line = f"{name:<40} {seconds * 1000:>10.3f} {expected * 1000:>10.3f} {change:>+8.0%}"
+            if status == "regression":
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        results["comparison"] = comparison
+        return regressions
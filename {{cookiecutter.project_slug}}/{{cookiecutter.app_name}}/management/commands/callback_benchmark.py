@@ -0,0 +1,121 @@
+"""
+Measure callback ingestion and consumption.
+
+Runs against a throwaway test database, like the benchmark command: posts
+--events callbacks to the endpoint through Django's test client, --per-request
+at a time and with a share of --duplicates sent twice, reporting requests per
+second and response times; then drains the buffer and reports events applied
+per second.
+
+    python manage.py callback_benchmark
+    python manage.py callback_benchmark --events 50000 --per-request 100
+    python manage.py callback_benchmark --buffer database --duplicates 0.2
+
+The test client skips the network and the web server, so the response times
+are those of the view, the middleware and the buffer. Half of the events are
+subscription events and half delivery reports.
+{%- if cookiecutter.use_redis == "y" %} With the Redis buffer the
+events go to a stream of their own, deleted afterwards.
+{%- endif %}
+"""
+import json
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from {{ cookiecutter.app_name }}.callbacks.buffers import BUFFERS, get_buffer
+from {{ cookiecutter.app_name }}.callbacks.consumer import drain
+from {{ cookiecutter.app_name }}.callbacks.models import DeliveryReport, ProcessedCallback
+from {{ cookiecutter.app_name }}.subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = "Post callbacks to the endpoint, apply them and report requests/s and events/s."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=20000,
+                            help="distinct events to send (default: 20000)")
+        parser.add_argument("--per-request", type=int, default=1,
+                            help="events per request (default: 1)")
+        parser.add_argument("--duplicates", type=float, default=0.1,
+                            help="share of events sent a second time (default: 0.1)")
+        parser.add_argument("--buffer", choices=list(BUFFERS), default=settings.CALLBACK_BUFFER,
+                            help=f"buffer to use (default: {settings.CALLBACK_BUFFER})")
+        parser.add_argument("--batch-size", type=int, default=settings.CALLBACK_BATCH_SIZE,
+                            help=f"events applied per batch (default: {settings.CALLBACK_BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        if options["per_request"] > settings.CALLBACK_MAX_REQUEST_SIZE:
+            raise CommandError(f"--per-request must be at most {settings.CALLBACK_MAX_REQUEST_SIZE}.")
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        overrides = {"CALLBACK_TOKEN": "benchmark", "CALLBACK_BUFFER": options["buffer"]}
+{%- if cookiecutter.use_redis == "y" %}
+        overrides["CALLBACK_STREAM"] = f"{settings.CALLBACK_STREAM}:benchmark"
+{%- endif %}
+        try:
+            with override_settings(**overrides):
+                get_buffer.cache_clear()
+                try:
+                    self.run(options)
+                finally:
+{%- if cookiecutter.use_redis == "y" %}
+                    if options["buffer"] == "redis":
+                        get_buffer().redis.delete(settings.CALLBACK_STREAM)
+{%- endif %}
+                    get_buffer.cache_clear()
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def run(self, options):
+        count, per_request = options["events"], options["per_request"]
+        events = [self.event(i) for i in range(count)]
+        events += random.sample(events, int(count * options["duplicates"]))
+        random.shuffle(events)
+
+        client = Client()
+        latencies = []
+        start = time.perf_counter()
+        for offset in range(0, len(events), per_request):
+            body = json.dumps(events[offset:offset + per_request])
+            sent = time.perf_counter()
+            response = client.post("/callbacks/", body, content_type="application/json",
+                                   headers={"Authorization": "Bearer benchmark"})
+            latencies.append(time.perf_counter() - sent)
+            if response.status_code != 202:
+                raise CommandError(f"The endpoint answered {response.status_code}: "
+                                   f"{response.content.decode()}")
+        ingested = time.perf_counter()
+
+        consumed = drain(batch_size=options["batch_size"])
+        applied = time.perf_counter()
+
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(f"{len(events)} callbacks ({len(events) - count} duplicates), "
+                          f"{per_request} per request, {options['buffer']} buffer, "
+                          f"batches of {options['batch_size']}")
+        self.stdout.write(f"ingest:  {len(latencies) / (ingested - start):>10.0f} requests/s, "
+                          f"{len(events) / (ingested - start):.0f} events/s")
+        self.stdout.write(f"latency: p50 {quantiles[49] * 1000:.2f} ms, "
+                          f"p95 {quantiles[94] * 1000:.2f} ms, p99 {quantiles[98] * 1000:.2f} ms")
+        self.stdout.write(f"consume: {consumed / (applied - ingested):>10.0f} events/s "
+                          f"({ProcessedCallback.objects.count()} applied, "
+                          f"{Subscription.objects.count()} subscriptions, "
+                          f"{DeliveryReport.objects.count()} delivery reports)")
+
+    def event(self, i):
+        msisdn = f"2557{i // 2:08d}"
+        if i % 2:
+            return {"type": "delivery_report", "id": f"dlr-{i}", "message_id": f"m-{i}",
+                    "msisdn": msisdn, "status": "DELIVRD"}
+        return {"type": "subscription", "id": f"sub-{i}", "msisdn": msisdn,
+                "service": f"service-{i % 20}", "action": "subscribe", "price": 100}
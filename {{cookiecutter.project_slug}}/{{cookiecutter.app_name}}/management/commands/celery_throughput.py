@@ -0,0 +1,78 @@
+"""
+Measure Celery task throughput and queueing latency against running workers.
+
+Sends --tasks noop tasks to --queue and waits for all of them, reporting how
+fast they were sent and completed and how long each one waited between being
+sent and finishing. With --background, long tasks are first sent to another
+queue, which shows whether they hold up the short ones (they should not: each
+queue has its own workers).
+
+    python manage.py celery_throughput --tasks 1000
+    python manage.py celery_throughput --queue high --background 50 --background-seconds 2
+
+Latency is measured against the clock of the worker that ran the task, so run
+it where the workers' clocks agree with this machine's.
+"""
+import statistics
+import time
+
+from celery.exceptions import TimeoutError
+from celery.result import ResultSet
+from django.core.management.base import BaseCommand, CommandError
+
+from {{ cookiecutter.app_name }}.tasks import noop
+
+
+class Command(BaseCommand):
+    help = "Send noop tasks to a Celery queue and report throughput and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=500,
+                            help="tasks to send (default: 500)")
+        parser.add_argument("--queue", default="default",
+                            help="queue to send them to (default: default)")
+        parser.add_argument("--background", type=int, default=0,
+                            help="long tasks to send first (default: 0)")
+        parser.add_argument("--background-queue", default="low",
+                            help="queue for the long tasks (default: low)")
+        parser.add_argument("--background-seconds", type=float, default=1.0,
+                            help="duration of each long task (default: 1.0)")
+        parser.add_argument("--timeout", type=float, default=120,
+                            help="seconds to wait for the tasks (default: 120)")
+
+    def handle(self, *args, **options):
+        if not noop.app.control.ping(timeout=1):
+            raise CommandError("No Celery worker answered; start the workers first.")
+
+        for _ in range(options["background"]):
+            noop.apply_async(args=[options["background_seconds"]],
+                             queue=options["background_queue"])
+
+        start = time.time()
+        sent_at = []
+        results = []
+        for _ in range(options["tasks"]):
+            sent_at.append(time.time())
+            results.append(noop.apply_async(queue=options["queue"]))
+        sent = time.time()
+
+        try:
+            finished_at = ResultSet(results).join(timeout=options["timeout"])
+        except TimeoutError:
+            raise CommandError(
+                f"The tasks did not finish within {options['timeout']}s; is a worker "
+                f"consuming the {options['queue']!r} queue?")
+        done = max(finished_at)
+
+        latencies = sorted(finished - queued for finished, queued in zip(finished_at, sent_at))
+        count = options["tasks"]
+        self.stdout.write(
+            f"{count} tasks on {options['queue']!r}"
+            + (f", behind {options['background']} x {options['background_seconds']}s tasks "
+               f"on {options['background_queue']!r}" if options["background"] else ""))
+        self.stdout.write(f"sent:      {count / (sent - start):>8.0f} tasks/s")
+        self.stdout.write(f"completed: {count / (done - start):>8.0f} tasks/s")
+        self.stdout.write(
+            f"latency:   p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+            f"max {latencies[-1] * 1000:.1f} ms")
@@ -0,0 +1,34 @@
+"""
+Apply buffered callbacks from the command line or as a long-running process.
+
+    python manage.py consume_callbacks            # drain the buffer once
+    python manage.py consume_callbacks --loop
+
+With --loop it keeps polling, for deployments that consume without Celery;
+several can run side by side, except on SQLite with the database buffer.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from {{ cookiecutter.app_name }}.callbacks.consumer import drain
+
+
+class Command(BaseCommand):
+    help = "Apply the callbacks waiting in the buffer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="keep polling for callbacks")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="seconds between polls when idle (default: 1.0)")
+
+    def handle(self, *args, **options):
+        while True:
+            consumed = drain()
+            if consumed:
+                self.stdout.write(f"{consumed} callbacks consumed")
+            if not options["loop"]:
+                break
+            if not consumed:
+                time.sleep(options["interval"])
@@ -0,0 +1,132 @@
+"""
+Check that database connections are reused under concurrent load.
+
+Every worker thread replays Django's request cycle: close_old_connections()
+before and after each request, which is what the request_started and
+request_finished signals do, and one query in between. The query also asks the
+server which session served it, so the report counts real server connections
+whether they come from persistent connections, the psycopg pool or PgBouncer.
+
+With connection reuse working, the number of server sessions stays flat at (at
+most) one per thread from the first round on; with CONN_MAX_AGE = 0 and no
+pool it grows with every request.
+
+    python manage.py db_connection_load --threads 16 --requests 50 --rounds 5
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+
+# Query returning the server-side session id, per database vendor.
+SESSION_QUERIES = {
+    'postgresql': "SELECT pg_backend_pid()",
+    'mysql': "SELECT CONNECTION_ID()",
+    'microsoft': "SELECT @@SPID",
+    'oracle': "SELECT SYS_CONTEXT('USERENV', 'SID') FROM DUAL",
+}
+
+
+class Command(BaseCommand):
+    help = "Run concurrent simulated requests and report how many database connections they used."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16,
+                            help="concurrent worker threads (default: 16)")
+        parser.add_argument("--requests", type=int, default=50,
+                            help="requests per thread in each round (default: 50)")
+        parser.add_argument("--rounds", type=int, default=5,
+                            help="rounds to run (default: 5)")
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        query = SESSION_QUERIES.get(connection.vendor)
+        sessions = set()
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        def simulate_request():
+            close_old_connections()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(query or "SELECT 1")
+                    session = cursor.fetchone()[0]
+            finally:
+                close_old_connections()
+            if query:
+                with lock:
+                    sessions.add(session)
+
+        errors = []
+        # Worker threads live for the whole run, so their connections carry
+        # over between rounds; the main thread joins both barriers to time
+        # each round.
+        round_start = threading.Barrier(threads + 1)
+        round_end = threading.Barrier(threads + 1)
+
+        def worker():
+            try:
+                for _ in range(options["rounds"]):
+                    round_start.wait()
+                    for _ in range(options["requests"]):
+                        simulate_request()
+                    round_end.wait()
+            except threading.BrokenBarrierError:
+                pass
+            except Exception as error:
+                errors.append(error)
+                round_start.abort()
+                round_end.abort()
+            finally:
+                connections.close_all()
+
+        connection_created.connect(count_connection)
+        self.stdout.write(
+            f"{connection.vendor} via {connection.settings_dict['HOST'] or 'local'}, "
+            f"CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}, {threads} threads")
+        self.stdout.write(f"{'round':>5}  {'requests':>8}  {'req/s':>8}  "
+                          f"{'opened':>6}  {'sessions':>8}")
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        total = 0
+        try:
+            for round_number in range(1, options["rounds"] + 1):
+                round_start.wait()
+                start = time.perf_counter()
+                round_end.wait()
+                elapsed = time.perf_counter() - start
+                count = threads * options["requests"]
+                total += count
+                self.stdout.write(
+                    f"{round_number:>5}  {total:>8}  {count / elapsed:>8.0f}  "
+                    f"{len(opened):>6}  {len(sessions) if query else '-':>8}")
+        except threading.BrokenBarrierError:
+            pass
+        finally:
+            # Releases the workers if the main thread stopped early.
+            round_start.abort()
+            round_end.abort()
+            for thread in workers:
+                thread.join()
+            connection_created.disconnect(count_connection)
+
+        if errors:
+            raise CommandError(f"Simulated request failed: {errors[0]}")
+
+        # With a pool, Django sets up a connection for every checkout, so only
+        # the server-side sessions say whether connections were reused. SQLite
+        # has no server, opening its file is cheap either way.
+        used = len(sessions) if query else len(opened)
+        if used > threads and connection.vendor != 'sqlite':
+            raise CommandError(
+                f"{total} requests on {threads} threads used {used} connections: "
+                f"connections are not being reused (check CONN_MAX_AGE or the pool settings).")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} requests on {threads} threads used {used} connections."))
@@ -0,0 +1,47 @@
+"""
+Send due notifications from the command line or as a long-running process.
+
+    python manage.py dispatch_notifications                 # drain every channel once
+    python manage.py dispatch_notifications --channel sms --loop
+
+Without --channel it sends the channels that have a provider configured.
+
+With --loop it keeps polling, for deployments that dispatch without Celery;
+run one process per channel to send channels in parallel.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from {{ cookiecutter.app_name }}.notifications.models import Notification
+from {{ cookiecutter.app_name }}.notifications.pipeline import dispatch_channel
+from {{ cookiecutter.app_name }}.notifications.providers import is_configured
+
+
+class Command(BaseCommand):
+    help = "Send the notifications that are due."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--channel", action="append", choices=Notification.Channel.values,
+                            help="channel to send (repeatable; default: every configured one)")
+        parser.add_argument("--loop", action="store_true",
+                            help="keep polling for due notifications")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="seconds between polls when idle (default: 1.0)")
+
+    def handle(self, *args, **options):
+        channels = options["channel"] or [
+            channel for channel in Notification.Channel.values if is_configured(channel)]
+        if not channels:
+            raise CommandError("No channel has a provider; set NOTIFICATION_<CHANNEL>_BACKEND.")
+        while True:
+            handled = 0
+            for channel in channels:
+                count = dispatch_channel(channel)
+                if count:
+                    self.stdout.write(f"{channel}: {count} notifications handled")
+                handled += count
+            if not options["loop"]:
+                break
+            if not handled:
+                time.sleep(options["interval"])
@@ -0,0 +1,104 @@
+"""
+Measure notification throughput in messages per second.
+
+Runs against a throwaway test database, like the benchmark command: enqueues
+--messages notifications, then sends them with --workers dispatcher threads
+through a FakeProvider without rate limit, so the numbers are those of the
+pipeline and the database, not of a provider.
+{%- if cookiecutter.use_celery == "y" %} No Celery task is started:
+the dispatchers run in this process.
+{%- endif %}
+
+    python manage.py notification_throughput --messages 20000
+    python manage.py notification_throughput --workers 4 --failure-rate 0.05
+
+Several workers need a database with row locks (SKIP LOCKED), not SQLite.
+They are threads of one process, so they show that dispatchers do not get in
+each other's way rather than how throughput grows with worker processes.
+With --failure-rate, failed sends are retried as soon as they fail, so the
+retries are part of the measurement.
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from {{ cookiecutter.app_name }}.notifications.models import Delivery, Notification
+from {{ cookiecutter.app_name }}.notifications.pipeline import (
+    RateLimiter, dispatch_channel, enqueue,
+)
+from {{ cookiecutter.app_name }}.notifications.providers import FakeProvider
+
+
+class Command(BaseCommand):
+    help = "Enqueue and send notifications through a fake provider and report messages/s."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=10000,
+                            help="notifications to send (default: 10000)")
+        parser.add_argument("--channel", default=Notification.Channel.SMS,
+                            choices=Notification.Channel.values)
+        parser.add_argument("--workers", type=int, default=1,
+                            help="dispatcher threads (default: 1)")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="notifications claimed per batch (default: 500)")
+        parser.add_argument("--failure-rate", type=float, default=0.0,
+                            help="share of sends the fake provider fails (default: 0)")
+
+    def handle(self, *args, **options):
+        if options["workers"] > 1 and not connection.features.has_select_for_update_skip_locked:
+            raise CommandError(f"{connection.vendor} cannot run several dispatchers; use --workers 1.")
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            # Retry failed sends immediately instead of after a backoff.
+            with override_settings(NOTIFICATION_RETRY_DELAY=0):
+                self.run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def run(self, options):
+        count, channel = options["messages"], options["channel"]
+        start = time.perf_counter()
+        enqueue(({"channel": channel, "recipient": f"+1555{i:07d}", "body": f"Message {i}"}
+                 for i in range(count)){% if cookiecutter.use_celery == "y" %}, dispatch=False{% endif %})
+        enqueued = time.perf_counter()
+
+        provider = FakeProvider(failure_rate=options["failure_rate"])
+        errors = []
+
+        def worker():
+            try:
+                dispatch_channel(channel, provider=provider, limiter=RateLimiter("benchmark", 0),
+                                 batch_size=options["batch_size"])
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["workers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sent = time.perf_counter()
+        if errors:
+            raise CommandError(f"A dispatcher failed: {errors[0]!r}")
+
+        statuses = dict(Notification.objects.order_by().values_list("status")
+                        .annotate(Count("pk")))
+        self.stdout.write(f"{count} {channel} notifications, {options['workers']} worker(s), "
+                          f"batches of {options['batch_size']}")
+        self.stdout.write(f"enqueue:  {count / (enqueued - start):>10.0f} messages/s")
+        self.stdout.write(f"dispatch: {count / (sent - enqueued):>10.0f} messages/s "
+                          f"({Delivery.objects.count()} deliveries)")
+        self.stdout.write(f"overall:  {count / (sent - start):>10.0f} messages/s")
+        self.stdout.write("status:   " + ", ".join(f"{n} {s}" for s, n in statuses.items()))
@@ -0,0 +1,127 @@
+"""
+Compare the latency of page N across pagination strategies on a large table.
+
+Runs against a throwaway test database, like the benchmark command: creates
+--rows users, then requests pages of a user list endpoint with each strategy
+and reports the median response time of each page over --repeat requests:
+
+    page number   REST framework's PageNumberPagination: COUNT(*) and OFFSET
+    approximate   ApproximateCountPagination: estimated count and OFFSET
+    keyset        KeysetPagination, the default: WHERE pk > cursor
+
+    python manage.py pagination_benchmark
+    python manage.py pagination_benchmark --rows 200000 --pages 1 100 10000 --page-size 50
+
+The keyset column is the time of the request that follows the `next` link of
+page N - 1. Point DB_* at a PostgreSQL server like production's to get
+meaningful numbers: only PostgreSQL estimates counts, and SQLite's test
+database lives in memory.
+"""
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework import generics, serializers
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory
+
+from {{ cookiecutter.app_name }}.pagination import ApproximateCountPagination, KeysetPagination
+
+
+class CountingPagination(PageNumberPagination):
+    page_size_query_param = "page_size"
+
+
+STRATEGIES = {
+    "page number": CountingPagination,
+    "approximate": ApproximateCountPagination,
+    "keyset": KeysetPagination,
+}
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username", "email", "date_joined"]
+
+
+class UserList(generics.ListAPIView):
+    queryset = User.objects.order_by("pk")
+    serializer_class = UserSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    ordering = "pk"
+
+
+class Command(BaseCommand):
+    help = "Request page N of a large list with each pagination strategy and report latencies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000,
+                            help="users in the table (default: 1000000)")
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000],
+                            help="page numbers to request (default: 1 10 100 1000 10000)")
+        parser.add_argument("--page-size", type=int, default=10,
+                            help="rows per page (default: 10)")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="requests per page and strategy (default: 5)")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            self.run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def run(self, options):
+        rows, page_size = options["rows"], options["page_size"]
+        start = time.perf_counter()
+        for offset in range(0, rows, 10_000):
+            User.objects.bulk_create(
+                User(username=f"user{i}", email=f"user{i}@example.com")
+                for i in range(offset, min(offset + 10_000, rows)))
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {User._meta.db_table}")
+        self.stdout.write(f"{rows} users created in {time.perf_counter() - start:.1f}s, "
+                          f"pages of {page_size}, median of {options['repeat']} requests")
+
+        pages = [page for page in options["pages"] if 0 < page <= -(-rows // page_size)]
+        factory = APIRequestFactory()
+        header = f"{'page':>8}" + "".join(f"{name:>14}" for name in STRATEGIES)
+        self.stdout.write(header)
+        for page in pages:
+            line = f"{page:>8}"
+            for name, pagination_class in STRATEGIES.items():
+                url = self.page_url(pagination_class, page, page_size)
+                view = UserList.as_view(pagination_class=pagination_class)
+                timings = []
+                for _ in range(options["repeat"]):
+                    request = factory.get(url)
+                    began = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    timings.append(time.perf_counter() - began)
+                line += f"{statistics.median(timings) * 1000:>11.2f} ms"
+            self.stdout.write(line)
+
+    def page_url(self, pagination_class, page, page_size):
+        url = f"/?page_size={page_size}"
+        if not issubclass(pagination_class, KeysetPagination):
+            return f"{url}&page={page}"
+        if page == 1:
+            return url
+        # Page N is what the `next` link of page N - 1 points to: the rows
+        # after the key of its last row.
+        last_key = User.objects.order_by("pk").values_list("pk", flat=True)[(page - 1) * page_size - 1]
+        paginator = pagination_class()
+        paginator.base_url = url
+        return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(last_key)))
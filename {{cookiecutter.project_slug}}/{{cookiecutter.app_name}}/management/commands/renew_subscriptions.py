@@ -0,0 +1,61 @@
+"""
+Renew the subscriptions that are due.
+
+    python manage.py renew_subscriptions
+    python manage.py renew_subscriptions --chunk-size 500
+{%- if cookiecutter.use_celery == "y" %}
+    python manage.py renew_subscriptions --fan-out    # renew on the Celery workers
+
+Without --fan-out the chunks are renewed one after another in this process;
+with it, one task per chunk is sent to the workers of the `low` queue, as the
+nightly beat schedule does.
+{%- else %}
+
+The chunks are renewed one after another in this process. Run it nightly from
+cron; runs started side by side skip each other's subscriptions.
+{%- endif %}
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from {{ cookiecutter.app_name }}.subscriptions.renewals import plan_chunks, renew_chunk
+{%- if cookiecutter.use_celery == "y" %}
+from {{ cookiecutter.app_name }}.tasks import renew_subscription_chunk
+{%- endif %}
+
+
+class Command(BaseCommand):
+    help = "Charge and renew the subscriptions that are due."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=settings.RENEWAL_CHUNK_SIZE,
+                            help=f"subscriptions per chunk (default: {settings.RENEWAL_CHUNK_SIZE})")
+{%- if cookiecutter.use_celery == "y" %}
+        parser.add_argument("--fan-out", action="store_true",
+                            help="send the chunks to the Celery workers instead")
+{%- endif %}
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now()
+        start = time.perf_counter()
+{%- if cookiecutter.use_celery == "y" %}
+        if options["fan_out"]:
+            chunks = 0
+            for after, upto in plan_chunks(cutoff, options["chunk_size"]):
+                renew_subscription_chunk.delay(after, upto, cutoff.isoformat())
+                chunks += 1
+            self.stdout.write(f"{chunks} chunks sent to the workers.")
+            return
+{%- endif %}
+
+        totals = {"renewed": 0, "grace": 0, "suspended": 0}
+        for after, upto in plan_chunks(cutoff, options["chunk_size"]):
+            for outcome, count in renew_chunk(after, upto, cutoff).items():
+                totals[outcome] += count
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            ", ".join(f"{count} {outcome}" for outcome, count in totals.items())
+            + f" in {elapsed:.1f}s")
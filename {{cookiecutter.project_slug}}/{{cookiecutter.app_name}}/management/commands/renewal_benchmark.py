@@ -0,0 +1,117 @@
+"""
+Measure the renewal engine on a million subscriptions.
+
+Runs against a throwaway test database, like the benchmark command: creates
+--subscriptions due subscriptions with bulk_create, then renews them all with
+--workers threads through a StubGateway, and reports subscriptions per second
+for creating, planning the chunks and renewing them.
+
+    python manage.py renewal_benchmark
+    python manage.py renewal_benchmark --subscriptions 200000 --chunk-size 500
+    python manage.py renewal_benchmark --workers 4 --failure-rate 0.1
+
+Several workers need a database with row locks (SKIP LOCKED), not SQLite.
+They are threads of one process, so they show that chunks renewed side by
+side do not get in each other's way rather than how throughput grows with
+worker processes. Point DB_* at a PostgreSQL server like production's to get
+meaningful numbers; SQLite's test database lives in memory.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from {{ cookiecutter.app_name }}.subscriptions.gateways import StubGateway
+from {{ cookiecutter.app_name }}.subscriptions.models import ChargeAttempt, Subscription
+from {{ cookiecutter.app_name }}.subscriptions.renewals import due, plan_chunks, renew_chunk
+
+
+class Command(BaseCommand):
+    help = "Create and renew subscriptions through a stub gateway and report subscriptions/s."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscriptions", type=int, default=1_000_000,
+                            help="subscriptions to renew (default: 1000000)")
+        parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="subscriptions per chunk (default: 1000)")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="threads renewing chunks (default: 1)")
+        parser.add_argument("--failure-rate", type=float, default=0.0,
+                            help="share of charges the stub gateway declines (default: 0)")
+
+    def handle(self, *args, **options):
+        if options["workers"] > 1 and not connection.features.has_select_for_update_skip_locked:
+            raise CommandError(f"{connection.vendor} cannot renew chunks side by side; use --workers 1.")
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            self.run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def run(self, options):
+        count = options["subscriptions"]
+        now = timezone.now()
+        start = time.perf_counter()
+        for offset in range(0, count, 10_000):
+            Subscription.objects.bulk_create(
+                Subscription(msisdn=f"2557{i:08d}", service=f"service-{i % 20}",
+                             price=100 * (1 + i % 3), period_days=(1, 7, 30)[i % 3],
+                             paid_until=now, next_renewal_at=now - timedelta(minutes=1))
+                for i in range(offset, min(offset + 10_000, count)))
+        created = time.perf_counter()
+
+        cutoff = timezone.now()
+        chunks = queue.SimpleQueue()
+        for chunk in plan_chunks(cutoff, options["chunk_size"]):
+            chunks.put(chunk)
+        planned = time.perf_counter()
+
+        gateway = StubGateway(failure_rate=options["failure_rate"])
+        totals = Counter()
+        lock = threading.Lock()
+        errors = []
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        after, upto = chunks.get_nowait()
+                    except queue.Empty:
+                        return
+                    outcome = renew_chunk(after, upto, cutoff, gateway)
+                    with lock:
+                        totals.update(outcome)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["workers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        renewed = time.perf_counter()
+        if errors:
+            raise CommandError(f"A worker failed: {errors[0]!r}")
+
+        left = due(cutoff).count()
+        self.stdout.write(f"{count} subscriptions, {options['workers']} worker(s), "
+                          f"chunks of {options['chunk_size']}")
+        self.stdout.write(f"create: {count / (created - start):>10.0f} subscriptions/s")
+        self.stdout.write(f"plan:   {count / (planned - created):>10.0f} subscriptions/s")
+        self.stdout.write(f"renew:  {count / (renewed - planned):>10.0f} subscriptions/s "
+                          f"({ChargeAttempt.objects.count()} charge attempts)")
+        self.stdout.write("result: " + ", ".join(f"{n} {outcome}" for outcome, n in totals.items())
+                          + f", {left} still due")
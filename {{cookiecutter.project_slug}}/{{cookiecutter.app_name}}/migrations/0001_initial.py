@@ -0,0 +1,88 @@
+{%- if cookiecutter.project_type != "General" -%}
+# Generated by Django 5.2
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+{%- if cookiecutter.project_type == "Notification" %}
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('sms', 'SMS'), ('email', 'Email'), ('push', 'Push')], max_length=16)),
+                ('recipient', models.CharField(max_length=255)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('idempotency_key', models.CharField(blank=True, max_length=64, null=True, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'channel', 'next_attempt_at'], name='notification_due_idx'), models.Index(fields=['recipient', 'created_at'], name='notification_recipient_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Delivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed')], max_length=16)),
+                ('provider_message_id', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('attempted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='{{ cookiecutter.app_name }}.notification')),
+            ],
+            options={
+                'verbose_name_plural': 'deliveries',
+                'indexes': [models.Index(fields=['provider', 'provider_message_id'], name='delivery_provider_message_idx')],
+            },
+        ),
+{%- elif cookiecutter.project_type == "VAS" %}
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('msisdn', models.CharField(max_length=32)),
+                ('service', models.CharField(max_length=64)),
+                ('price', models.PositiveIntegerField(help_text='In minor currency units, e.g. cents.')),
+                ('period_days', models.PositiveSmallIntegerField(default=1)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('grace', 'In grace period'), ('suspended', 'Suspended'), ('cancelled', 'Cancelled')], default='active', max_length=16)),
+                ('paid_until', models.DateTimeField(default=django.utils.timezone.now)),
+                ('next_renewal_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('failed_attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('msisdn', 'service'), name='subscription_msisdn_service')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChargeAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('succeeded', 'Succeeded'), ('failed', 'Failed')], max_length=16)),
+                ('gateway', models.CharField(max_length=64)),
+                ('reference', models.CharField(max_length=64, unique=True)),
+                ('gateway_reference', models.CharField(blank=True, max_length=255)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('attempted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='charge_attempts', to='{{ cookiecutter.app_name }}.subscription')),
+            ],
+        ),
+{%- endif %}
+    ]
+{%- endif %}
@@ -1,3 +1,11 @@
 from django.db import models
+{%- if cookiecutter.project_type == "Notification" %}
+
+from .notifications.models import Delivery, Notification  # noqa: F401
+{%- elif cookiecutter.project_type == "VAS" %}
+
+from .callbacks.models import CallbackEvent, DeliveryReport, ProcessedCallback  # noqa: F401
+from .subscriptions.models import ChargeAttempt, Subscription  # noqa: F401
+{%- endif %}
 
 # Create your models here.
@@ -0,0 +1,15 @@
+"""
+Notification fan-out: queue messages in bulk, send them in batches per channel.
+
+    enqueue()      bulk-inserts notifications (pipeline.py); the HTTP endpoint
+                   in views.py is a thin wrapper around it.
+    dispatch_*()   claim due notifications of one channel, hand them to the
+                   channel's provider in batches under its rate limit, record
+                   each attempt as a Delivery and schedule retries.
+    providers.py   the provider interface, the settings that pick a provider
+                   per channel (UnconfiguredProvider until one is set),
+                   and FakeProvider for tests and benchmarks.
+
+The models are imported by the app's models.py, so they belong to the app and
+its migrations.
+"""
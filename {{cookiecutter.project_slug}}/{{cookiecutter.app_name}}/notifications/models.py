@@ -0,0 +1,75 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Notification(models.Model):
+    """
+    One message to one recipient on one channel.
+
+    A notification stays `pending` until it is sent or gives up; between
+    attempts next_attempt_at says when it is due. The dispatcher also uses it as
+    a lease: claiming a batch moves next_attempt_at a little into the future, so
+    other dispatchers skip the batch, and a batch whose dispatcher died becomes
+    due again by itself.
+    """
+
+    class Channel(models.TextChoices):
+        SMS = "sms", "SMS"
+        EMAIL = "email", "Email"
+        PUSH = "push", "Push"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    channel = models.CharField(max_length=16, choices=Channel.choices)
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set by the caller to make enqueueing the same message twice harmless.
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dispatcher's query: pending notifications of a channel, due first.
+            models.Index(fields=["status", "channel", "next_attempt_at"],
+                         name="notification_due_idx"),
+            models.Index(fields=["recipient", "created_at"],
+                         name="notification_recipient_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient} ({self.status})"
+
+
+class Delivery(models.Model):
+    """One attempt to hand a notification to its provider."""
+
+    class Status(models.TextChoices):
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE,
+                                     related_name="deliveries")
+    provider = models.CharField(max_length=64)
+    status = models.CharField(max_length=16, choices=Status.choices)
+    provider_message_id = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    attempted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "deliveries"
+        indexes = [
+            # Delivery reports from providers refer to their own message id.
+            models.Index(fields=["provider", "provider_message_id"],
+                         name="delivery_provider_message_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.status} for notification {self.notification_id}"
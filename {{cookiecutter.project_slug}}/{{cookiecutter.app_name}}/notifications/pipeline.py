@@ -0,0 +1,271 @@
+"""
+Queueing and sending notifications.
+
+    from {{ cookiecutter.app_name }}.notifications.pipeline import enqueue
+
+    enqueue({"channel": "sms", "recipient": number, "body": text,
+             "idempotency_key": f"otp:{request_id}"} for number in numbers)
+
+enqueue() only inserts rows. Sending is done by dispatch_channel(), one channel
+at a time: it claims a batch of due notifications, sends them through the
+channel's provider in chunks of at most the provider's max_batch and its rate
+limit, records a Delivery per attempt and updates the notifications with a
+handful of bulk queries. Failed sends are retried with exponential backoff
+until NOTIFICATION_MAX_ATTEMPTS, then the notification is marked failed.
+{%- if cookiecutter.use_celery == "y" %}
+
+dispatch_channel() runs in the dispatch_notifications Celery task, started by
+enqueue() and every few seconds by beat (see CELERY_BEAT_SCHEDULE).
+{%- else %}
+
+dispatch_channel() runs in the dispatch_notifications management command.
+{%- endif %}
+
+Dispatchers can run side by side: claiming locks the batch with SELECT ... FOR
+UPDATE SKIP LOCKED and moves its next_attempt_at NOTIFICATION_CLAIM_SECONDS
+ahead, so each dispatcher gets different rows, and the rows of a dispatcher
+that died become due again after that. Keep NOTIFICATION_CLAIM_SECONDS well
+above the time a batch takes to send at the provider's rate limit. SQLite has
+no row locks; run a single dispatcher there.
+"""
+import logging
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Delivery, Notification
+from .providers import SendResult, get_provider, provider_settings
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_FIELDS = {"channel", "recipient", "subject", "body", "idempotency_key"}
+
+
+def chunked(items, size):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def clean_message(data):
+    """Validate one message from an untrusted source; return it or raise ValidationError."""
+    if not isinstance(data, dict):
+        raise ValidationError("A message must be an object.")
+    unknown = set(data) - MESSAGE_FIELDS
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    if data.get("channel") not in Notification.Channel.values:
+        raise ValidationError(
+            f"channel must be one of {', '.join(Notification.Channel.values)}.")
+    for field in ("recipient", "body"):
+        if not isinstance(data.get(field), str) or not data[field]:
+            raise ValidationError(f"{field} is required.")
+    for field in ("recipient", "subject", "idempotency_key"):
+        if field not in data:
+            continue
+        max_length = Notification._meta.get_field(field).max_length
+        if not isinstance(data[field], str) or len(data[field]) > max_length:
+            raise ValidationError(f"{field} must be a string of at most {max_length} characters.")
+    # The key is unique: every empty one after the first would be skipped as a repeat.
+    if data.get("idempotency_key") == "":
+        raise ValidationError("idempotency_key must not be empty; leave it out instead.")
+    return data
+
+
+def enqueue(messages, batch_size=1000{% if cookiecutter.use_celery == "y" %}, dispatch=True{% endif %}):
+    """
+    Queue notifications; return how many were accepted.
+
+    `messages` is an iterable of dicts of Notification fields: channel,
+    recipient and body, optionally subject, idempotency_key and
+    next_attempt_at (to send later). They are inserted with bulk_create,
+    batch_size rows per query, without calling save() or sending signals.
+    Messages whose idempotency_key is already queued are skipped, but still
+    counted as accepted.
+{%- if cookiecutter.use_celery == "y" %}
+
+    Once the transaction commits, a dispatch task is started for each channel
+    queued to, unless dispatch is False.
+{%- endif %}
+    """
+    accepted = 0
+    channels = set()
+    ignore_conflicts = connection.features.supports_ignore_conflicts
+    for chunk in chunked(messages, batch_size):
+        notifications = [Notification(**message) for message in chunk]
+        if not ignore_conflicts:
+            keys = [n.idempotency_key for n in notifications if n.idempotency_key]
+            existing = set(Notification.objects.filter(idempotency_key__in=keys)
+                           .values_list("idempotency_key", flat=True)) if keys else set()
+            notifications = [n for n in notifications if n.idempotency_key not in existing]
+        Notification.objects.bulk_create(notifications, ignore_conflicts=ignore_conflicts)
+        accepted += len(chunk)
+        channels.update(n.channel for n in notifications)
+{%- if cookiecutter.use_celery == "y" %}
+
+    if dispatch:
+        transaction.on_commit(lambda: start_dispatch(channels))
+{%- endif %}
+    return accepted
+{%- if cookiecutter.use_celery == "y" %}
+
+
+def start_dispatch(channels):
+    """Start dispatching the channels now instead of at the next beat."""
+    from ..tasks import dispatch_notifications
+
+    for channel in channels:
+        # Enqueueing in many small requests should not start a task for each;
+        # one per channel and second is plenty, a running task keeps going
+        # until the channel is drained.
+        if cache.add(f"notifications:dispatch-started:{channel}", 1, timeout=1):
+            dispatch_notifications.delay(channel)
+{%- endif %}
+
+
+class RateLimiter:
+    """
+    Allow at most `rate` sends per second, counted in one-second windows.
+
+    The counts live in the default cache, so the limit is shared by every
+    dispatcher when the cache is Redis, and per process with the local-memory
+    cache. A rate of 0 means no limit.
+    """
+
+    def __init__(self, name, rate):
+        self.name = name
+        self.rate = rate
+
+    @classmethod
+    def for_channel(cls, channel):
+        return cls(f"notifications:rate:{channel}", provider_settings(channel).get("RATE_LIMIT", 0))
+
+    def acquire(self, count):
+        """Wait until `count` sends (at most rate) fit in the current window and take them."""
+        if not self.rate:
+            return
+        while True:
+            window = int(time.time())
+            key = f"{self.name}:{window}"
+            cache.add(key, 0, timeout=5)
+            if cache.incr(key, count) <= self.rate:
+                return
+            cache.decr(key, count)
+            time.sleep(max(window + 1 - time.time(), 0.01))
+
+
+def retry_delay(attempts):
+    """Exponential backoff from NOTIFICATION_RETRY_DELAY, capped at an hour, with jitter."""
+    delay = min(settings.NOTIFICATION_RETRY_DELAY * 2 ** (attempts - 1), 3600)
+    # Spread the retries of a failed batch so they do not all come due at once.
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def claim(channel, batch_size):
+    """Claim up to batch_size due notifications of a channel; return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = (Notification.objects
+               .filter(status=Notification.Status.PENDING, channel=channel,
+                       next_attempt_at__lte=now)
+               .order_by("next_attempt_at"))
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        if batch:
+            Notification.objects.filter(pk__in=[n.pk for n in batch]).update(
+                next_attempt_at=now + timedelta(seconds=settings.NOTIFICATION_CLAIM_SECONDS))
+    return batch
+
+
+def record(batch, results, provider_name):
+    """Store the outcome of sending a batch: deliveries, sent, failed and retries."""
+    now = timezone.now()
+    sent, failed, retries, deliveries = [], [], [], []
+    for notification in batch:
+        result = results.get(notification.pk) or SendResult(
+            notification.pk, False, error="The provider returned no result.")
+        notification.attempts += 1
+        if result.ok:
+            sent.append(notification.pk)
+        elif result.retryable and notification.attempts < settings.NOTIFICATION_MAX_ATTEMPTS:
+            notification.next_attempt_at = now + retry_delay(notification.attempts)
+            retries.append(notification)
+        else:
+            failed.append(notification.pk)
+        deliveries.append(Delivery(
+            notification=notification, provider=provider_name,
+            status=Delivery.Status.SENT if result.ok else Delivery.Status.FAILED,
+            provider_message_id=result.provider_message_id, error=result.error,
+            attempted_at=now))
+
+    # Sent and failed rows all get the same values, one UPDATE each; only
+    # retries differ per row.
+    with transaction.atomic():
+        if sent:
+            Notification.objects.filter(pk__in=sent).update(
+                status=Notification.Status.SENT, sent_at=now, attempts=F("attempts") + 1)
+        if failed:
+            Notification.objects.filter(pk__in=failed).update(
+                status=Notification.Status.FAILED, attempts=F("attempts") + 1)
+        if retries:
+            Notification.objects.bulk_update(retries, ["attempts", "next_attempt_at"])
+        Delivery.objects.bulk_create(deliveries)
+    return len(sent), len(failed), len(retries)
+
+
+def dispatch_batch(channel, provider=None, limiter=None, batch_size=None):
+    """
+    Claim and send one batch of a channel; return the number of notifications claimed.
+
+    The channel's configured provider and rate limit are used unless others
+    are given, e.g. a FakeProvider and RateLimiter(name, 0) in benchmarks.
+    """
+    provider = provider or get_provider(channel)
+    limiter = limiter or RateLimiter.for_channel(channel)
+    batch = claim(channel, batch_size or settings.NOTIFICATION_BATCH_SIZE)
+    if not batch:
+        return 0
+
+    chunk_size = min(provider.max_batch, limiter.rate or provider.max_batch)
+    results = {}
+    for chunk in chunked(batch, chunk_size):
+        limiter.acquire(len(chunk))
+        try:
+            for result in provider.send_batch(chunk):
+                results[result.notification_id] = result
+        except Exception as exc:
+            logger.exception("Provider %s failed to send %d %s notifications",
+                             provider.name, len(chunk), channel)
+            error = f"{type(exc).__name__}: {exc}"
+            for notification in chunk:
+                results[notification.pk] = SendResult(notification.pk, False, error=error)
+
+    sent, failed, retries = record(batch, results, provider.name)
+    logger.debug("%s: %d sent, %d failed, %d to retry", channel, sent, failed, retries)
+    return len(batch)
+
+
+def dispatch_channel(channel, max_seconds=None, **kwargs):
+    """
+    Send batches of a channel until none is due or max_seconds have passed.
+
+    Return the number of notifications handled; keyword arguments go to
+    dispatch_batch().
+    """
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    handled = 0
+    while deadline is None or time.monotonic() < deadline:
+        claimed = dispatch_batch(channel, **kwargs)
+        if not claimed:
+            break
+        handled += claimed
+    return handled
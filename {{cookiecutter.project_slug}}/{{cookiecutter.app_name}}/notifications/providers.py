@@ -0,0 +1,124 @@
+"""
+Providers deliver notifications: an SMS gateway, an email service, a push service.
+
+Each channel gets one provider, configured like CACHES:
+
+    NOTIFICATION_PROVIDERS = {
+        "sms": {
+            "BACKEND": "myapp.sms.GatewayProvider",
+            "OPTIONS": {"api_key": "..."},   # passed to the constructor
+            "RATE_LIMIT": 100,               # messages per second, 0 for none
+        },
+        ...
+    }
+
+A provider subclasses Provider and implements send_batch(). It gets up to
+max_batch notifications at a time, so providers with a bulk API can send them
+in one request, and returns one SendResult per notification. Raising instead
+fails the whole batch, to be retried.
+"""
+import functools
+import random
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class SendResult(NamedTuple):
+    notification_id: int
+    ok: bool
+    provider_message_id: str = ""
+    error: str = ""
+    # False for errors that will not go away, e.g. an invalid phone number.
+    retryable: bool = True
+
+
+class Provider:
+    name = "provider"
+    max_batch = 100
+
+    def __init__(self, **options):
+        self.options = options
+
+    def send_batch(self, notifications):
+        """Send the notifications and return a SendResult for each of them."""
+        raise NotImplementedError
+
+
+class UnconfiguredProvider(Provider):
+    """
+    The generated default: refuses to send until a real provider is configured.
+
+    Dispatching a channel that still uses it raises ImproperlyConfigured, so
+    its notifications stay pending instead of being marked sent.
+    """
+
+    name = "unconfigured"
+
+    def __init__(self, **options):
+        raise ImproperlyConfigured(
+            "No notification provider is configured for this channel. Set "
+            "NOTIFICATION_<CHANNEL>_BACKEND to a Provider subclass, or to "
+            "FakeProvider in development.")
+
+
+class FakeProvider(Provider):
+    """
+    Sends nothing, for tests, benchmarks and development.
+
+    failure_rate makes that share of messages fail (retryably) at random and
+    latency adds a delay per batch, to stand in for a real provider in
+    benchmarks. With record=True the sent messages are kept in `sent`, for
+    tests to inspect; leave it off in long-running processes.
+    """
+
+    name = "fake"
+    max_batch = 500
+
+    def __init__(self, failure_rate=0.0, latency=0.0, record=False, **options):
+        super().__init__(**options)
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.record = record
+        self.sent = []
+
+    def send_batch(self, notifications):
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        for notification in notifications:
+            if self.failure_rate and random.random() < self.failure_rate:
+                results.append(SendResult(notification.pk, False, error="fake failure"))
+            else:
+                if self.record:
+                    self.sent.append((notification.channel, notification.recipient, notification.body))
+                results.append(SendResult(notification.pk, True, f"fake-{notification.pk}"))
+        return results
+
+
+def provider_settings(channel):
+    try:
+        return settings.NOTIFICATION_PROVIDERS[channel]
+    except KeyError:
+        raise ImproperlyConfigured(f"NOTIFICATION_PROVIDERS has no provider for {channel!r}.")
+
+
+def is_configured(channel):
+    """Return whether the channel has a provider other than UnconfiguredProvider."""
+    backend = import_string(provider_settings(channel)["BACKEND"])
+    return not issubclass(backend, UnconfiguredProvider)
+
+
+@functools.cache
+def get_provider(channel):
+    """
+    Return the provider of a channel, created once per process.
+
+    Call get_provider.cache_clear() after changing NOTIFICATION_PROVIDERS,
+    e.g. under override_settings in tests.
+    """
+    config = provider_settings(channel)
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
@@ -0,0 +1,112 @@
+import json
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Delivery, Notification
+from .pipeline import RateLimiter, claim, dispatch_batch, dispatch_channel, enqueue, record
+from .providers import FakeProvider, SendResult, get_provider, is_configured
+
+PROVIDERS = "{{ cookiecutter.app_name }}.notifications.providers"
+
+
+def message(recipient="+15550100", **fields):
+    return {"channel": "sms", "recipient": recipient, "body": "Hello", **fields}
+
+
+class PipelineTests(TestCase):
+    def test_enqueue_skips_a_repeated_idempotency_key(self):
+        self.assertEqual(enqueue([message(idempotency_key="otp:1")]), 1)
+        self.assertEqual(enqueue([message(idempotency_key="otp:1"), message("+15550101")]), 2)
+
+        self.assertEqual(Notification.objects.count(), 2)
+
+    @override_settings(NOTIFICATION_CLAIM_SECONDS=300)
+    def test_claim_leases_the_batch(self):
+        enqueue([message(), message("+15550101")])
+
+        batch = claim("sms", 10)
+
+        self.assertEqual(len(batch), 2)
+        lease = timezone.now() + timedelta(seconds=290)
+        self.assertFalse(Notification.objects.filter(next_attempt_at__lt=lease).exists())
+        self.assertEqual(claim("sms", 10), [])
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=2, NOTIFICATION_RETRY_DELAY=60)
+    def test_record_retries_with_backoff_then_fails(self):
+        enqueue([message()])
+        notification = Notification.objects.get()
+        failure = {notification.pk: SendResult(notification.pk, False, error="busy")}
+
+        self.assertEqual(record([notification], failure, "test"), (0, 0, 1))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts),
+                         (Notification.Status.PENDING, 1))
+        self.assertGreaterEqual(notification.next_attempt_at, timezone.now() + timedelta(seconds=29))
+
+        self.assertEqual(record([notification], failure, "test"), (0, 1, 0))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts),
+                         (Notification.Status.FAILED, 2))
+        self.assertEqual(Delivery.objects.filter(status=Delivery.Status.FAILED).count(), 2)
+
+    def test_dispatch_sends_through_the_provider(self):
+        enqueue([message(), message("+15550101")])
+        provider = FakeProvider(record=True)
+
+        self.assertEqual(dispatch_channel("sms", provider=provider, limiter=RateLimiter("test", 0)), 2)
+
+        self.assertEqual(sorted(provider.sent),
+                         [("sms", "+15550100", "Hello"), ("sms", "+15550101", "Hello")])
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.SENT).count(), 2)
+
+
+@override_settings(NOTIFICATION_PROVIDERS={
+    "sms": {"BACKEND": f"{PROVIDERS}.UnconfiguredProvider", "OPTIONS": {}, "RATE_LIMIT": 0},
+})
+class UnconfiguredProviderTests(TestCase):
+    def setUp(self):
+        get_provider.cache_clear()
+        self.addCleanup(get_provider.cache_clear)
+
+    def test_notifications_stay_pending(self):
+        enqueue([message()])
+        due = Notification.objects.get().next_attempt_at
+
+        self.assertFalse(is_configured("sms"))
+        with self.assertRaises(ImproperlyConfigured):
+            dispatch_batch("sms")
+
+        notification = Notification.objects.get()
+        self.assertEqual((notification.status, notification.attempts, notification.next_attempt_at),
+                         (Notification.Status.PENDING, 0, due))
+
+
+@override_settings(NOTIFICATION_API_TOKEN="secret")
+class EnqueueViewTests(TestCase):
+    def post(self, body, token="secret"):
+        return self.client.post("/notifications/", json.dumps(body), content_type="application/json",
+                                headers={"Authorization": f"Bearer {token}"})
+
+    def test_rejects_a_wrong_token(self):
+        response = self.post({"notifications": [message()]}, token="wrong")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_rejects_the_request_when_a_message_is_invalid(self):
+        response = self.post({"notifications": [
+            message(), message(channel="fax"), message(idempotency_key="")]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"1", "2"})
+        self.assertFalse(Notification.objects.exists())
+
+    def test_queues_the_notifications(self):
+        response = self.post({"notifications": [message(), message("+15550101")]})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"queued": 2})
+        self.assertEqual(Notification.objects.count(), 2)
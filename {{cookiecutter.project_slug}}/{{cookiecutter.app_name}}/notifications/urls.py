@@ -0,0 +1,7 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('', views.enqueue_notifications, name='enqueue-notifications'),
+]
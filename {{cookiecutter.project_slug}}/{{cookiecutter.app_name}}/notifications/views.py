@@ -0,0 +1,54 @@
+import hmac
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .pipeline import clean_message, enqueue
+
+
+@csrf_exempt
+@require_POST
+def enqueue_notifications(request):
+    """
+    Queue the notifications posted as JSON and answer 202 without sending them.
+
+        POST /notifications/
+        Authorization: Bearer <NOTIFICATION_API_TOKEN>
+
+        {"notifications": [{"channel": "sms", "recipient": "+15550100", "body": "..."}]}
+
+    The whole request is rejected if any message is invalid, so a client can
+    safely resend it; give messages an idempotency_key to make resending
+    accepted requests safe too.
+    """
+    if not settings.NOTIFICATION_API_TOKEN:
+        return JsonResponse({"error": "NOTIFICATION_API_TOKEN is not set."}, status=503)
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization, f"Bearer {settings.NOTIFICATION_API_TOKEN}"):
+        return JsonResponse({"error": "Invalid token."}, status=401)
+
+    try:
+        messages = json.loads(request.body)["notifications"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": 'Expected {"notifications": [...]}.'}, status=400)
+    if not isinstance(messages, list) or not messages:
+        return JsonResponse({"error": "notifications must be a non-empty list."}, status=400)
+    if len(messages) > settings.NOTIFICATION_MAX_REQUEST_SIZE:
+        return JsonResponse(
+            {"error": f"At most {settings.NOTIFICATION_MAX_REQUEST_SIZE} notifications per request."},
+            status=400)
+
+    errors = {}
+    for index, message in enumerate(messages):
+        try:
+            clean_message(message)
+        except ValidationError as exc:
+            errors[index] = exc.messages
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+
+    return JsonResponse({"queued": enqueue(messages)}, status=202)
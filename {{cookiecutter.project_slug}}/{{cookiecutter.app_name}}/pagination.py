@@ -0,0 +1,126 @@
+"""
+REST framework pagination that stays fast on large tables.
+
+KeysetPagination, the default, pages with a cursor: a page is "the next
+PAGE_SIZE rows after this key", answered from the index on the ordering
+field, without COUNT(*) and without an OFFSET scan, so page 10000 is as fast
+as page 1. Order by an indexed field that does not change once set, the
+primary key by default:
+
+    class ArticleList(generics.ListAPIView):
+        queryset = Article.objects.all()
+        ordering = "-published_at"      # needs an index on published_at
+
+Cursor pages have next and previous links but no total and no page numbers.
+Endpoints that must show a total use ApproximateCountPagination instead:
+
+    class ArticleList(generics.ListAPIView):
+        pagination_class = ApproximateCountPagination
+
+Clients choose the page size with ?page_size=, up to API_MAX_PAGE_SIZE.
+`python manage.py pagination_benchmark` compares the strategies.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on the view's `ordering`, newest primary key first by default.
+
+    The view's OrderingFilter, if it has one, still takes precedence, as with
+    CursorPagination. The cursor holds the value of a single field, so
+    `ordering` must name exactly one, on the model itself.
+    """
+
+    ordering = "-pk"
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "ordering", None)
+        filters = getattr(view, "filter_backends", [])
+        if not ordering or any(issubclass(backend, OrderingFilter) for backend in filters):
+            return super().get_ordering(request, queryset, view)
+
+        assert isinstance(ordering, (str, list, tuple)), (
+            f"Invalid ordering. Expected string or tuple, but got {type(ordering).__name__}"
+        )
+        ordering = (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        assert len(ordering) == 1, (
+            f"Keyset pagination orders by a single field, but {type(view).__name__} "
+            f"declares ordering = {ordering!r}."
+        )
+        assert "__" not in ordering[0], (
+            "Cursor pagination does not support double underscore lookups "
+            "for orderings. Orderings should be an unchanging, unique or "
+            'nearly-unique field on the model, such as "-created" or "pk".'
+        )
+        return ordering
+
+
+def estimate_count(queryset):
+    """
+    Return the query planner's estimate of the queryset's row count, or None.
+
+    Only PostgreSQL is asked (EXPLAIN, which does not run the query); its
+    estimate is as fresh as the table's statistics, i.e. the last ANALYZE or
+    autovacuum.
+    """
+    if not hasattr(queryset, "query"):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):  # Not every driver decodes the json column.
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class ApproximateCountPaginator(Paginator):
+    """A Paginator that counts exactly only up to API_EXACT_COUNT_THRESHOLD rows."""
+
+    approximate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.API_EXACT_COUNT_THRESHOLD:
+            return super().count
+        self.approximate = True
+        return estimate
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """
+    Page number pagination with a cheap total for large results.
+
+    The total comes from the query planner's estimate on PostgreSQL once it
+    reaches API_EXACT_COUNT_THRESHOLD, and the response says so with
+    "count_is_approximate". Pages are still fetched with OFFSET, so deep pages
+    stay slow; page counts near the end are estimates too.
+    """
+
+    django_paginator_class = ApproximateCountPaginator
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["count_is_approximate"] = self.page.paginator.approximate
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_is_approximate"] = {"type": "boolean"}
+        return schema
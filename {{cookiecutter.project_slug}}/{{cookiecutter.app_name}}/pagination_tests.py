@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TestCase, override_settings
+from rest_framework import generics, serializers
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory
+
+from . import pagination
+from .pagination import ApproximateCountPagination, ApproximateCountPaginator, KeysetPagination
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username"]
+
+
+class UserList(generics.ListAPIView):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    ordering = None
+
+
+class PaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f"user{i}") for i in range(5))
+        cls.pks = sorted(User.objects.values_list("pk", flat=True))
+
+    def get(self, url="/", **initkwargs):
+        response = UserList.as_view(**initkwargs)(APIRequestFactory().get(url))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+
+class KeysetPaginationTests(PaginationTestCase):
+    def test_newest_first_by_default(self):
+        page = self.get("/?page_size=2")
+
+        self.assertEqual([user["id"] for user in page["results"]], self.pks[:-3:-1])
+        self.assertNotIn("count", page)
+
+    def test_next_link_continues_after_the_last_key(self):
+        first = self.get("/?page_size=2", ordering="pk")
+        second = self.get(first["next"], ordering="pk")
+
+        self.assertEqual([user["id"] for user in second["results"]], self.pks[2:4])
+        self.assertIsNotNone(second["previous"])
+
+    def test_view_ordering_must_be_a_single_field(self):
+        for ordering in (("pk", "username"), "groups__name", ["-groups__name"]):
+            with self.subTest(ordering=ordering), self.assertRaises(AssertionError):
+                self.get(ordering=ordering)
+
+
+@override_settings(API_EXACT_COUNT_THRESHOLD=100)
+class ApproximateCountPaginatorTests(PaginationTestCase):
+    def paginator(self):
+        return ApproximateCountPaginator(User.objects.order_by("pk"), 2)
+
+    def test_counts_exactly_below_the_threshold(self):
+        with mock.patch.object(pagination, "estimate_count", return_value=99):
+            paginator = self.paginator()
+
+            self.assertEqual((paginator.count, paginator.approximate), (5, False))
+
+    def test_uses_the_estimate_from_the_threshold(self):
+        with mock.patch.object(pagination, "estimate_count", return_value=100):
+            paginator = self.paginator()
+
+            self.assertEqual((paginator.count, paginator.approximate), (100, True))
+
+    @override_settings(API_EXACT_COUNT_THRESHOLD=0)
+    def test_counts_exactly_without_postgresql(self):
+        with mock.patch.object(connections[User.objects.db], "vendor", "sqlite"):
+            paginator = self.paginator()
+
+            self.assertIsNone(pagination.estimate_count(paginator.object_list))
+            self.assertEqual((paginator.count, paginator.approximate), (5, False))
+
+    def test_response_flags_an_approximate_count(self):
+        with mock.patch.object(pagination, "estimate_count", return_value=1000):
+            page = self.get("/?page_size=2", pagination_class=ApproximateCountPagination,
+                            queryset=User.objects.order_by("pk"))
+
+        self.assertEqual((page["count"], page["count_is_approximate"]), (1000, True))
+        self.assertEqual(len(page["results"]), 2)
@@ -0,0 +1,243 @@
+"""
+Request profiling for production: wall time, database queries and cache hits.
+
+ProfilingMiddleware is listed in MIDDLEWARE but removes itself at startup
+(MiddlewareNotUsed) unless PROFILING_ENABLED is set, so it costs nothing when
+off. When on:
+
+- every request's wall time goes to the request duration histogram;
+- a sample of requests (PROFILING_SAMPLE_RATE) is profiled in detail: the
+  number and time of database queries, cache hits and misses, queries slower
+  than PROFILING_SLOW_QUERY_MS, and N+1 patterns, i.e. the same SQL run
+  PROFILING_N_PLUS_ONE_THRESHOLD times or more in one request;
+- each profiled request is logged as one JSON line on the
+  "{{ cookiecutter.app_name }}.profiling" logger (at WARNING when it shows an
+  N+1 pattern), and the numbers are exported at /metrics in the Prometheus
+  text format.
+
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+"""
+import hmac
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter as MetricCounter,
+    Histogram, generate_latest, multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# Profile of the request being handled, if it was sampled. Cache calls made
+# from async code see it too, as contextvars follow sync_to_async/async_to_sync.
+current_profile = ContextVar("current_profile", default=None)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request wall time.",
+    ["method", "route", "status"])
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries per profiled request.",
+    ["route"], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500))
+REQUEST_QUERY_SECONDS = Histogram(
+    "http_request_db_seconds", "Database time per profiled request.", ["route"])
+CACHE_LOOKUPS = MetricCounter(
+    "http_request_cache_lookups", "Cache lookups of profiled requests.",
+    ["route", "result"])
+SLOW_QUERIES = MetricCounter(
+    "db_slow_queries", "Queries slower than PROFILING_SLOW_QUERY_MS.", ["route"])
+N_PLUS_ONE = MetricCounter(
+    "http_request_n_plus_one", "Profiled requests showing an N+1 pattern.", ["route"])
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = Counter()
+        self.query_seconds = 0.0
+        self.slow_queries = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Depth of nested cache calls: some backends implement get() with
+        # get_many() (or the reverse), which must be counted once.
+        self.cache_depth = 0
+
+    def record_query(self, sql, seconds):
+        self.queries[sql] += 1
+        self.query_seconds += seconds
+        if seconds * 1000 >= settings.PROFILING_SLOW_QUERY_MS:
+            self.slow_queries.append((sql, seconds))
+
+    def n_plus_one(self):
+        threshold = settings.PROFILING_N_PLUS_ONE_THRESHOLD
+        return [(sql, count) for sql, count in self.queries.most_common()
+                if count >= threshold]
+
+
+def query_recorder(execute, sql, params, many, context):
+    """Database execute wrapper timing every query of a profiled request."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile = current_profile.get()
+        if profile is not None:
+            # The SQL still holds its placeholders, so repeats of one query
+            # with different parameters share an entry.
+            profile.record_query(sql, time.perf_counter() - start)
+
+
+def _count_lookups(method, count):
+    def wrapper(self, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return method(self, *args, **kwargs)
+        profile.cache_depth += 1
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            profile.cache_depth -= 1
+        if profile.cache_depth == 0:
+            hits, misses = count(args, kwargs, result)
+            profile.cache_hits += hits
+            profile.cache_misses += misses
+        return result
+    wrapper.profiled = True
+    return wrapper
+
+
+def _get_result(args, kwargs, value):
+    default = args[1] if len(args) > 1 else kwargs.get("default")
+    return (0, 1) if value is default else (1, 0)
+
+
+def _get_many_result(args, kwargs, values):
+    keys = args[0] if args else kwargs["keys"]
+    return len(values), len(keys) - len(values)
+
+
+def instrument_caches():
+    """
+    Count the hits and misses of the configured cache backends.
+
+    Django sends no signal for cache lookups, so get() and get_many() of each
+    backend class are wrapped once per process. Outside a profiled request the
+    wrappers only read a contextvar.
+    """
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        for name, count in (("get", _get_result), ("get_many", _get_many_result)):
+            method = getattr(backend, name)
+            if not getattr(method, "profiled", False):
+                setattr(backend, name, _count_lookups(method, count))
+
+
+def route_of(request):
+    match = request.resolver_match
+    return match.route if match else "<unmatched>"
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests; see the module docstring.
+
+    Sync only on purpose: query wrappers are installed on the connections of
+    the thread running the request, which under ASGI is the thread Django
+    runs the request's ORM calls in.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument_caches()
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            self.observe(request, response, time.perf_counter() - start)
+            return response
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_recorder))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        duration = time.perf_counter() - start
+        self.observe(request, response, duration)
+        self.report(request, response, duration, profile)
+        return response
+
+    def observe(self, request, response, duration):
+        REQUEST_SECONDS.labels(request.method, route_of(request),
+                               response.status_code).observe(duration)
+
+    def report(self, request, response, duration, profile):
+        route = route_of(request)
+        query_count = sum(profile.queries.values())
+        n_plus_one = profile.n_plus_one()
+
+        REQUEST_QUERIES.labels(route).observe(query_count)
+        REQUEST_QUERY_SECONDS.labels(route).observe(profile.query_seconds)
+        CACHE_LOOKUPS.labels(route, "hit").inc(profile.cache_hits)
+        CACHE_LOOKUPS.labels(route, "miss").inc(profile.cache_misses)
+        if profile.slow_queries:
+            SLOW_QUERIES.labels(route).inc(len(profile.slow_queries))
+        if n_plus_one:
+            N_PLUS_ONE.labels(route).inc()
+
+        record = {
+            "event": "request_profile",
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "db_queries": query_count,
+            "db_ms": round(profile.query_seconds * 1000, 2),
+            "cache_hits": profile.cache_hits,
+            "cache_misses": profile.cache_misses,
+        }
+        if profile.slow_queries:
+            record["slow_queries"] = [
+                {"sql": sql[:1000], "ms": round(seconds * 1000, 2)}
+                for sql, seconds in profile.slow_queries]
+        if n_plus_one:
+            record["n_plus_one"] = [
+                {"sql": sql[:1000], "count": count} for sql, count in n_plus_one]
+        logger.log(logging.WARNING if n_plus_one else logging.INFO,
+                   json.dumps(record))
+
+
+def metrics(request):
+    """Export the profiling metrics in the Prometheus text format."""
+    if not settings.PROFILING_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            return HttpResponse(status=401)
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Every gunicorn worker writes its metrics to that directory (see
+        # gunicorn.conf.py); report all of them, whichever worker answers.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
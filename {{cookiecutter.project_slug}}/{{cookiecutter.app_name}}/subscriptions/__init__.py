@@ -0,0 +1,13 @@
+"""
+Subscription renewal and billing.
+
+    models.py     Subscription and ChargeAttempt.
+    gateways.py   the billing gateway interface, the setting that picks the
+                  gateway, and StubGateway for tests and benchmarks.
+    renewals.py   the renewal engine: split the due subscriptions into keyset
+                  chunks, charge each chunk through the gateway and record the
+                  results in bulk.
+
+The models are imported by the app's models.py, so they belong to the app and
+its migrations.
+"""
@@ -0,0 +1,108 @@
+"""
+Billing gateways charge subscribers: an operator's charging API, a payment provider.
+
+The gateway is configured like a cache backend:
+
+    BILLING_GATEWAY = {
+        "BACKEND": "myapp.billing.OperatorGateway",
+        "OPTIONS": {"url": "...", "api_key": "..."},   # passed to the constructor
+    }
+
+A gateway subclasses BillingGateway and implements charge(), or
+charge_batch() when the gateway has a bulk API or the charges should be sent
+concurrently. charge_batch() gets up to max_batch charges and returns one
+ChargeResult per charge; raising fails the whole batch, to be retried.
+
+Every charge carries a reference that stays the same until the charge's
+outcome is recorded. Gateways must treat it as an idempotency key (see
+BillingGateway), because charges are sent before their outcome is committed:
+a renewal rolled back after charging, or cut short by a crash, is repeated
+by the next run with the same references.
+"""
+import functools
+import random
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ChargeRequest(NamedTuple):
+    reference: str
+    msisdn: str
+    amount: int
+
+
+class ChargeResult(NamedTuple):
+    reference: str
+    ok: bool
+    gateway_reference: str = ""
+    error: str = ""
+    # False for failures that will not go away, e.g. an unknown subscriber.
+    retryable: bool = True
+
+
+class BillingGateway:
+    """
+    The interface of billing gateways.
+
+    A charge whose reference was charged before must not charge the
+    subscriber again, but return the outcome of the first charge. Pass the
+    reference as the idempotency key of APIs that take one; for APIs that do
+    not, look it up in the gateway's own records of charges first.
+    """
+
+    name = "gateway"
+    max_batch = 100
+
+    def __init__(self, **options):
+        self.options = options
+
+    def charge(self, request):
+        """Charge one subscriber and return a ChargeResult."""
+        raise NotImplementedError
+
+    def charge_batch(self, requests):
+        """Charge the requests and return a ChargeResult for each of them."""
+        return [self.charge(request) for request in requests]
+
+
+class StubGateway(BillingGateway):
+    """
+    Approves every charge without charging anyone, for tests and development.
+
+    failure_rate declines that share of charges at random (as if for an
+    insufficient balance) and latency adds a delay per batch, to stand in for
+    a real gateway in benchmarks.
+    """
+
+    name = "stub"
+    max_batch = 1000
+
+    def __init__(self, failure_rate=0.0, latency=0.0, **options):
+        super().__init__(**options)
+        self.failure_rate = failure_rate
+        self.latency = latency
+
+    def charge_batch(self, requests):
+        if self.latency:
+            time.sleep(self.latency)
+        return [
+            ChargeResult(request.reference, False, error="insufficient balance")
+            if self.failure_rate and random.random() < self.failure_rate
+            else ChargeResult(request.reference, True, f"stub-{request.reference}")
+            for request in requests
+        ]
+
+
+@functools.cache
+def get_gateway():
+    """
+    Return the billing gateway, created once per process.
+
+    Call get_gateway.cache_clear() after changing BILLING_GATEWAY, e.g. under
+    override_settings in tests.
+    """
+    config = settings.BILLING_GATEWAY
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
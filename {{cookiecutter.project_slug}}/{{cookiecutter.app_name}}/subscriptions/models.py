@@ -0,0 +1,64 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Subscription(models.Model):
+    """
+    A subscriber's subscription to a service, renewed every period_days.
+
+    Renewal charges `price` when next_renewal_at is reached. A failed charge
+    puts the subscription in its grace period and retries it later; after
+    RENEWAL_MAX_FAILED_ATTEMPTS failures in a row it is suspended.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = "active", "Active"
+        GRACE = "grace", "In grace period"
+        SUSPENDED = "suspended", "Suspended"
+        CANCELLED = "cancelled", "Cancelled"
+
+    # Statuses the renewal engine charges.
+    RENEWABLE = [Status.ACTIVE, Status.GRACE]
+
+    msisdn = models.CharField(max_length=32)
+    service = models.CharField(max_length=64)
+    price = models.PositiveIntegerField(help_text="In minor currency units, e.g. cents.")
+    period_days = models.PositiveSmallIntegerField(default=1)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.ACTIVE)
+    paid_until = models.DateTimeField(default=timezone.now)
+    next_renewal_at = models.DateTimeField(default=timezone.now)
+    failed_attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["msisdn", "service"], name="subscription_msisdn_service"),
+        ]
+        # Deliberately no index on (status, next_renewal_at): renewal walks the
+        # primary key, and such an index tempts the query planner into sorting
+        # every due subscription again for each chunk.
+
+    def __str__(self):
+        return f"{self.msisdn} on {self.service} ({self.status})"
+
+
+class ChargeAttempt(models.Model):
+    """One charge sent to the billing gateway for a renewal."""
+
+    class Status(models.TextChoices):
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE,
+                                     related_name="charge_attempts")
+    amount = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=Status.choices)
+    gateway = models.CharField(max_length=64)
+    # Sent with the charge so that the gateway can recognise a repeated one.
+    reference = models.CharField(max_length=64, unique=True)
+    gateway_reference = models.CharField(max_length=255, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    attempted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.reference} {self.status}"
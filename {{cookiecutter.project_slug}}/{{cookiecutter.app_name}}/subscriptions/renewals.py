@@ -0,0 +1,176 @@
+"""
+The renewal engine.
+
+A renewal run takes a cutoff time and renews every active or grace-period
+subscription with next_renewal_at up to it:
+
+    cutoff = timezone.now()
+    for after, upto in plan_chunks(cutoff):
+        renew_chunk(after, upto, cutoff)
+
+plan_chunks() walks the due subscriptions in primary key order and yields
+keyset ranges of RENEWAL_CHUNK_SIZE subscriptions, one cheap query per
+chunk, without loading the subscriptions. renew_chunk() then renews one
+range in a single transaction: it locks the range's due subscriptions with
+SELECT ... FOR UPDATE SKIP LOCKED, charges them through the billing gateway
+in batches of its max_batch, and records the outcome with one UPDATE per
+billing period for the renewed ones, a bulk_update for the failed ones and a
+bulk_create of the charge attempts.
+{%- if cookiecutter.use_celery == "y" %}
+
+The renew_subscriptions Celery task plans the chunks and sends one
+renew_subscription_chunk task per chunk to the `low` queue, so the chunks are
+renewed in parallel by all of that queue's workers.
+{%- endif %}
+
+Chunks can run in any order and side by side; a subscription locked by one
+is skipped by the others, and a chunk that fails is rolled back as a whole
+and renewed by the next run. Charges are sent while the chunk's transaction
+is open, so keep chunks small enough to be charged in a few seconds. A chunk
+rolled back after charging leaves its subscriptions as they were, so the
+next run charges them with the same references, and the gateway, which must
+honour references as idempotency keys, does not charge them twice.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .gateways import ChargeRequest, ChargeResult, get_gateway
+from .models import ChargeAttempt, Subscription
+
+logger = logging.getLogger(__name__)
+
+
+def chunked(items, size):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def due(cutoff):
+    """Subscriptions to renew in a run with this cutoff."""
+    return Subscription.objects.filter(status__in=Subscription.RENEWABLE,
+                                       next_renewal_at__lte=cutoff)
+
+
+def plan_chunks(cutoff, chunk_size=None):
+    """
+    Yield (after, upto) primary key ranges of chunk_size due subscriptions.
+
+    A range holds the subscriptions with after < pk <= upto; upto is None
+    for the last one. Each step reads the primary key chunk_size rows past
+    the previous boundary, so planning never loads the subscriptions.
+    """
+    chunk_size = chunk_size or settings.RENEWAL_CHUNK_SIZE
+    after = 0
+    while True:
+        boundary = (due(cutoff).filter(pk__gt=after).order_by("pk")
+                    .values_list("pk", flat=True)[chunk_size - 1:chunk_size])
+        upto = next(iter(boundary), None)
+        if upto is None:
+            if due(cutoff).filter(pk__gt=after).exists():
+                yield after, None
+            return
+        yield after, upto
+        after = upto
+
+
+def charge_reference(subscription):
+    """
+    Identify one charge of a subscription.
+
+    It stays the same until the outcome is recorded, which changes
+    next_renewal_at or failed_attempts.
+    """
+    return (f"{subscription.pk}-{subscription.next_renewal_at:%Y%m%d%H%M%S}"
+            f"-{subscription.failed_attempts}")
+
+
+def renew_chunk(after, upto, cutoff, gateway=None):
+    """
+    Renew the due subscriptions with after < pk <= upto; return a Counter of outcomes.
+
+    Outcomes are `renewed`, `grace` (charge failed, retried after
+    RENEWAL_RETRY_INTERVAL seconds) and `suspended`.
+    """
+    gateway = gateway or get_gateway()
+    outcome = Counter()
+    with transaction.atomic():
+        chunk = due(cutoff).filter(pk__gt=after).order_by("pk")
+        if upto is not None:
+            chunk = chunk.filter(pk__lte=upto)
+        if connection.features.has_select_for_update_skip_locked:
+            chunk = chunk.select_for_update(skip_locked=True)
+        subscriptions = list(chunk)
+        if not subscriptions:
+            return outcome
+
+        requests = [ChargeRequest(charge_reference(s), s.msisdn, s.price) for s in subscriptions]
+        results = {}
+        for batch in chunked(requests, gateway.max_batch):
+            try:
+                for result in gateway.charge_batch(batch):
+                    results[result.reference] = result
+            except Exception as exc:
+                logger.exception("Gateway %s failed to charge %d subscriptions",
+                                 gateway.name, len(batch))
+                error = f"{type(exc).__name__}: {exc}"
+                for request in batch:
+                    results[request.reference] = ChargeResult(request.reference, False, error=error)
+
+        now = timezone.now()
+        renewed = {}
+        failed = []
+        attempts = []
+        for subscription, request in zip(subscriptions, requests):
+            result = results.get(request.reference) or ChargeResult(
+                request.reference, False, error="The gateway returned no result.")
+            if result.ok:
+                renewed.setdefault(subscription.period_days, []).append(subscription.pk)
+                outcome["renewed"] += 1
+            else:
+                subscription.failed_attempts += 1
+                if (not result.retryable
+                        or subscription.failed_attempts >= settings.RENEWAL_MAX_FAILED_ATTEMPTS):
+                    subscription.status = Subscription.Status.SUSPENDED
+                    outcome["suspended"] += 1
+                else:
+                    subscription.status = Subscription.Status.GRACE
+                    subscription.next_renewal_at = now + timedelta(
+                        seconds=settings.RENEWAL_RETRY_INTERVAL)
+                    outcome["grace"] += 1
+                failed.append(subscription)
+            attempts.append(ChargeAttempt(
+                subscription=subscription, amount=request.amount, gateway=gateway.name,
+                status=ChargeAttempt.Status.SUCCEEDED if result.ok else ChargeAttempt.Status.FAILED,
+                reference=request.reference, gateway_reference=result.gateway_reference,
+                error=result.error[:255], attempted_at=now))
+
+        # A renewal extends paid_until by the period from where it was, or from
+        # now for a subscription that had lapsed; one UPDATE per period length.
+        for period_days, pks in renewed.items():
+            paid_until = Greatest(F("paid_until"), Value(now)) + timedelta(days=period_days)
+            Subscription.objects.filter(pk__in=pks).update(
+                status=Subscription.Status.ACTIVE, paid_until=paid_until,
+                next_renewal_at=paid_until, failed_attempts=0)
+        if failed:
+            Subscription.objects.bulk_update(
+                failed, ["status", "next_renewal_at", "failed_attempts"])
+        ChargeAttempt.objects.bulk_create(attempts)
+    return outcome
+
+
+def renew_due(cutoff=None, chunk_size=None, gateway=None):
+    """Renew every due subscription in this process; return a Counter of outcomes."""
+    cutoff = cutoff or timezone.now()
+    outcome = Counter()
+    for after, upto in plan_chunks(cutoff, chunk_size):
+        outcome.update(renew_chunk(after, upto, cutoff, gateway))
+    return outcome
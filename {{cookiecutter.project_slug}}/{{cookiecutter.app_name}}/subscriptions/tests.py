@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase
+from django.utils import timezone
+
+from .gateways import BillingGateway, ChargeResult
+from .models import ChargeAttempt, Subscription
+from .renewals import renew_chunk
+
+
+class IdempotentGateway(BillingGateway):
+    """Charges each reference once, like a gateway honouring idempotency keys."""
+
+    name = "test"
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.requests = []
+        self.results = {}
+
+    def charge(self, request):
+        self.requests.append(request)
+        if request.reference not in self.results:
+            self.results[request.reference] = ChargeResult(request.reference, True, "charged")
+        return self.results[request.reference]
+
+
+class RenewChunkTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.subscription = Subscription.objects.create(
+            msisdn="255700000001", service="news", price=100, period_days=7,
+            paid_until=self.now, next_renewal_at=self.now - timedelta(minutes=1))
+        self.gateway = IdempotentGateway()
+
+    def test_renews_due_subscriptions(self):
+        outcome = renew_chunk(0, None, self.now, self.gateway)
+
+        self.assertEqual(outcome, {"renewed": 1})
+        self.subscription.refresh_from_db()
+        self.assertGreaterEqual(self.subscription.paid_until, self.now + timedelta(days=7))
+        self.assertEqual(self.subscription.next_renewal_at, self.subscription.paid_until)
+        attempt = ChargeAttempt.objects.get()
+        self.assertEqual((attempt.status, attempt.amount), (ChargeAttempt.Status.SUCCEEDED, 100))
+
+    def test_chunk_rolled_back_after_charging_is_charged_again_with_the_same_reference(self):
+        with mock.patch.object(ChargeAttempt.objects, "bulk_create", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                renew_chunk(0, None, self.now, self.gateway)
+
+        self.assertFalse(ChargeAttempt.objects.exists())
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.paid_until, self.now)
+
+        self.assertEqual(renew_chunk(0, None, self.now, self.gateway), {"renewed": 1})
+        first, second = self.gateway.requests
+        self.assertEqual(first.reference, second.reference)
+        self.assertEqual(len(self.gateway.results), 1)
+        self.assertEqual(ChargeAttempt.objects.get().reference, first.reference)
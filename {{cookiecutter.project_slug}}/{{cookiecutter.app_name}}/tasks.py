@@ -0,0 +1,93 @@
+"""
+Celery tasks.
+
+Tasks run on the `default` queue unless told otherwise. Send short,
+latency-sensitive tasks to `high` and long or bulk ones to `low`, either when
+declaring them or when sending them:
+
+    @shared_task(queue="high")
+    def send_password_reset(user_id):
+        ...
+
+    rebuild_report.apply_async(args=[report_id], queue="low")
+
+Each queue has its own workers, so a backlog on one never delays the others.
+Results are not stored unless a task sets ignore_result=False.
+"""
+import time
+{%- if cookiecutter.project_type == "VAS" %}
+from datetime import datetime
+{%- endif %}
+
+from celery import shared_task
+{%- if cookiecutter.project_type == "Notification" %}
+from django.conf import settings
+
+from .notifications.pipeline import dispatch_channel
+from .notifications.providers import is_configured
+{%- elif cookiecutter.project_type == "VAS" %}
+from django.conf import settings
+from django.utils import timezone
+
+from .callbacks.consumer import drain
+from .subscriptions.renewals import plan_chunks, renew_chunk
+{%- endif %}
+
+
+@shared_task(ignore_result=False)
+def noop(seconds=0):
+    """Sleep for `seconds`, then return the time the task finished; see celery_throughput."""
+    if seconds:
+        time.sleep(seconds)
+    return time.time()
+{%- if cookiecutter.project_type == "Notification" %}
+
+
+@shared_task
+def dispatch_notifications(channel):
+    """
+    Send the due notifications of one channel, for at most NOTIFICATION_DISPATCH_SECONDS.
+
+    Started by enqueue() and, for retries and scheduled notifications, by beat
+    every few seconds per channel. Several can run for the same channel: each
+    claims different rows. Channels without a provider are skipped, their
+    notifications stay pending.
+    """
+    if not is_configured(channel):
+        return 0
+    return dispatch_channel(channel, max_seconds=settings.NOTIFICATION_DISPATCH_SECONDS)
+{%- elif cookiecutter.project_type == "VAS" %}
+
+
+@shared_task
+def renew_subscriptions():
+    """
+    Start a renewal run: one renew_subscription_chunk task per chunk of due subscriptions.
+
+    Scheduled nightly by beat at RENEWAL_HOUR (UTC). The chunks go to the
+    `low` queue, where all of its workers renew them in parallel.
+    """
+    cutoff = timezone.now()
+    chunks = 0
+    for after, upto in plan_chunks(cutoff, settings.RENEWAL_CHUNK_SIZE):
+        renew_subscription_chunk.delay(after, upto, cutoff.isoformat())
+        chunks += 1
+    return chunks
+
+
+@shared_task(queue="low")
+def renew_subscription_chunk(after, upto, cutoff):
+    """Renew the due subscriptions with after < pk <= upto; see renewals.py."""
+    return dict(renew_chunk(after, upto, datetime.fromisoformat(cutoff)))
+
+
+@shared_task
+def consume_callbacks():
+    """
+    Apply buffered callbacks for at most CALLBACK_CONSUME_SECONDS.
+
+    Started by beat every CALLBACK_CONSUME_INTERVAL seconds. Several can run
+    side by side (except on SQLite): each takes different batches.
+    """
+    return drain(max_seconds=settings.CALLBACK_CONSUME_SECONDS)
+{%- endif %}
@@ -1,3 +1,10 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+
+class SmokeTests(SimpleTestCase):
+    """The project starts and answers requests; replace or extend with your own tests."""
+
+    def test_liveness_probe(self):
+        response = self.client.get("/healthz/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
@@ -0,0 +1,20 @@
+from django.urls import {% if cookiecutter.project_type != "General" %}include, {% endif %}path
+
+from . import profiling
+{%- if cookiecutter.use_asgi == "y" %}
+from . import views
+{%- endif %}
+
+urlpatterns = [
+    # Prometheus' default scrape path, without a trailing slash.
+    path('metrics', profiling.metrics, name='metrics'),
+{%- if cookiecutter.use_asgi == "y" %}
+    path('async/ping/', views.ping, name='ping'),
+    path('async/webhooks/', views.dispatch_webhooks, name='dispatch-webhooks'),
+{%- endif %}
+{%- if cookiecutter.project_type == "Notification" %}
+    path('notifications/', include('{{ cookiecutter.app_name }}.notifications.urls')),
+{%- elif cookiecutter.project_type == "VAS" %}
+    path('callbacks/', include('{{ cookiecutter.app_name }}.callbacks.urls')),
+{%- endif %}
+]
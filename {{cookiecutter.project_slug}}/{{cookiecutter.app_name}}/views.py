@@ -1,3 +1,46 @@
+{%- if cookiecutter.use_asgi == "y" -%}
+import json
+
+from django.conf import settings
+from django.http import HttpResponseForbidden, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from .http_client import post_many
+
+
+# Async views run directly on the event loop under ASGI. Use the async ORM
+# methods (aget, acount, async for ...) or sync_to_async for anything that
+# blocks, so that one worker can keep thousands of requests in flight.
+
+@require_GET
+async def ping(request):
+    return JsonResponse({'status': 'ok'})
+
+
+@require_POST
+async def dispatch_webhooks(request):
+    """
+    POST a batch of payloads to NOTIFICATION_WEBHOOK_URL concurrently.
+
+    Expects {"payloads": [...]} and is restricted to staff users.
+    """
+    user = await request.auser()
+    if not user.is_staff:
+        return HttpResponseForbidden()
+    if not settings.NOTIFICATION_WEBHOOK_URL:
+        return JsonResponse({'error': 'NOTIFICATION_WEBHOOK_URL is not set'}, status=503)
+
+    try:
+        payloads = json.loads(request.body)['payloads']
+    except (ValueError, KeyError):
+        return JsonResponse({'error': 'expected {"payloads": [...]}'}, status=400)
+
+    results = await post_many(settings.NOTIFICATION_WEBHOOK_URL, payloads)
+    delivered = sum(1 for result in results
+                    if isinstance(result, int) and result < 400)
+    return JsonResponse({'delivered': delivered, 'failed': len(results) - delivered})
+{%- else -%}
 from django.shortcuts import render
 
 # Create your views here.
+{%- endif %}
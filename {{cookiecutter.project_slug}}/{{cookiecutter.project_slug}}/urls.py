@@ -3,6 +3,10 @@ from django.urls import path, include
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+{%- if cookiecutter.use_graphql == "y" %}
+from django.views.decorators.csrf import csrf_exempt
+from graphene_django.views import GraphQLView
+{%- endif %}
 
 schema_view = get_schema_view(
     openapi.Info(title="API Documentation", default_version='v1'),
@@ -13,6 +17,9 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("", include("{{ cookiecutter.app_name }}.urls")),
+{%- if cookiecutter.use_graphql == "y" %}
+    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+{%- endif %}
 ]
 
 urlpatterns += [